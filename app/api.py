@@ -1,13 +1,35 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Request
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Tuple, Type
 import pandas as pd
-from .validation import load_rules, validate_dataframe
-import io
+from .validation import validate_dataframe, validate_chunks, Ruleset, RulesetRegistry
+from .storage import write_artifact, write_workbook, write_batches, read_sheets, dataset_files, load_artifact, read_manifest, save_frame, sheet_path, file_sha256, spool_upload, UploadTooLarge, iter_chunks, violations_path
+from .profiling import profile_dataframe, profile_chunks
+from .readers import read_table, sniff_format
+from .cleaning import build_operations, clean_dataframe
+from .anomaly import DEFAULT_PERIOD, DEFAULT_WINDOW, anomaly_columns, anomaly_records, detect_anomalies
+from .jobs import JobManager, Job, SUCCEEDED
+from .sessions import SessionStore
+from .results import ResultCache, result_key
+from .export import EXPORT_FORMATS, arrow_schema, resolve_format, stream_frame
+from .engine import (
+    QueryEngine,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    encode_page_token,
+    decode_page_token,
+    fetch_page,
+    stream_arrow,
+    stream_ndjson,
+)
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+import itertools
+import time
 import json
-import math
+import os
 from .auth import (
     User,
     UserCredentials,
@@ -18,17 +40,39 @@ from .auth import (
     register_user,
 )
 
-app = FastAPI(title="Databotics API")
-app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
-
 # ---- Server-side file session storage ----
 import tempfile, uuid
 from pathlib import Path as _Path
 
-UPLOAD_DIR = _Path(tempfile.gettempdir()) / "databotics_uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
-_sessions: Dict[str, _Path] = {}
+UPLOAD_DIR = _Path(os.getenv("UPLOAD_DIR") or _Path(tempfile.gettempdir()) / "databotics_uploads")
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# shared by every worker process; expires idle sessions and evicts LRU ones over the disk budget
+_session_store = SessionStore(UPLOAD_DIR)
 MAX_UPLOAD_SIZE = 52_428_800  # 50MB
+# /profile streams larger files through sketches instead of loading them into pandas
+MAX_PROFILE_UPLOAD_SIZE = int(os.getenv("MAX_PROFILE_UPLOAD_SIZE", 2 * 1024 ** 3))  # 2GB
+EXACT_PROFILE_MAX_BYTES = MAX_UPLOAD_SIZE
+_engine = QueryEngine()
+_session_store.on_remove.append(_engine.release)
+# session work on files up to this size runs inline (off the event loop); larger files become background jobs
+JOB_INLINE_MAX_BYTES = int(os.getenv("JOB_INLINE_MAX_BYTES", 5 * 1024 * 1024))
+# job state and results are shared by every worker process; jobs run where they were submitted
+_jobs = JobManager(path=UPLOAD_DIR / "jobs.sqlite")
+# registered rulesets are found by id from any worker
+_rulesets = RulesetRegistry(path=UPLOAD_DIR / "rulesets.sqlite")
+# profile/validate/analyze results keyed by dataset content hash + parameters
+_result_cache = ResultCache()
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    _session_store.start_sweeper()
+    yield
+    _session_store.stop_sweeper()
+
+
+app = FastAPI(title="Databotics API", lifespan=_lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
 # ---- Pydantic models ----
 class ColumnStats(BaseModel):
@@ -36,7 +80,11 @@ class ColumnStats(BaseModel):
     type: str
     null_count: int
     null_pct: float
+    distinct_count: Optional[int] = None
+    top_values: Optional[List[Dict[str, Any]]] = None
     stats: Optional[Dict[str, Any]] = None
+    histogram: Optional[Dict[str, List[float]]] = None
+    approximate: Optional[List[str]] = None
 
 class ProfileResponse(BaseModel):
     dataset_id: Optional[str]
@@ -45,6 +93,8 @@ class ProfileResponse(BaseModel):
     columns: List[ColumnStats]
     sample_rows: List[Dict[str, Any]]
     warnings: List[str] = []
+    approximate: bool = False
+    error_bounds: Optional[Dict[str, float]] = None
 
 class ValidateResponse(BaseModel):
     dataset_id: Optional[str]
@@ -52,6 +102,14 @@ class ValidateResponse(BaseModel):
     summary: Dict[str, Any]
     violations: List[Dict[str, Any]]
 
+class RulesetRequest(BaseModel):
+    columns: Dict[str, Dict[str, Any]]
+
+class RulesetResponse(BaseModel):
+    ruleset_id: str
+    source: Optional[str] = None
+    rules: Dict[str, Any]
+
 class GenerateSQLRequest(BaseModel):
     question: str
     table: str
@@ -71,44 +129,190 @@ class AnalyzeRequest(BaseModel):
 
 class AnalyzeResponse(BaseModel):
     anomalies: List[Dict[str,Any]]
+    columns: Optional[Dict[str, List[Any]]] = None
     summary: Dict[str,Any]
     narrative: str
 
+class ExtractRequest(BaseModel):
+    connector: str = Field(pattern='^(postgres|mysql)$')
+    sql: str
+    batch_rows: int = Field(50_000, ge=1, le=1_000_000)
+    name: Optional[str] = None
+
+class AnalyzeParams:
+    """Query parameters shared by the /analyze endpoints."""
+
+    def __init__(
+        self,
+        timestamp_col: str = "timestamp",
+        metric_col: str = "value",
+        dimension_cols: Optional[str] = None,
+        method: Optional[str] = "simple",
+        threshold: Optional[float] = None,
+        window: int = Query(DEFAULT_WINDOW, ge=2),
+        period: int = Query(DEFAULT_PERIOD, ge=2),
+        layout: str = Query('records', pattern='^(records|columnar)$'),
+    ):
+        self.timestamp_col = timestamp_col
+        self.metric_col = metric_col
+        self.dimension_cols = dimension_cols
+        self.method = method
+        self.threshold = threshold
+        self.window = window
+        self.period = period
+        self.layout = layout
+
 # ---- Helpers ----
-def _read_table_from_upload(contents: bytes) -> pd.DataFrame:
+def _read_table_from_upload(source: bytes | _Path) -> pd.DataFrame:
     try:
-        return pd.read_csv(io.BytesIO(contents))
-    except Exception:
-        try:
-            return pd.read_excel(io.BytesIO(contents))
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=str(e))
+        return read_table(source)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-def _get_session_df(session_id: str) -> pd.DataFrame:
-    path = _sessions.get(session_id)
-    if not path or not path.exists():
+def _sheets(path: _Path) -> List[Dict[str, Any]]:
+    return read_sheets(path)
+
+def _get_session_path(session_id: str, sheet: Optional[str] = None) -> _Path:
+    """Dataset path of a session, or of one worksheet when the upload was a workbook."""
+    path = _session_store.get(session_id)
+    if path is None:
         raise HTTPException(status_code=404, detail="Session not found. Upload a file first.")
-    return _read_table_from_upload(path.read_bytes())
+    if sheet is None:
+        return path
+    names = [s['name'] for s in _sheets(path)]
+    if sheet not in names:
+        raise HTTPException(status_code=404, detail=f"Sheet '{sheet}' not found. Available: {', '.join(names) or 'none'}")
+    return sheet_path(path, names.index(sheet))
 
+def _get_session_df(session_id: str, sheet: Optional[str] = None) -> pd.DataFrame:
+    path = _get_session_path(session_id, sheet)
+    # fast path: columnar artifact written at upload time
+    df = load_artifact(path)
+    if df is not None:
+        return df
+    df = _read_table_from_upload(path)
+    write_artifact(df, path)
+    _session_store.refresh_size(session_id)
+    return df
 
-def enforce_upload_size(request: Request):
+
+async def _spool(file: UploadFile, dest: _Path, max_size: int) -> Tuple[int, str]:
+    try:
+        return await spool_upload(file, dest, max_size)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+@asynccontextmanager
+async def _spooled_upload(file: UploadFile, max_size: Optional[int] = None):
+    """Spool a one-off upload to a temp file on disk; yields (path, sha256). Removed when the block exits."""
+    tmp = UPLOAD_DIR / f"tmp_{uuid.uuid4().hex}"
+    try:
+        _, sha256 = await _spool(file, tmp, max_size or MAX_UPLOAD_SIZE)
+        yield tmp, sha256
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _ingest(path: _Path) -> Optional[Dict[str, Any]]:
+    """Parse an upload once and keep a columnar copy (of every sheet, for workbooks). None if it cannot be parsed."""
+    try:
+        if sniff_format(path) == 'xlsx':
+            return write_workbook(path)
+        return write_artifact(_read_table_from_upload(path), path)
+    except (HTTPException, ValueError):
+        return None
+
+
+def _check_content_length(request: Request, max_size: int):
     content_length = request.headers.get("content-length")
-    if content_length and int(content_length) > MAX_UPLOAD_SIZE:
-        raise HTTPException(status_code=413, detail="Upload too large. Max size is 50MB.")
+    if content_length and int(content_length) > max_size:
+        raise HTTPException(status_code=413, detail=str(UploadTooLarge(max_size)))
+
+
+def enforce_upload_size(request: Request):
+    _check_content_length(request, MAX_UPLOAD_SIZE)
+
+
+def enforce_profile_upload_size(request: Request):
+    _check_content_length(request, MAX_PROFILE_UPLOAD_SIZE)
+
+
+JOB_MODE = Query('auto', pattern='^(auto|inline|job)$')
+JOB_RESPONSES = {202: {"description": "Accepted as a background job; poll /jobs/{job_id}"}}
+
+
+async def _run_or_submit(kind: str, path: _Path, mode: str, user: User, work: Callable[[Optional[Job]], Any]):
+    """
+    Run ``work`` in the threadpool and return its result (mode=inline, or auto
+    for files up to JOB_INLINE_MAX_BYTES), otherwise submit it as a background
+    job and answer 202 with the job id.
+    """
+    if mode == 'inline' or (mode == 'auto' and path.stat().st_size <= JOB_INLINE_MAX_BYTES):
+        return await run_in_threadpool(work, None)
+    job = _jobs.submit(kind, work, owner=user.username)
+    return JSONResponse(status_code=202, content={**job.to_dict(), "status_url": f"/jobs/{job.id}"})
+
+
+def _session_result_key(session_id: str, operation: str, **params: Any) -> Optional[str]:
+    sha256 = _session_store.sha256(session_id)
+    return result_key(sha256, operation, **params) if sha256 else None
+
+
+def _cached_result(key: Optional[str], model: Type[BaseModel], **identity: Any) -> Optional[BaseModel]:
+    """Stored result for ``key`` with the caller's identity fields (dataset_id, filename) filled in."""
+    value = _result_cache.get(key) if key else None
+    if value is None:
+        return None
+    return model.model_validate_json(value).model_copy(update=identity)
+
+
+def _remember_result(key: Optional[str], result: BaseModel) -> BaseModel:
+    if key:
+        _result_cache.put(key, result.model_dump_json())
+    return result
+
+
+async def _memoized(key: str, model: Type[BaseModel], compute: Callable[[], BaseModel], **identity: Any) -> BaseModel:
+    """Cached result, or ``compute()`` in the threadpool and cache it."""
+    hit = _cached_result(key, model, **identity)
+    if hit is not None:
+        return hit
+    return await run_in_threadpool(lambda: _remember_result(key, compute()))
+
+
+async def _run_memoized(kind: str, path: _Path, mode: str, user: User, work: Callable[[Optional[Job]], BaseModel], key: Optional[str], model: Type[BaseModel], **identity: Any):
+    """``_run_or_submit`` behind the result cache; a hit answers at once unless mode=job asked for a job id."""
+    if mode != 'job':
+        hit = _cached_result(key, model, **identity)
+        if hit is not None:
+            return hit
+
+    def run(job: Optional[Job]) -> BaseModel:
+        hit = _cached_result(key, model, **identity)
+        return hit if hit is not None else _remember_result(key, work(job))
+    return await _run_or_submit(kind, path, mode, user, run)
+
+
+def _get_job(job_id: str, user: User) -> Job:
+    job = _jobs.get(job_id, owner=user.username)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
 # ---- Endpoints ----
 
 @app.post('/auth/register', response_model=Token)
 async def register(creds: UserCredentials):
-    user = register_user(creds.username, creds.password)
+    user = await register_user(creds.username, creds.password)
     token = create_access_token({"sub": user.username})
     return Token(access_token=token)
 
 
 @app.post('/auth/login', response_model=Token)
 async def login(creds: UserCredentials):
-    user = authenticate_user(creds.username, creds.password)
+    user = await authenticate_user(creds.username, creds.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid username or password")
     token = create_access_token({"sub": user.username})
@@ -119,101 +323,248 @@ async def upload_file(file: UploadFile = File(...), _: User = Depends(get_curren
     """Store file server-side, return session_id for subsequent calls."""
     session_id = uuid.uuid4().hex
     dest = UPLOAD_DIR / f"{session_id}_{file.filename}"
-    contents = await file.read()
-    dest.write_bytes(contents)
-    _sessions[session_id] = dest
-    return {"session_id": session_id, "filename": file.filename, "size": len(contents)}
+    size, sha256 = await _spool(file, dest, MAX_UPLOAD_SIZE)
+    # unparseable files surface their error on first use
+    manifest = await run_in_threadpool(_ingest, dest)
+    _session_store.add(session_id, dest, sha256)
+    resp = {"session_id": session_id, "filename": file.filename, "size": size, "sha256": sha256}
+    if manifest:
+        resp["row_count"] = manifest["row_count"]
+    sheets = _sheets(dest)
+    if sheets:
+        resp["sheets"] = sheets
+    return resp
 
 
 @app.get('/session/{session_id}')
 async def get_session(session_id: str, _: User = Depends(get_current_user)):
-    path = _sessions.get(session_id)
-    if not path or not path.exists():
+    path = _session_store.get(session_id)
+    if path is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    return {"session_id": session_id, "filename": path.name, "size": path.stat().st_size}
-
-
-@app.post('/profile/{session_id}', response_model=ProfileResponse)
-async def profile_by_session(session_id: str, _: User = Depends(get_current_user)):
-    """Profile a previously uploaded file by session_id."""
-    df = _get_session_df(session_id)
-    cols = []
-    for c in df.columns:
-        null_count = int(df[c].isnull().sum())
-        null_pct = float(null_count) / max(1, len(df))
-        stats = None
-        if pd.api.types.is_numeric_dtype(df[c]):
-            stats = {
-                'min': float(df[c].min()),
-                'max': float(df[c].max()),
-                'mean': float(df[c].mean()) if not math.isnan(df[c].mean()) else None,
-                'std': float(df[c].std()) if not math.isnan(df[c].std()) else None,
-            }
-        cols.append(ColumnStats(name=str(c), type=str(df[c].dtype), null_count=null_count, null_pct=null_pct, stats=stats))
-    sample = df.head(20).to_dict(orient='records')
-    return ProfileResponse(dataset_id=session_id, filename=path.name if (path := _sessions.get(session_id)) else None, row_count=len(df), columns=cols, sample_rows=sample)
+    resp = {"session_id": session_id, "filename": path.name, "size": path.stat().st_size}
+    manifest = read_manifest(path)
+    if manifest:
+        resp["row_count"] = manifest["row_count"]
+        resp["schema"] = {c["name"]: c["dtype"] for c in manifest["columns"]}
+    sheets = _sheets(path)
+    if sheets:
+        resp["sheets"] = sheets
+    return resp
+
+
+@app.delete('/session/{session_id}', status_code=204)
+async def delete_session(session_id: str, _: User = Depends(get_current_user)):
+    """Drop a session now and delete its files instead of waiting for it to expire."""
+    if not _session_store.remove(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+
+
+def _profile_response(profile: Dict[str, Any], dataset_id: Optional[str], filename: Optional[str]) -> ProfileResponse:
+    cols = [ColumnStats(**c) for c in profile['columns']]
+    return ProfileResponse(
+        dataset_id=dataset_id,
+        filename=filename,
+        row_count=profile['row_count'],
+        columns=cols,
+        sample_rows=profile['sample_rows'],
+        approximate=profile.get('approximate', False),
+        error_bounds=profile.get('error_bounds'),
+    )
+
+
+def _track_chunks(path: _Path, job: Optional[Job]):
+    chunks = iter_chunks(path)
+    if job is None:
+        return chunks
+    return job.track(chunks, total=(read_manifest(path) or {}).get('row_count'))
+
+
+def _sketched(path: _Path, approximate: bool) -> bool:
+    return approximate or path.stat().st_size > EXACT_PROFILE_MAX_BYTES
+
+
+def _profile_path(path: _Path, approximate: bool, job: Optional[Job] = None) -> Optional[Dict[str, Any]]:
+    """Sketch-based profile for large files (or when asked); None means profile exactly."""
+    if not _sketched(path, approximate):
+        return None
+    try:
+        return profile_chunks(_track_chunks(path, job))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post('/profile/{session_id}', response_model=ProfileResponse, responses=JOB_RESPONSES)
+async def profile_by_session(session_id: str, approximate: bool = False, sheet: Optional[str] = None, mode: str = JOB_MODE, user: User = Depends(get_current_user)):
+    """Profile a previously uploaded file (or one sheet of a workbook) by session_id. Large files run as a background job (see mode)."""
+    path = _get_session_path(session_id, sheet)
+    key = _session_result_key(session_id, 'profile', approximate=_sketched(path, approximate), sheet=sheet)
+
+    def work(job: Optional[Job]) -> ProfileResponse:
+        profile = _profile_path(path, approximate, job) or profile_dataframe(_get_session_df(session_id, sheet))
+        return _profile_response(profile, dataset_id=session_id, filename=path.name)
+    return await _run_memoized('profile', path, mode, user, work, key, ProfileResponse, dataset_id=session_id, filename=path.name)
 
 
 @app.post('/profile', response_model=ProfileResponse)
-async def profile(file: UploadFile = File(...), _: User = Depends(get_current_user), __: None = Depends(enforce_upload_size)):
-    contents = await file.read()
-    df = _read_table_from_upload(contents)
-    cols = []
-    for c in df.columns:
-        null_count = int(df[c].isnull().sum())
-        null_pct = float(null_count) / max(1, len(df))
-        stats = None
-        if pd.api.types.is_numeric_dtype(df[c]):
-            stats = {
-                'min': float(df[c].min()),
-                'max': float(df[c].max()),
-                'mean': float(df[c].mean()) if not math.isnan(df[c].mean()) else None,
-                'std': float(df[c].std()) if not math.isnan(df[c].std()) else None,
-            }
-        cols.append(ColumnStats(name=str(c), type=str(df[c].dtype), null_count=null_count, null_pct=null_pct, stats=stats))
-    sample = df.head(20).to_dict(orient='records')
-    return ProfileResponse(dataset_id=None, filename=file.filename, row_count=len(df), columns=cols, sample_rows=sample)
+async def profile(file: UploadFile = File(...), approximate: bool = False, _: User = Depends(get_current_user), __: None = Depends(enforce_profile_upload_size)):
+    """Profile a file directly. Files over 50MB (or approximate=true) are profiled in a streaming pass with sketches."""
+    async with _spooled_upload(file, MAX_PROFILE_UPLOAD_SIZE) as (path, sha256):
+        return await _memoized(
+            result_key(sha256, 'profile', approximate=_sketched(path, approximate)),
+            ProfileResponse,
+            lambda: _profile_response(_profile_path(path, approximate) or profile_dataframe(_read_table_from_upload(path)), dataset_id=None, filename=file.filename),
+            dataset_id=None,
+            filename=file.filename,
+        )
 
-@app.post('/validate', response_model=ValidateResponse)
-async def validate(file: UploadFile = File(...), rules_path: str = 'ui/validation_rules/basic.yaml', _: User = Depends(get_current_user), __: None = Depends(enforce_upload_size)):
-    contents = await file.read()
-    df = _read_table_from_upload(contents)
-    rules = load_rules(rules_path)
-    report = validate_dataframe(df, rules)
+
+def _get_ruleset(rules_path: str, ruleset_id: Optional[str] = None) -> Ruleset:
+    if ruleset_id:
+        rs = _rulesets.get(ruleset_id)
+        if rs is None:
+            raise HTTPException(status_code=404, detail="Ruleset not found. Register it via /rulesets or pass rules_path.")
+        return rs
+    try:
+        return _rulesets.load(rules_path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def _validate_df(df: pd.DataFrame, ruleset: Ruleset, dataset_id: Optional[str] = None) -> ValidateResponse:
+    report = validate_dataframe(df, ruleset.plans)
     # normalize output
-    return ValidateResponse(dataset_id=None, ruleset_id=None, summary=report.get('summary', {}), violations=report.get('errors', []))
+    return ValidateResponse(dataset_id=dataset_id, ruleset_id=ruleset.id, summary=report.get('summary', {}), violations=report.get('errors', []))
 
-@app.post('/clean')
-async def clean(file: UploadFile = File(...), trim_strings: bool = True, normalize_case: Optional[str] = None, drop_duplicates: bool = False, _: User = Depends(get_current_user), __: None = Depends(enforce_upload_size)):
-    contents = await file.read()
-    df = _read_table_from_upload(contents)
-    before = len(df)
-    if trim_strings:
-        for c in df.select_dtypes(include=['object']).columns:
-            df[c] = df[c].apply(lambda v: v.strip() if isinstance(v, str) else v)
-    if normalize_case in ('lower','upper'):
-        for c in df.select_dtypes(include=['object']).columns:
-            if normalize_case == 'lower':
-                df[c] = df[c].apply(lambda v: v.lower() if isinstance(v, str) else v)
-            else:
-                df[c] = df[c].apply(lambda v: v.upper() if isinstance(v, str) else v)
-    if drop_duplicates:
-        df = df.drop_duplicates()
-    after = len(df)
-    # return parquet bytes if pyarrow available, else CSV
+
+@app.post('/rulesets', response_model=RulesetResponse)
+async def register_ruleset(req: RulesetRequest, _: User = Depends(get_current_user)):
+    """Compile and cache a ruleset; validate against it later with ?ruleset_id=..."""
+    rules = req.model_dump()
     try:
-        import pyarrow as pa
-        import pyarrow.parquet as pq
-        table = pa.Table.from_pandas(df)
-        buf = io.BytesIO()
-        pq.write_table(table, buf)
-        buf.seek(0)
-        return StreamingResponse(buf, media_type='application/octet-stream', headers={'Content-Disposition':'attachment; filename="cleaned.parquet"'})
-    except Exception:
-        buf = io.StringIO()
-        df.to_csv(buf, index=False)
-        buf.seek(0)
-        return StreamingResponse(io.BytesIO(buf.getvalue().encode('utf-8')), media_type='text/csv', headers={'Content-Disposition':'attachment; filename="cleaned.csv"'})
+        rs = _rulesets.register(rules, source='api')
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid ruleset: {e}")
+    return RulesetResponse(ruleset_id=rs.id, source=rs.source, rules=rs.rules)
+
+
+@app.get('/rulesets/{ruleset_id}', response_model=RulesetResponse)
+async def get_ruleset(ruleset_id: str, _: User = Depends(get_current_user)):
+    rs = _get_ruleset('', ruleset_id)
+    return RulesetResponse(ruleset_id=rs.id, source=rs.source, rules=rs.rules)
+
+
+@app.post('/validate/{session_id}', response_model=ValidateResponse, responses=JOB_RESPONSES)
+async def validate_by_session(session_id: str, rules_path: str = 'ui/validation_rules/basic.yaml', ruleset_id: Optional[str] = None, chunked: bool = False, sheet: Optional[str] = None, mode: str = JOB_MODE, user: User = Depends(get_current_user)):
+    """
+    Validate a previously uploaded file by session_id. chunked=true streams the
+    file in row batches, reports exact per-rule failing-row counts and writes
+    failing row indices to a sidecar served by /validate/{session_id}/violations.
+    """
+    ruleset = _get_ruleset(rules_path, ruleset_id)
+    path = _get_session_path(session_id, sheet)
+    # chunked runs also write this session's violations sidecar, so they always execute
+    key = None if chunked else _session_result_key(session_id, 'validate', ruleset_id=ruleset.id, sheet=sheet)
+
+    def work(job: Optional[Job]) -> ValidateResponse:
+        if not chunked:
+            return _validate_df(_get_session_df(session_id, sheet), ruleset, dataset_id=session_id)
+        sidecar = violations_path(path)
+        sidecar.unlink(missing_ok=True)
+        try:
+            report = validate_chunks(_track_chunks(path, job), ruleset.plans, sidecar_path=sidecar)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        _session_store.refresh_size(session_id)
+        return ValidateResponse(dataset_id=session_id, ruleset_id=ruleset.id, summary=report['summary'], violations=report['errors'])
+    return await _run_memoized('validate', path, mode, user, work, key, ValidateResponse, dataset_id=session_id)
+
+
+@app.get('/validate/{session_id}/violations')
+async def get_violations(session_id: str, sheet: Optional[str] = None, _: User = Depends(get_current_user)):
+    """Parquet sidecar of (rule, row) failing row indices from the last chunked validation."""
+    sidecar = violations_path(_get_session_path(session_id, sheet))
+    if not sidecar.exists():
+        raise HTTPException(status_code=404, detail="No violations recorded. Run /validate/{session_id}?chunked=true first.")
+    return FileResponse(sidecar, media_type='application/octet-stream', filename='violations.parquet')
+
+
+@app.post('/validate', response_model=ValidateResponse)
+async def validate(file: UploadFile = File(...), rules_path: str = 'ui/validation_rules/basic.yaml', ruleset_id: Optional[str] = None, _: User = Depends(get_current_user), __: None = Depends(enforce_upload_size)):
+    ruleset = _get_ruleset(rules_path, ruleset_id)
+    async with _spooled_upload(file) as (path, sha256):
+        key = result_key(sha256, 'validate', ruleset_id=ruleset.id)
+        return await _memoized(key, ValidateResponse, lambda: _validate_df(_read_table_from_upload(path), ruleset), dataset_id=None)
+
+
+class CleanOptions:
+    """Query parameters shared by the /clean endpoints."""
+
+    def __init__(
+        self,
+        trim_strings: bool = True,
+        normalize_case: Optional[str] = None,
+        drop_duplicates: bool = False,
+        collapse_whitespace: bool = False,
+        normalize_nulls: bool = False,
+        fmt: str = Query('parquet', alias='format'),
+        compression: Optional[str] = None,
+        save_as_session: bool = False,
+    ):
+        self.operations = build_operations(trim_strings, normalize_case, collapse_whitespace, normalize_nulls)
+        self.drop_duplicates = drop_duplicates
+        try:
+            self.fmt, self.compression = resolve_format(fmt, compression)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        self.save_as_session = save_as_session
+
+
+def _save_session(df: pd.DataFrame, filename: str) -> Dict[str, Any]:
+    """Register ``df`` as a new session without a download/upload round trip."""
+    session_id = uuid.uuid4().hex
+    ext = 'parquet' if arrow_schema(df) is not None else 'csv'
+    name = f"{_Path(filename).stem}.{ext}"
+    dest = UPLOAD_DIR / f"{session_id}_{name}"
+    save_frame(df, dest)
+    sha256 = file_sha256(dest)
+    _session_store.add(session_id, dest, sha256)
+    return {"session_id": session_id, "filename": name, "size": dest.stat().st_size, "sha256": sha256, "row_count": len(df)}
+
+
+def _clean_df(df: pd.DataFrame, opts: CleanOptions, filename: str):
+    df = clean_dataframe(df, opts.operations, opts.drop_duplicates)
+    if opts.save_as_session:
+        return _save_session(df, f"cleaned_{filename}")
+    fmt, compression = opts.fmt, opts.compression
+    schema = arrow_schema(df)
+    if schema is None and fmt != 'csv':
+        # mixed-type object columns cannot be encoded columnar
+        fmt, compression = 'csv', 'none'
+    media_type, ext, _ = EXPORT_FORMATS[fmt]
+    if fmt == 'csv' and compression == 'gzip':
+        ext += '.gz'
+    return StreamingResponse(
+        stream_frame(df, fmt, compression, schema),
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="cleaned.{ext}"'},
+    )
+
+
+@app.post('/clean/{session_id}')
+async def clean_by_session(session_id: str, opts: CleanOptions = Depends(), sheet: Optional[str] = None, _: User = Depends(get_current_user)):
+    """
+    Clean a previously uploaded file by session_id. The result is streamed as
+    format=parquet|csv|arrow, or stored as a new session with save_as_session=true.
+    """
+    filename = _get_session_path(session_id).name.split('_', 1)[-1]
+    return await run_in_threadpool(lambda: _clean_df(_get_session_df(session_id, sheet), opts, filename))
+
+
+@app.post('/clean')
+async def clean(file: UploadFile = File(...), opts: CleanOptions = Depends(), _: User = Depends(get_current_user), __: None = Depends(enforce_upload_size)):
+    async with _spooled_upload(file) as (path, sha256):
+        df = await run_in_threadpool(_read_table_from_upload, path)
+    return await run_in_threadpool(_clean_df, df, opts, file.filename or 'upload')
 
 @app.post('/generate_sql', response_model=GenerateSQLResponse)
 async def generate_sql(req: GenerateSQLRequest, _: User = Depends(get_current_user)):
@@ -228,8 +579,8 @@ async def generate_sql(req: GenerateSQLRequest, _: User = Depends(get_current_us
         return GenerateSQLResponse(sql=sql, explanation='Fallback deterministic SQL: select top 100 rows', safety={'is_safe': True, 'reasons': []})
     # if key exists, call LLM wrapper (mockable)
     try:
-        from .llm import generate_sql as llm_generate_sql
-        sql, expl = llm_generate_sql(req.question, req.schema, req.sample_rows)
+        from .llm import agenerate_sql as llm_generate_sql
+        sql, expl = await llm_generate_sql(req.question, req.schema, req.sample_rows)
         return GenerateSQLResponse(sql=sql, explanation=expl, safety={'is_safe': True, 'reasons': []})
     except Exception:
         # fallback
@@ -237,44 +588,200 @@ async def generate_sql(req: GenerateSQLRequest, _: User = Depends(get_current_us
         sql = f"SELECT {col_list} FROM {req.table} LIMIT 100;"
         return GenerateSQLResponse(sql=sql, explanation='Fallback deterministic SQL due to LLM error', safety={'is_safe': True, 'reasons': []})
 
+def _analyze_df(df: pd.DataFrame, params: AnalyzeParams) -> AnalyzeResponse:
+    dims = [c.strip() for c in params.dimension_cols.split(',') if c.strip()] if params.dimension_cols else None
+    try:
+        anomalies, summary = detect_anomalies(
+            df, params.timestamp_col, params.metric_col, dims, params.method,
+            threshold=params.threshold, window=params.window, period=params.period,
+        )
+    except KeyError as e:
+        # str() of a KeyError is the repr of its argument; use the message itself
+        raise HTTPException(status_code=400, detail=str(e.args[0]) if e.args else "Column not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    narrative = f"No LLM available; used {summary['method_used']} detection over {summary['series_count']} series."
+    if params.layout == 'columnar':
+        return AnalyzeResponse(anomalies=[], columns=anomaly_columns(anomalies), summary=summary, narrative=narrative)
+    return AnalyzeResponse(anomalies=anomaly_records(anomalies), summary=summary, narrative=narrative)
+
+
+@app.post('/analyze/{session_id}', response_model=AnalyzeResponse, responses=JOB_RESPONSES)
+async def analyze_by_session(session_id: str, params: AnalyzeParams = Depends(), sheet: Optional[str] = None, mode: str = JOB_MODE, user: User = Depends(get_current_user)):
+    """Run anomaly analysis on a previously uploaded file by session_id. Large files run as a background job (see mode)."""
+    path = _get_session_path(session_id, sheet)
+    key = _session_result_key(session_id, 'analyze', sheet=sheet, **vars(params))
+    return await _run_memoized('analyze', path, mode, user, lambda job: _analyze_df(_get_session_df(session_id, sheet), params), key, AnalyzeResponse)
+
+
 @app.post('/analyze', response_model=AnalyzeResponse)
 async def analyze(
     file: UploadFile = File(...),
+    params: AnalyzeParams = Depends(),
     _: User = Depends(get_current_user),
     __: None = Depends(enforce_upload_size),
-    timestamp_col: str = "timestamp",
-    metric_col: str = "value",
-    dimension_cols: Optional[str] = None,
-    method: Optional[str] = "simple",
 ):
-    contents = await file.read()
-    df = _read_table_from_upload(contents)
-    # simple fallback z-score detection
-    ts = pd.to_datetime(df[timestamp_col])
-    vals = pd.to_numeric(df[metric_col], errors='coerce')
-    mean = vals.mean()
-    std = vals.std()
-    anomalies = []
-    if std and std > 0:
-        z = (vals - mean) / std
-        outliers = z[abs(z) > 3]
-        for idx in outliers.index:
-            anomalies.append({'timestamp': str(ts.iloc[idx]), 'value': float(vals.iloc[idx]), 'score': float(z.iloc[idx])})
-    narrative = 'No LLM available; used z-score fallback.'
-    return AnalyzeResponse(anomalies=anomalies, summary={'count': len(anomalies), 'method_used': 'zscore'}, narrative=narrative)
+    """
+    Detect anomalies in metric_col per series. dimension_cols (comma separated)
+    splits the file into series; method is simple|zscore|rolling_zscore|
+    rolling_mad|rolling_iqr|seasonal. layout=columnar returns one list per column.
+    """
+    async with _spooled_upload(file) as (path, sha256):
+        return await _memoized(result_key(sha256, 'analyze', **vars(params)), AnalyzeResponse, lambda: _analyze_df(_read_table_from_upload(path), params))
 
-@app.post('/query')
-async def query(file: UploadFile = File(...), sql: str = '', _: User = Depends(get_current_user), __: None = Depends(enforce_upload_size)):
-    contents = await file.read()
-    df = _read_table_from_upload(contents)
+
+_STREAM_FORMATS = {
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+    'arrow': (stream_arrow, 'application/vnd.apache.arrow.stream'),
+}
+
+
+def _query_file(key: str, path: _Path, sql: str, page_size: int = DEFAULT_PAGE_SIZE, page_token: Optional[str] = None, transient: bool = False, tables: Optional[Dict[str, _Path]] = None) -> Dict[str, Any]:
+    """
+    Run one page of ``sql`` on a pooled DuckDB connection whose loaded_table
+    view scans ``path`` directly. A transient file is gone after this call, so
+    no page token could be followed: its full result is returned instead.
+    """
     try:
-        import duckdb
-        con = duckdb.connect(database=':memory:')
-        # register dataframe as table
-        con.register('loaded_table', df)
-        res = con.execute(sql).fetchdf()
-        rows = res.to_dict(orient='records')
-        cols = list(res.columns)
-        return {'columns': cols, 'rows': rows, 'row_count': len(res)}
+        offset = decode_page_token(page_token, sql) if page_token else 0
+        with _engine.connect(key, path, fallback=lambda: _read_table_from_upload(path), tables=tables) as con:
+            cols, rows, has_more = fetch_page(con, sql, offset, None if transient else page_size)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if transient:
+            _engine.release(key)
+    next_token = encode_page_token(sql, offset + len(rows)) if has_more else None
+    return {'columns': cols, 'rows': rows, 'row_count': len(rows), 'has_more': has_more, 'next_page_token': next_token}
+
+
+def _stream_query(key: str, path: _Path, sql: str, fmt: str, tables: Optional[Dict[str, _Path]] = None) -> StreamingResponse:
+    """Stream the full result of ``sql`` as record batches, on a cursor of the session's pooled connection."""
+    streamer, media_type = _STREAM_FORMATS[fmt]
+
+    def _chunks():
+        with _engine.cursor(key, path, fallback=lambda: _read_table_from_upload(path), tables=tables) as con:
+            yield from streamer(con, sql)
+
+    chunks = _chunks()
+    # pull the first chunk eagerly so bad SQL is a 400, not a truncated 200
+    try:
+        first = next(chunks, b'')
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(itertools.chain([first], chunks), media_type=media_type)
+
+
+@app.post('/query/{session_id}')
+async def query_by_session(
+    session_id: str,
+    sql: str = '',
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    fmt: str = Query('json', alias='format'),
+    _: User = Depends(get_current_user),
+):
+    """
+    Run SQL against a previously uploaded file by session_id (table name: loaded_table;
+    each sheet of a workbook is also a table named after the sheet).
+    format=json returns one page plus a next_page_token; format=ndjson|arrow streams the whole result.
+    """
+    path = _get_session_path(session_id)
+    tables = {s['name']: sheet_path(path, i) for i, s in enumerate(_sheets(path))}
+    if fmt in _STREAM_FORMATS:
+        return await run_in_threadpool(_stream_query, session_id, path, sql, fmt, tables)
+    if fmt != 'json':
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+    return await run_in_threadpool(lambda: _query_file(session_id, path, sql, page_size=page_size, page_token=page_token, tables=tables))
+
+
+@app.post('/query')
+async def query(file: UploadFile = File(...), sql: str = '', _: User = Depends(get_current_user), __: None = Depends(enforce_upload_size)):
+    """Run SQL against a one-off upload and return the full result. Upload once and use /query/{session_id} to page large results."""
+    async with _spooled_upload(file) as (path, sha256):
+        return await run_in_threadpool(lambda: _query_file(path.name, path, sql, transient=True))
+
+
+def _connector_loader(connector: str):
+    """Shared loader of a database connector; imported on first use so the drivers stay optional."""
+    if connector == 'postgres':
+        from connectors.postgres_conn import postgres_loader
+        return postgres_loader()
+    from connectors.mysql_conn import mysql_loader
+    return mysql_loader()
+
+
+def _extract_session(req: ExtractRequest, job: Job) -> Dict[str, Any]:
+    """Stream the query result from the database straight into a new session's Parquet artifact."""
+    loader = _connector_loader(req.connector)
+    session_id = uuid.uuid4().hex
+    name = f"{_Path(req.name or req.connector).stem}.parquet"
+    dest = UPLOAD_DIR / f"{session_id}_{name}"
+    started = time.perf_counter()
+    try:
+        manifest = write_batches(job.track(loader.extract(req.sql, req.batch_rows)), dest)
+    except BaseException:
+        for f in dataset_files(dest):
+            f.unlink(missing_ok=True)
+        raise
+    if manifest is None:
+        raise HTTPException(status_code=400, detail="Query returned no rows")
+    elapsed = time.perf_counter() - started
+    sha256 = file_sha256(dest)
+    _session_store.add(session_id, dest, sha256)
+    rows = manifest["row_count"]
+    return {
+        "session_id": session_id,
+        "filename": name,
+        "size": dest.stat().st_size,
+        "sha256": sha256,
+        "row_count": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+@app.post('/extract', status_code=202, responses=JOB_RESPONSES)
+async def extract(req: ExtractRequest, user: User = Depends(get_current_user)):
+    """
+    Extract a query result from Postgres or MySQL into a new session. Rows are
+    read through a server-side cursor in batch_rows batches and appended to
+    the session's Parquet artifact, so the full result is never in memory.
+    The query runs in a read-only transaction. Always runs as a background
+    job; the job result holds the session_id.
+    """
+    job = _jobs.submit('extract', lambda job: _extract_session(req, job), owner=user.username)
+    return JSONResponse(status_code=202, content={**job.to_dict(), "status_url": f"/jobs/{job.id}"})
+
+
+@app.get('/cache/stats')
+async def cache_stats(_: User = Depends(get_current_user)):
+    """Hit rate and size of the profile/validate/analyze result cache."""
+    return _result_cache.stats()
+
+
+@app.get('/jobs/{job_id}')
+async def get_job(job_id: str, user: User = Depends(get_current_user)):
+    """Status and progress (0..1) of a background job."""
+    return _get_job(job_id, user).to_dict()
+
+
+@app.get('/jobs/{job_id}/result')
+async def get_job_result(job_id: str, user: User = Depends(get_current_user)):
+    job = _get_job(job_id, user)
+    if job.status != SUCCEEDED:
+        detail = f"Job is {job.status}" + (f": {job.error}" if job.error else "")
+        raise HTTPException(status_code=409, detail=detail)
+    return job.result
+
+
+@app.delete('/jobs/{job_id}')
+async def cancel_job(job_id: str, user: User = Depends(get_current_user)):
+    """Cancel a job: queued jobs never start, running ones stop at their next progress checkpoint."""
+    job = _get_job(job_id, user)
+    _jobs.cancel(job)
+    return job.to_dict()
@@ -1,6 +1,12 @@
+import asyncio
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional, Tuple
 
 import jwt
 from fastapi import Depends, HTTPException, status
@@ -11,6 +17,10 @@ from pydantic import BaseModel
 JWT_SECRET = os.getenv("JWT_SECRET", "databotics-dev-secret")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+# bcrypt takes ~250ms per call; a small dedicated pool keeps it off the event loop and bounds CPU spent on logins
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "2"))
+TOKEN_CACHE_SIZE = 1024
+TOKEN_CACHE_TTL = 300  # seconds; entries never outlive the token's exp claim
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -34,6 +44,71 @@ _users: Dict[str, str] = {
     "admin": pwd_context.hash("databotics")
 }
 
+_hash_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+
+async def hash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor, pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor, pwd_context.verify, password, hashed)
+
+
+class TokenCache:
+    """
+    LRU of verified tokens keyed by their sha256 digest (the raw token is
+    never stored). An entry expires after ``ttl`` seconds or at the token's
+    ``exp``, whichever comes first.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[User]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, user: User, exp: Optional[float]) -> None:
+        expires = self.clock() + self.ttl
+        if exp is not None:
+            expires = min(expires, float(exp))
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (user, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
 
 def get_user(username: str) -> Optional[User]:
     if username in _users:
@@ -41,18 +116,22 @@ def get_user(username: str) -> Optional[User]:
     return None
 
 
-def register_user(username: str, password: str) -> User:
+async def register_user(username: str, password: str) -> User:
+    if username in _users:
+        raise HTTPException(status_code=400, detail="Username already exists")
+    hashed = await hash_password(password)
+    # re-check: a concurrent registration may have claimed the name while hashing
     if username in _users:
         raise HTTPException(status_code=400, detail="Username already exists")
-    _users[username] = pwd_context.hash(password)
+    _users[username] = hashed
     return User(username=username)
 
 
-def authenticate_user(username: str, password: str) -> Optional[User]:
+async def authenticate_user(username: str, password: str) -> Optional[User]:
     hashed = _users.get(username)
     if not hashed:
         return None
-    if not pwd_context.verify(password, hashed):
+    if not await verify_password(password, hashed):
         return None
     return User(username=username)
 
@@ -65,6 +144,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -81,4 +163,5 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     user = get_user(username)
     if user is None:
         raise credentials_exception
+    token_cache.put(token, user, payload.get("exp"))
     return user
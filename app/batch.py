@@ -0,0 +1,168 @@
+"""Batch pycatcher anomaly detection across many series.
+
+A file is split into one series per distinct ``key_cols`` combination and
+each series is sent to a shared process pool, where the requested pycatcher
+detector runs under a per-series time limit. STL/MSTL are CPU-bound and hold
+the GIL, so processes (not threads) are what lets thousands of series run in
+parallel.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+import pandas as pd
+
+# Optional PyCatcher import for time-series anomaly detection
+try:
+    from pycatcher import outlier_detection_functions as pc  # type: ignore
+except Exception:
+    pc = None  # gracefully degrade if not installed
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0")) or (os.cpu_count() or 1)
+SERIES_TIMEOUT = float(os.getenv("SERIES_TIMEOUT", "30"))
+MIN_SERIES_LENGTH = 8
+# fork() from a multi-threaded server copies locks held by other threads into the
+# worker; start workers from a clean process instead
+POOL_START_METHOD = os.getenv("POOL_START_METHOD") or ("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+Detector = Callable[[str, pd.DataFrame], Any]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def process_context():
+    """Multiprocessing context for worker pools (POOL_START_METHOD, never a plain fork by default)."""
+    return multiprocessing.get_context(POOL_START_METHOD)
+
+
+def batch_pool() -> ProcessPoolExecutor:
+    """Shared process pool for batch series analysis."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS, mp_context=process_context())
+        return _pool
+
+
+def run_pc(m: str, frame: pd.DataFrame):
+    """Run the pycatcher detector named ``m`` on a (date, value) frame; ``auto`` tries STL, then IQR."""
+    if pc is None:
+        raise RuntimeError("pycatcher is not installed")
+    m = m.lower()
+    if m == "classic":
+        return pc.detect_outliers_classic(frame)
+    if m == "stl":
+        return pc.detect_outliers_stl(frame)
+    if m == "mstl":
+        return pc.detect_outliers_mstl(frame)
+    if m == "esd":
+        return pc.detect_outliers_esd(frame)
+    if m == "moving_average":
+        return pc.detect_outliers_moving_average(frame)
+    if m == "iqr":
+        return pc.find_outliers_iqr(frame)
+    try:
+        return pc.detect_outliers_stl(frame)
+    except Exception:
+        return pc.find_outliers_iqr(frame)
+
+
+def outlier_records(out: Any, dcol: str, vcol: str) -> List[Dict[str, Any]]:
+    """Detector output -> anomaly dicts (``date``, ``value``, ``row``), built column-wise rather than with iterrows."""
+    if not isinstance(out, pd.DataFrame) or out.empty:
+        return []
+    rows = out.copy()
+    for c in rows.columns:
+        if pd.api.types.is_datetime64_any_dtype(rows[c]):
+            rows[c] = [v.isoformat() if isinstance(v, (pd.Timestamp, datetime)) else None for v in rows[c]]
+    records = rows.astype(object).where(rows.notna(), None).to_dict(orient="records")
+    return [{"date": r.get(dcol), "value": r.get(vcol), "row": r} for r in records]
+
+
+class SeriesTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise SeriesTimeout()
+
+
+def _detect_series(task: Tuple[Any, pd.DataFrame, str, str, str, float, Optional[Detector]]) -> Dict[str, Any]:
+    """Pool task: run one series with a SIGALRM deadline. Never raises; failures become a status."""
+    key, frame, dcol, vcol, method, timeout, detector = task
+    result: Dict[str, Any] = {"key": key, "rows": len(frame)}
+    if len(frame) < MIN_SERIES_LENGTH:
+        return {**result, "status": "skipped", "error": f"fewer than {MIN_SERIES_LENGTH} points", "anomalies": []}
+    # the alarm only works in a process's main thread, which is where pool workers run tasks
+    timed = timeout > 0 and hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+    started = time.perf_counter()
+    try:
+        if timed:
+            signal.signal(signal.SIGALRM, _on_alarm)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        out = (detector or run_pc)(method, frame)
+        result.update(status="ok", anomalies=outlier_records(out, dcol, vcol))
+    except SeriesTimeout:
+        result.update(status="timeout", error=f"exceeded {timeout:g}s", anomalies=[])
+    except Exception as e:
+        result.update(status="error", error=str(e), anomalies=[])
+    finally:
+        if timed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def split_series(df: pd.DataFrame, dcol: str, vcol: str, key_cols: List[str]):
+    """Yield (key dict, sorted (date, value) frame) per series."""
+    frame = df[key_cols + [dcol, vcol]].dropna(subset=[dcol, vcol]).copy()
+    frame[dcol] = pd.to_datetime(frame[dcol], errors="coerce")
+    frame = frame.dropna(subset=[dcol]).sort_values(key_cols + [dcol], kind="stable")
+    for key, group in frame.groupby(key_cols, sort=False, dropna=False):
+        key = key if isinstance(key, tuple) else (key,)
+        yield {str(c): (v.item() if hasattr(v, "item") else v) for c, v in zip(key_cols, key)}, group[[dcol, vcol]].reset_index(drop=True)
+
+
+def run_batch(
+    df: pd.DataFrame,
+    dcol: str,
+    vcol: str,
+    key_cols: List[str],
+    method: str = "auto",
+    timeout: float = SERIES_TIMEOUT,
+    executor: Optional[ProcessPoolExecutor] = None,
+    detector: Optional[Detector] = None,
+) -> Dict[str, Any]:
+    """
+    Detect anomalies in every series of ``df`` on the process pool. Returns
+    ``{"series": [...], "summary": {...}}``; each series entry has its key,
+    status (ok|skipped|timeout|error) and anomalies. ``detector`` replaces
+    ``run_pc`` (it must be picklable, i.e. a module-level function).
+    """
+    missing = [c for c in key_cols + [dcol, vcol] if c not in df.columns]
+    if missing:
+        raise KeyError(f"Column(s) not found: {', '.join(missing)}")
+    tasks = [(key, frame, dcol, vcol, method, timeout, detector) for key, frame in split_series(df, dcol, vcol, key_cols)]
+    started = time.perf_counter()
+    pool = executor or batch_pool()
+    workers = getattr(pool, "_max_workers", BATCH_WORKERS)
+    # several small series per task amortise pickling; results keep input order
+    results = list(pool.map(_detect_series, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    elapsed = time.perf_counter() - started
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+    summary = {
+        "series_count": len(results),
+        "anomaly_count": sum(len(r["anomalies"]) for r in results),
+        "statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "series_per_second": round(len(results) / elapsed, 1) if elapsed > 0 else None,
+    }
+    return {"series": results, "summary": summary}
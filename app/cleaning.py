@@ -0,0 +1,129 @@
+"""Dataset cleaning engine shared by the /clean endpoints.
+
+String transforms are Arrow compute kernels registered by name in
+``CLEAN_OPERATIONS``. The requested operations are composed into one
+pipeline and run over each string column as whole arrays, instead of a
+Python ``apply`` per cell, per column, per operation. New transforms are
+added by registering another kernel.
+"""
+from typing import Callable, Dict, List, Optional, Sequence
+import re
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except Exception:  # pragma: no cover - pyarrow is optional at runtime
+    pa = None
+    pc = None
+
+NULL_TOKENS = ["", "null", "none", "nan", "n/a"]
+
+
+def _trim(arr):
+    return pc.utf8_trim_whitespace(arr)
+
+
+def _collapse_whitespace(arr):
+    return pc.replace_substring_regex(arr, pattern=r"\s+", replacement=" ")
+
+
+def _lower(arr):
+    return pc.utf8_lower(arr)
+
+
+def _upper(arr):
+    return pc.utf8_upper(arr)
+
+
+def _normalize_nulls(arr):
+    """Turn empty strings and null spellings ("NULL", "n/a", ...) into real nulls."""
+    token = pc.utf8_lower(pc.utf8_trim_whitespace(arr))
+    return pc.if_else(pc.is_in(token, value_set=pa.array(NULL_TOKENS, type=arr.type)), pa.scalar(None, type=arr.type), arr)
+
+
+CLEAN_OPERATIONS: Dict[str, Callable] = {
+    "trim": _trim,
+    "collapse_whitespace": _collapse_whitespace,
+    "lower": _lower,
+    "upper": _upper,
+    "normalize_nulls": _normalize_nulls,
+}
+
+# plain-Python equivalents for object columns Arrow cannot type (mixed str/non-str cells)
+_PY_OPERATIONS: Dict[str, Callable[[str], Optional[str]]] = {
+    "trim": str.strip,
+    "collapse_whitespace": lambda v: re.sub(r"\s+", " ", v),
+    "lower": str.lower,
+    "upper": str.upper,
+    "normalize_nulls": lambda v: None if v.strip().lower() in NULL_TOKENS else v,
+}
+
+
+def build_operations(trim_strings: bool = True, normalize_case: Optional[str] = None, collapse_whitespace: bool = False, normalize_nulls: bool = False) -> List[str]:
+    """Map /clean query flags to an ordered operation list."""
+    ops: List[str] = []
+    if trim_strings:
+        ops.append("trim")
+    if collapse_whitespace:
+        ops.append("collapse_whitespace")
+    if normalize_case in ("lower", "upper"):
+        ops.append(normalize_case)
+    if normalize_nulls:
+        ops.append("normalize_nulls")
+    return ops
+
+
+def _is_text(s: pd.Series) -> bool:
+    return s.dtype == object or isinstance(s.dtype, pd.StringDtype)
+
+
+def _apply_python(s: pd.Series, ops: Sequence[str]) -> pd.Series:
+    def run(v):
+        for op in ops:
+            if not isinstance(v, str):
+                break
+            v = _PY_OPERATIONS[op](v)
+        return v
+    return s.map(run)
+
+
+def clean_column(s: pd.Series, ops: Sequence[str]) -> pd.Series:
+    """Apply ``ops`` to a string column; non-string cells are left untouched."""
+    if not ops:
+        return s
+    try:
+        arr = pa.array(s, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return _apply_python(s, ops)
+    if not (pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type)):
+        # e.g. an all-null object column
+        return s
+    for op in ops:
+        arr = CLEAN_OPERATIONS[op](arr)
+    mapper = {arr.type: s.dtype}.get if isinstance(s.dtype, pd.StringDtype) else None
+    return pd.Series(arr.to_pandas(types_mapper=mapper), index=s.index, name=s.name)
+
+
+def clean_dataframe(df: pd.DataFrame, ops: Sequence[str], drop_duplicates: bool = False) -> pd.DataFrame:
+    """
+    Apply the named operations to every string column of ``df``, then
+    optionally drop duplicate rows. Raises ValueError for unknown operations.
+    """
+    unknown = [op for op in ops if op not in CLEAN_OPERATIONS]
+    if unknown:
+        raise ValueError(f"Unknown clean operation(s): {', '.join(unknown)}")
+    if ops:
+        if pa is None:
+            cleaned = {c: _apply_python(df[c], ops) for c in df.columns if _is_text(df[c])}
+        else:
+            cleaned = {c: clean_column(df[c], ops) for c in df.columns if _is_text(df[c])}
+        if cleaned:
+            df = df.copy(deep=False)
+            for c, v in cleaned.items():
+                df[c] = v
+    if drop_duplicates:
+        df = df.drop_duplicates()
+    return df
+
@@ -0,0 +1,244 @@
+"""DuckDB query engine.
+
+Keeps a bounded LRU pool of per-session in-memory DuckDB databases. Each
+exposes the session's stored file as a ``loaded_table`` view scanned with
+DuckDB's own parallel Parquet/CSV readers, so SQL queries never build a
+pandas DataFrame. Nothing one session's SQL creates is visible to another.
+"""
+from typing import Callable, Optional, Iterator, List, Dict, Any, Tuple
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+import base64
+import hashlib
+import io
+import json
+import math
+import threading
+
+import duckdb
+import pandas as pd
+
+from .readers import sniff_format
+from .storage import artifact_path, read_manifest
+
+TABLE_NAME = "loaded_table"
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10_000
+STREAM_BATCH_SIZE = 10_000
+
+
+def _quote_literal(value: object) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def scan_sql(path: Path) -> str:
+    """DuckDB table function scanning the stored dataset at ``path`` (Parquet artifact preferred)."""
+    if read_manifest(path) is not None:
+        return f"read_parquet({_quote_literal(artifact_path(path))})"
+    fmt = sniff_format(path)
+    if fmt == "parquet":
+        return f"read_parquet({_quote_literal(path)})"
+    if fmt == "ndjson":
+        return f"read_json_auto({_quote_literal(path)}, format='newline_delimited')"
+    return f"read_csv_auto({_quote_literal(path)})"
+
+
+class _PooledConnection:
+    def __init__(self, con: duckdb.DuckDBPyConnection, source: str):
+        self.con = con
+        self.source = source
+        self.ready = False
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def close(self) -> None:
+        with self.lock:
+            self.closed = True
+            self.con.close()
+
+
+class QueryEngine:
+    """
+    Pool of DuckDB connections keyed by session id. Each is its own in-memory
+    database, so tables or views created by one session's SQL never leak into
+    another's.
+    """
+
+    def __init__(self, max_connections: int = 32):
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._pool: "OrderedDict[str, _PooledConnection]" = OrderedDict()
+
+    def _checkout(self, key: str, source: str) -> _PooledConnection:
+        evicted: List[_PooledConnection] = []
+        with self._lock:
+            entry = self._pool.get(key)
+            if entry is not None and entry.source == source:
+                self._pool.move_to_end(key)
+                return entry
+            if entry is not None:
+                evicted.append(self._pool.pop(key))
+            entry = _PooledConnection(duckdb.connect(database=":memory:"), source)
+            self._pool[key] = entry
+            while len(self._pool) > self.max_connections:
+                evicted.append(self._pool.popitem(last=False)[1])
+        for old in evicted:
+            old.close()
+        return entry
+
+    @contextmanager
+    def connect(self, key: str, path: Path, fallback: Optional[Callable[[], pd.DataFrame]] = None, tables: Optional[Dict[str, Path]] = None) -> Iterator[duckdb.DuckDBPyConnection]:
+        """
+        Yield the pooled connection for ``key`` with ``loaded_table`` bound to
+        the file at ``path``. If DuckDB cannot scan the file itself (e.g. a raw
+        XLSX without a columnar artifact), ``fallback`` supplies a DataFrame
+        that is registered instead. ``tables`` adds one more view per name
+        (the worksheets of a workbook).
+        """
+        # a table for ``path`` itself (a workbook's first sheet) aliases loaded_table, fallback included
+        views = {name: TABLE_NAME if p == path else scan_sql(p) for name, p in (tables or {}).items() if name != TABLE_NAME}
+        source = scan_sql(path)
+        if views:
+            source += json.dumps(views, sort_keys=True)
+        while True:
+            entry = self._checkout(key, source)
+            with entry.lock:
+                if entry.closed:
+                    # evicted between checkout and lock; take a fresh one
+                    continue
+                if not entry.ready:
+                    try:
+                        entry.con.execute(f"CREATE OR REPLACE VIEW {TABLE_NAME} AS SELECT * FROM {source}")
+                    except duckdb.Error:
+                        if fallback is None:
+                            raise
+                        # a table rather than a registered frame, so cursors see it too
+                        entry.con.register("_fallback", fallback())
+                        entry.con.execute(f"CREATE OR REPLACE TABLE {TABLE_NAME} AS SELECT * FROM _fallback")
+                        entry.con.unregister("_fallback")
+                    for name, view_source in views.items():
+                        entry.con.execute(f"CREATE OR REPLACE VIEW {_quote_ident(name)} AS SELECT * FROM {view_source}")
+                    entry.ready = True
+                yield entry.con
+                return
+
+    @contextmanager
+    def cursor(self, key: str, path: Path, fallback: Optional[Callable[[], pd.DataFrame]] = None, tables: Optional[Dict[str, Path]] = None) -> Iterator[duckdb.DuckDBPyConnection]:
+        """
+        Like ``connect``, but yields a cursor of its own and holds the pooled
+        connection's lock only while the views are set up. Use it for results
+        read at the client's pace (streams), so a slow reader blocks neither
+        other queries nor release/eviction of the session.
+        """
+        with self.connect(key, path, fallback, tables) as con:
+            cur = con.cursor()
+        try:
+            yield cur
+        finally:
+            cur.close()
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            entry = self._pool.pop(key, None)
+        if entry is not None:
+            entry.close()
+
+    def __len__(self) -> int:
+        return len(self._pool)
+
+
+# ---- Result paging and streaming ----
+
+def _sql_digest(sql: str) -> str:
+    return hashlib.sha256(sql.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def encode_page_token(sql: str, offset: int) -> str:
+    raw = json.dumps({"o": offset, "q": _sql_digest(sql)}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_page_token(token: str, sql: str) -> int:
+    """Return the row offset encoded in ``token``; raises ValueError if it is malformed or was issued for other SQL."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        offset = int(data["o"])
+        digest = data["q"]
+    except Exception:
+        raise ValueError("Invalid page token")
+    if digest != _sql_digest(sql) or offset < 0:
+        raise ValueError("Page token does not match this query")
+    return offset
+
+
+def fetch_page(con: duckdb.DuckDBPyConnection, sql: str, offset: int = 0, page_size: Optional[int] = DEFAULT_PAGE_SIZE) -> Tuple[List[str], List[Dict[str, Any]], bool]:
+    """
+    Run ``sql`` and return one page of it as (columns, rows, has_more). The
+    LIMIT/OFFSET is pushed into DuckDB's plan, so only the page (plus one
+    look-ahead row) is ever materialized. ``page_size=None`` returns every row.
+    """
+    rel = con.sql(sql)
+    if rel is None:
+        # statement without a result set (DDL etc.)
+        return [], [], False
+    cols = list(rel.columns)
+    if page_size is None:
+        return cols, [dict(zip(cols, r)) for r in rel.fetchall()], False
+    fetched = rel.limit(page_size + 1, offset).fetchall()
+    rows = [dict(zip(cols, r)) for r in fetched[:page_size]]
+    return cols, rows, len(fetched) > page_size
+
+
+def _arrow_reader(rel: "duckdb.DuckDBPyRelation", batch_size: int):
+    to_reader = getattr(rel, "to_arrow_reader", None) or rel.fetch_arrow_reader
+    return to_reader(batch_size)
+
+
+def _drain(buf: io.BytesIO) -> bytes:
+    data = buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    return data
+
+
+def stream_arrow(con: duckdb.DuckDBPyConnection, sql: str, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[bytes]:
+    """Yield ``sql``'s result as an Arrow IPC stream, one record batch at a time as DuckDB produces them."""
+    import pyarrow as pa
+    rel = con.sql(sql)
+    if rel is None:
+        return
+    reader = _arrow_reader(rel, batch_size)
+    buf = io.BytesIO()
+    with pa.ipc.new_stream(buf, reader.schema) as writer:
+        yield _drain(buf)
+        for batch in reader:
+            writer.write_batch(batch)
+            yield _drain(buf)
+    yield _drain(buf)
+
+
+def _finite(value: Any) -> Any:
+    """``value`` with NaN/Infinity (not valid JSON) replaced by None, including inside lists and structs."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_finite(v) for v in value]
+    return value
+
+
+def stream_ndjson(con: duckdb.DuckDBPyConnection, sql: str, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[bytes]:
+    """Yield ``sql``'s result as newline-delimited JSON, one record batch at a time."""
+    rel = con.sql(sql)
+    if rel is None:
+        return
+    for batch in _arrow_reader(rel, batch_size):
+        lines = [json.dumps(_finite(row), default=str, allow_nan=False) for row in batch.to_pylist()]
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
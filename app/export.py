@@ -0,0 +1,128 @@
+"""Streaming encoders for dataset downloads.
+
+A DataFrame is encoded slice by slice (one Parquet row group / Arrow record
+batch / CSV block per slice) and each encoded piece is yielded as soon as it
+is written, so a download never holds a second full copy of the dataset in
+memory.
+"""
+from typing import Dict, Iterator, Optional, Tuple
+import io
+import zlib
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except Exception:  # pragma: no cover - pyarrow is optional at runtime
+    pa = None
+
+ROW_GROUP_ROWS = 100_000
+
+# format -> (media type, file extension, allowed compressions; first is the default)
+EXPORT_FORMATS: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    "parquet": ("application/vnd.apache.parquet", "parquet", ("snappy", "zstd", "gzip", "none")),
+    "csv": ("text/csv", "csv", ("none", "gzip")),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows", ("none", "zstd", "lz4")),
+}
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the generator and keeps an absolute position."""
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def resolve_format(fmt: str, compression: Optional[str]) -> Tuple[str, str]:
+    """Validate a format/compression pair; raises ValueError. Returns (format, compression)."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    allowed = EXPORT_FORMATS[fmt][2]
+    compression = compression or allowed[0]
+    if compression not in allowed:
+        raise ValueError(f"Unsupported compression '{compression}' for {fmt}. Use one of: {', '.join(allowed)}")
+    return fmt, compression
+
+
+def arrow_schema(df: pd.DataFrame):
+    """Arrow schema for ``df``, or None when it cannot be encoded columnar (pyarrow missing, mixed-type columns)."""
+    if pa is None:
+        return None
+    try:
+        return pa.Schema.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+
+
+def _batches(df: pd.DataFrame, schema, rows: int) -> Iterator["pa.RecordBatch"]:
+    for start in range(0, len(df), rows):
+        yield pa.RecordBatch.from_pandas(df.iloc[start:start + rows], schema=schema, preserve_index=False)
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+
+def _csv_chunks(df: pd.DataFrame, schema, rows: int) -> Iterator[bytes]:
+    if schema is None:
+        for start in range(0, len(df), rows):
+            yield df.iloc[start:start + rows].to_csv(index=False, header=start == 0).encode("utf-8")
+        return
+    sink = _Sink()
+    writer = pacsv.CSVWriter(sink, schema)
+    for batch in _batches(df, schema, rows):
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def stream_frame(df: pd.DataFrame, fmt: str = "parquet", compression: str = "snappy", schema=None, rows: int = ROW_GROUP_ROWS) -> Iterator[bytes]:
+    """
+    Yield ``df`` encoded as ``fmt`` in ``rows``-row slices. Parquet and Arrow
+    need ``schema`` (see ``arrow_schema``); CSV works without one.
+    """
+    if fmt == "csv":
+        chunks = _csv_chunks(df, schema, rows)
+        yield from (_gzip(chunks) if compression == "gzip" else chunks)
+        return
+    codec = None if compression == "none" else compression
+    sink = _Sink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression=codec or "none")
+    else:
+        writer = pa.ipc.new_stream(sink, schema, options=pa.ipc.IpcWriteOptions(compression=codec))
+    yield sink.drain()
+    for batch in _batches(df, schema, rows):
+        if fmt == "parquet":
+            writer.write_batch(batch, row_group_size=rows)
+        else:
+            writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
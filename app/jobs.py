@@ -0,0 +1,242 @@
+"""Background jobs for CPU-heavy endpoints.
+
+Long profile/validate/analyze runs are submitted to a bounded worker pool
+instead of running on the event loop. Each gets a job id that can be polled
+for status and progress, cancelled, and collected once finished. Work
+reports progress through its ``Job`` and stops at the next checkpoint after
+a cancel. With a SQLite path, job state and results are shared with every
+worker process, so a job can be polled, cancelled and collected from any of
+them; it still runs in the process that accepted it.
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+MAX_FINISHED_JOBS = 256
+JOB_SYNC_INTERVAL = 0.5  # seconds between progress writes / cancel checks of a running shared job
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind: str, owner: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner = owner
+        self.status = QUEUED
+        self.progress = 0.0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future: Optional[Future] = None
+        self._cancel = threading.Event()
+        self._sync: Optional[Callable[["Job"], None]] = None
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def checkpoint(self, progress: Optional[float] = None) -> None:
+        """Record progress (0..1) and raise JobCancelled if a cancel was requested."""
+        if progress is not None:
+            self.progress = max(self.progress, min(float(progress), 1.0))
+        if self._sync is not None:
+            self._sync(self)
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def track(self, items: Iterable[Any], total: Optional[int] = None, size: Callable[[Any], int] = len) -> Iterator[Any]:
+        """Pass ``items`` through, advancing progress by ``size(item) / total`` and checking for cancel between items."""
+        done = 0
+        for item in items:
+            self.checkpoint()
+            yield item
+            done += size(item)
+            if total:
+                self.checkpoint(done / total)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _encode_result(result: Any) -> str:
+    if hasattr(result, "model_dump_json"):
+        return result.model_dump_json()
+    return json.dumps(result, default=str)
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool and keeps the most recent finished ones
+    for collection. ``path`` mirrors them to a SQLite table other processes
+    read (see module docstring).
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS, max_finished: int = MAX_FINISHED_JOBS, path: Optional[Path] = None, sync_interval: float = JOB_SYNC_INTERVAL):
+        self.max_finished = max_finished
+        self.sync_interval = sync_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._synced: Dict[str, float] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            # autocommit; timeout waits on other workers' write locks instead of failing
+            self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, owner TEXT, status TEXT NOT NULL, progress REAL NOT NULL, "
+                "result TEXT, error TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+                "cancel_requested INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)")
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _store(self, job: Job) -> None:
+        if self._db is None:
+            return
+        result = _encode_result(job.result) if job.status == SUCCEEDED else None
+        self._query(
+            "INSERT INTO jobs (id, kind, owner, status, progress, result, error, created_at, started_at, finished_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET status = excluded.status, "
+            "progress = excluded.progress, result = excluded.result, error = excluded.error, "
+            "started_at = excluded.started_at, finished_at = excluded.finished_at",
+            (job.id, job.kind, job.owner, job.status, job.progress, result, job.error, job.created_at, job.started_at, job.finished_at),
+        )
+
+    def _sync(self, job: Job, force: bool = False) -> None:
+        """Publish a running job's progress and pick up a cancel requested from another process, at most every sync_interval."""
+        now = time.monotonic()
+        if not force and now - self._synced.get(job.id, 0.0) < self.sync_interval:
+            return
+        self._synced[job.id] = now
+        rows = self._query("UPDATE jobs SET progress = ? WHERE id = ? RETURNING cancel_requested", (job.progress, job.id))
+        if rows and rows[0][0]:
+            job._cancel.set()
+
+    def submit(self, kind: str, fn: Callable[[Job], Any], owner: Optional[str] = None) -> Job:
+        """Queue ``fn(job)``; its return value becomes the job result."""
+        job = Job(kind, owner)
+        if self._db is not None:
+            job._sync = self._sync
+        self._store(job)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        job.future = self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]) -> None:
+        if self._db is not None:
+            self._sync(job, force=True)
+        if job.cancel_requested:
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            self._finish(job)
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        self._store(job)
+        try:
+            result = fn(job)
+            job.checkpoint(1.0)
+            job.result = result
+            job.status = SUCCEEDED
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = getattr(e, "detail", None) or str(e) or type(e).__name__
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            self._finish(job)
+
+    def _finish(self, job: Job) -> None:
+        self._synced.pop(job.id, None)
+        try:
+            self._store(job)
+        except (TypeError, ValueError) as e:
+            # a result that cannot be shared as JSON fails the job everywhere alike
+            job.status, job.result, job.error = FAILED, None, f"Result is not serializable: {e}"
+            self._store(job)
+
+    def _evict(self) -> None:
+        finished = [k for k, j in self._jobs.items() if j.status in FINISHED]
+        for k in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[k]
+        if self._db is not None:
+            self._db.execute(
+                "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE finished_at IS NOT NULL "
+                "ORDER BY finished_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_finished,),
+            )
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        """Snapshot of a job accepted by another process."""
+        rows = self._query(
+            "SELECT kind, owner, status, progress, result, error, created_at, started_at, finished_at, cancel_requested FROM jobs WHERE id = ?",
+            (job_id,),
+        )
+        if not rows:
+            return None
+        kind, owner, status, progress, result, error, created_at, started_at, finished_at, cancel_requested = rows[0]
+        job = Job(kind, owner)
+        job.id, job.status, job.progress, job.error = job_id, status, progress, error
+        job.result = json.loads(result) if result is not None else None
+        job.created_at, job.started_at, job.finished_at = created_at, started_at, finished_at
+        if cancel_requested:
+            job._cancel.set()
+        return job
+
+    def get(self, job_id: str, owner: Optional[str] = None) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None and self._db is not None:
+            job = self._load(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def cancel(self, job: Job) -> None:
+        """Cancel a queued job at once; a running one stops at its next checkpoint."""
+        job._cancel.set()
+        if self._db is not None:
+            self._query("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job.id,))
+        if job.future is not None and job.future.cancel():
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            self._store(job)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
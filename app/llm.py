@@ -1,66 +1,203 @@
 """LLM adapter for Databotics.
 Supports NVIDIA NIM/Kimi (via NIM API key) and deterministic fallback.
-All network calls are centralized here so tests can mock these functions.
+All network calls go through one pooled async ``NIMClient``, so tests can
+mock them in one place and request handlers never block the event loop.
+Successful LLM answers are cached (memory LRU + SQLite on disk) keyed by a
+normalized hash of model, prompt and inputs; fallbacks are never cached.
 """
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Callable
+from collections import OrderedDict
+from pathlib import Path
+import asyncio
+import hashlib
+import json
 import os
-import requests
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import httpx
+from starlette.concurrency import run_in_threadpool
 
 NIM_API_KEY_ENV = "NIM_API_KEY"  # or use NVIDIA_API_KEY
 NIM_API_URL = os.getenv("NIM_API_URL", "https://api.nvidia.com/v1/messages")
+NIM_TIMEOUT = float(os.getenv("NIM_TIMEOUT", "30"))  # seconds per attempt
+NIM_MAX_CONCURRENCY = int(os.getenv("NIM_MAX_CONCURRENCY", "8"))
+NIM_MAX_RETRIES = 3
+NIM_BACKOFF = 0.5  # seconds; doubles per retry, with jitter
+LLM_CACHE_SIZE = 512
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 24 * 3600))  # seconds
+# empty LLM_CACHE_PATH keeps the cache in memory only; the file is opened on first use, not on import
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", str(Path(tempfile.gettempdir()) / "databotics_llm_cache.sqlite"))
 
 
-def _nim_request(payload: Dict[str, Any]) -> Dict[str, Any]:
-    key = os.getenv(NIM_API_KEY_ENV) or os.getenv("NVIDIA_API_KEY")
-    if not key:
-        raise RuntimeError("No NIM API key configured")
-    headers = {
-        "x-api-key": key,
-        "Content-Type": "application/json",
+class LLMCache:
+    """
+    Two-level cache of LLM answers: an in-memory LRU in front of a SQLite
+    table, both honouring ``ttl``. Counts memory hits, disk hits and misses.
+    """
+
+    def __init__(self, path: Optional[str] = LLM_CACHE_PATH, max_entries: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)")
+                self._db.commit()
+            except sqlite3.Error:
+                self._db = None  # unwritable location: memory only
+
+    def get(self, key: str) -> Optional[str]:
+        now = self.clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._memory.pop(key, None)
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] < self.ttl:
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return row[0]
+                if row is not None:
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        now = self.clock()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO llm_cache (key, value, created) VALUES (?, ?, ?)", (key, value, now))
+                self._db.commit()
+
+    def _remember(self, key: str, value: str, created: float) -> None:
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+        }
+
+
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def llm_cache() -> LLMCache:
+    """The shared answer cache, created on first use at LLM_CACHE_PATH."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache(LLM_CACHE_PATH)
+        return _llm_cache
+
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(kind: str, model: str, prompt: str, **inputs: Any) -> str:
+    """Stable hash of a request: whitespace-normalized user prompt plus canonical JSON (sorted keys) of the structured inputs."""
+    canonical = json.dumps(
+        {"kind": kind, "model": model, "prompt": _normalize_text(prompt), "inputs": inputs},
+        sort_keys=True,
+        default=str,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _sql_text(data: Any) -> str:
+    # NIM response shape may vary; attempt to extract text
+    if isinstance(data, dict):
+        # try common places
+        if "content" in data:
+            return data["content"]
+        if "choices" in data and len(data["choices"]) > 0:
+            return data["choices"][0].get("message", {}).get("content", "")
+    # fallback: stringify
+    return str(data)
+
+
+def _narrative_text(data: Any) -> str:
+    if isinstance(data, dict):
+        if "content" in data:
+            return data["content"].strip()
+        if "choices" in data and len(data.get("choices", [])) > 0:
+            return data["choices"][0].get("message", {}).get("content", "").strip()
+    return str(data)
+
+
+def _api_key() -> Optional[str]:
+    return os.getenv(NIM_API_KEY_ENV) or os.getenv("NVIDIA_API_KEY")
+
+
+def _sql_request(question: str, schema: Dict[str, str], sample_rows: List[Dict[str, Any]] | None) -> Tuple[str, Dict[str, Any]]:
+    # build a simple messages payload using NIM messages API
+    # model selection is left to the NIM service; using a safe prompt
+    prompt = f"Generate a safe, non-destructive SQL query for this request:\nQuestion: {question}\nSchema: {schema}\nReturn only the SQL and a short explanation."
+    model = os.getenv("NIM_MODEL", "moonshotai/kimi-k2-5")
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt},],
+        "max_tokens": 512,
     }
-    resp = requests.post(NIM_API_URL, json=payload, headers=headers, timeout=10)
-    resp.raise_for_status()
-    return resp.json()
+    return cache_key("generate_sql", model, question, schema=schema, sample_rows=sample_rows), payload
 
 
-def generate_sql(question: str, schema: Dict[str, str], sample_rows: List[Dict[str, Any]] | None = None) -> Tuple[str, str]:
-    """Generate SQL using LLM or deterministic fallback.
-    Returns (sql, explanation)
-    """
-    # If NIM key available, call Kimi/NIM
-    try:
-        key = os.getenv(NIM_API_KEY_ENV) or os.getenv("NVIDIA_API_KEY")
-        if key:
-            # build a simple messages payload using NIM messages API
-            # model selection is left to the NIM service; using a safe prompt
-            prompt = f"Generate a safe, non-destructive SQL query for this request:\nQuestion: {question}\nSchema: {schema}\nReturn only the SQL and a short explanation."
-            payload = {
-                "model": os.getenv("NIM_MODEL", "moonshotai/kimi-k2-5"),
-                "messages": [{"role": "user", "content": prompt},],
-                "max_tokens": 512,
-            }
-            data = _nim_request(payload)
-            # NIM response shape may vary; attempt to extract text
-            if isinstance(data, dict):
-                # try common places
-                if "content" in data:
-                    text = data["content"]
-                elif "choices" in data and len(data["choices"]) > 0:
-                    text = data["choices"][0].get("message", {}).get("content", "")
-                else:
-                    # fallback: stringify
-                    text = str(data)
-            else:
-                text = str(data)
-            # attempt to split SQL and explanation heuristically
-            parts = text.split("\n\n", 1)
-            sql = parts[0].strip()
-            explanation = parts[1].strip() if len(parts) > 1 else ""
-            return sql, explanation
-    except Exception:
-        # any error uses fallback
-        pass
+def _split_sql(text: str) -> Tuple[str, str]:
+    # attempt to split SQL and explanation heuristically
+    parts = text.split("\n\n", 1)
+    sql = parts[0].strip()
+    explanation = parts[1].strip() if len(parts) > 1 else ""
+    return sql, explanation
+
+
+def _narrative_request(summary: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    prompt = f"Summarize the following analysis results succinctly and provide next steps: {summary}"
+    model = os.getenv("NIM_MODEL", "moonshotai/kimi-k2-5")
+    payload = {"model": model, "messages": [{"role": "user", "content": prompt}], "max_tokens": 256}
+    return cache_key("analyze_narrative", model, "", summary=summary), payload
+
 
+def _fallback_narrative(summary: Dict[str, Any]) -> str:
+    cnt = summary.get("count", 0)
+    method = summary.get("method_used", "unknown")
+    return f"Analysis used method={method}. Found {cnt} anomalies. Inspect flagged points for root cause."
+
+
+def _fallback_sql(schema: Dict[str, str]) -> Tuple[str, str]:
     # Deterministic fallback: simple SELECT top 100
     col_list = ', '.join([f'"{c}"' for c in schema.keys()]) if schema else "*"
     sql = f"SELECT {col_list} FROM {schema.get('__table','data') if schema else 'data'} LIMIT 100;"
@@ -68,23 +205,129 @@ def generate_sql(question: str, schema: Dict[str, str], sample_rows: List[Dict[s
     return sql, explanation
 
 
-def analyze_narrative(summary: Dict[str, Any]) -> str:
-    """Return a short narrative about analysis results using LLM or deterministic fallback."""
+class NIMClient:
+    """
+    Async NIM client for use inside request handlers: pooled keep-alive
+    connections, at most ``max_concurrency`` requests in flight, retries with
+    exponential backoff (honouring Retry-After) on connection errors, 429 and
+    5xx, and single-flight coalescing so identical concurrent requests share
+    one upstream call. Loop-bound state is created lazily per event loop.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, url: Optional[str] = None, max_concurrency: int = NIM_MAX_CONCURRENCY, max_retries: int = NIM_MAX_RETRIES,
+                 backoff: float = NIM_BACKOFF, timeout: float = NIM_TIMEOUT):
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # a client from another (closed) loop cannot be reused; its sockets die with that loop
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = {}
+
+    async def request(self, payload: Dict[str, Any], key: Optional[str] = None) -> Any:
+        """POST ``payload`` and return the decoded JSON; concurrent calls with the same ``key`` share one request."""
+        self._bind()
+        key = key or hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+        task = asyncio.ensure_future(self._send(payload))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _send(self, payload: Dict[str, Any]) -> Any:
+        key = _api_key()
+        if not key:
+            raise RuntimeError("No NIM API key configured")
+        headers = {"x-api-key": key, "Content-Type": "application/json"}
+        attempt = 0
+        while True:
+            retry_after: Optional[float] = None
+            async with self._semaphore:
+                self.upstream_calls += 1
+                try:
+                    resp = await self._client.post(self.url or NIM_API_URL, json=payload, headers=headers)
+                    if resp.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                        resp.raise_for_status()
+                        return resp.json()
+                    retry_after = _retry_after(resp.headers.get("retry-after"))
+                except (httpx.TransportError, httpx.TimeoutException):
+                    if attempt >= self.max_retries:
+                        raise
+            delay = retry_after if retry_after is not None else self.backoff * (2 ** attempt) * (0.5 + random.random())
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+nim_client = NIMClient()
+
+
+async def _nim_request(payload: Dict[str, Any], key: Optional[str] = None) -> Any:
+    """The one place an LLM request leaves the process; tests stub this."""
+    return await nim_client.request(payload, key)
+
+
+async def _acached_request(key: str, payload: Dict[str, Any], extract: Callable[[Any], str]) -> str:
+    """Answer from the cache, or call the LLM and cache the extracted text. Errors propagate and are not cached."""
+    cache = llm_cache()
+    # cache lookups and writes may touch SQLite; keep them off the event loop
+    text = await run_in_threadpool(cache.get, key)
+    if text is None:
+        text = extract(await _nim_request(payload, key))
+        await run_in_threadpool(cache.put, key, text)
+    return text
+
+
+async def agenerate_sql(question: str, schema: Dict[str, str], sample_rows: List[Dict[str, Any]] | None = None) -> Tuple[str, str]:
+    """Generate SQL using the LLM, or a deterministic fallback on any error. Returns (sql, explanation)."""
     try:
-        key = os.getenv(NIM_API_KEY_ENV) or os.getenv("NVIDIA_API_KEY")
-        if key:
-            prompt = f"Summarize the following analysis results succinctly and provide next steps: {summary}"
-            payload = {"model": os.getenv("NIM_MODEL", "moonshotai/kimi-k2-5"), "messages": [{"role": "user", "content": prompt}], "max_tokens": 256}
-            data = _nim_request(payload)
-            if isinstance(data, dict):
-                if "content" in data:
-                    return data["content"].strip()
-                if "choices" in data and len(data.get("choices", [])) > 0:
-                    return data["choices"][0].get("message", {}).get("content", "").strip()
-            return str(data)
+        if _api_key():
+            key, payload = _sql_request(question, schema, sample_rows)
+            return _split_sql(await _acached_request(key, payload, _sql_text))
     except Exception:
         pass
-    # Deterministic fallback:
-    cnt = summary.get("count", 0)
-    method = summary.get("method_used", "unknown")
-    return f"Analysis used method={method}. Found {cnt} anomalies. Inspect flagged points for root cause."
+    return _fallback_sql(schema)
+
+
+async def aanalyze_narrative(summary: Dict[str, Any]) -> str:
+    """Return a short narrative about analysis results using the LLM, or a deterministic fallback on any error."""
+    try:
+        if _api_key():
+            key, payload = _narrative_request(summary)
+            return await _acached_request(key, payload, _narrative_text)
+    except Exception:
+        pass
+    return _fallback_narrative(summary)
@@ -1,17 +1,15 @@
 from fastapi import FastAPI, UploadFile, File, Body, Form
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import pandas as pd
-from io import BytesIO
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 import os
 import openai
-from datetime import datetime
-
-# Optional PyCatcher import for time-series anomaly detection
-try:
-    from pycatcher import outlier_detection_functions as pc  # type: ignore
-except Exception:
-    pc = None  # gracefully degrade if not installed
+from .cleaning import clean_dataframe
+from .readers import read_table
+from .export import arrow_schema, stream_frame
+from .batch import SERIES_TIMEOUT, outlier_records, pc, run_batch, run_pc
 
 app = FastAPI(title="Databotics")
 
@@ -25,7 +23,7 @@ class SQLGenerateRequest(BaseModel):
 @app.post("/profile")
 async def profile(file: UploadFile = File(...)):
     raw = await file.read()
-    df = pd.read_excel(BytesIO(raw)) if file.filename.endswith(("xlsx", "xls")) else pd.read_csv(BytesIO(raw))
+    df = read_table(raw)
     profile = {
         "rows": len(df),
         "cols": df.shape[1],
@@ -38,7 +36,7 @@ async def profile(file: UploadFile = File(...)):
 @app.post("/validate")
 async def validate(file: UploadFile = File(...), req: ValidateRequest = Body(...)):
     raw = await file.read()
-    df = pd.read_excel(BytesIO(raw)) if file.filename.endswith(("xlsx", "xls")) else pd.read_csv(BytesIO(raw))
+    df = read_table(raw)
     issues: List[Dict[str, Any]] = []
     rules = req.rules or {}
     required = rules.get("required", [])
@@ -55,12 +53,12 @@ async def validate(file: UploadFile = File(...), req: ValidateRequest = Body(...
 @app.post("/clean")
 async def clean(file: UploadFile = File(...)):
     raw = await file.read()
-    df = pd.read_excel(BytesIO(raw)) if file.filename.endswith(("xlsx", "xls")) else pd.read_csv(BytesIO(raw))
-    df = df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
-    buf = BytesIO()
-    df.to_parquet(buf, index=False)
-    buf.seek(0)
-    return {"format": "parquet_hex", "data": buf.getvalue().hex()}
+    df = read_table(raw)
+    df = clean_dataframe(df, ["trim"])
+    schema = arrow_schema(df)
+    if schema is None:
+        return StreamingResponse(stream_frame(df, "csv", "none"), media_type="text/csv")
+    return StreamingResponse(stream_frame(df, "parquet", "snappy", schema), media_type="application/vnd.apache.parquet")
 
 @app.post("/generate_sql")
 async def generate_sql(req: SQLGenerateRequest):
@@ -97,13 +95,16 @@ async def analyze(
     value_col: Optional[str] = Form(None),
     method: Optional[str] = Form(None),  # classic|stl|mstl|esd|iqr|moving_average|auto
     freq: Optional[str] = Form(None),    # D|W|M|Q (optional hint)
+    key_cols: Optional[str] = Form(None),  # comma separated; one series per key
+    timeout: Optional[float] = Form(None),  # per-series seconds in batch mode
 ):
     """Detect anomalies using PyCatcher when possible and summarize with AI.
 
     Accepts a file upload and optional form fields: date_col, value_col, method, freq.
+    With key_cols, every series is analyzed in parallel (see app.batch).
     """
     raw = await file.read()
-    df = pd.read_excel(BytesIO(raw)) if file.filename.endswith(("xlsx", "xls")) else pd.read_csv(BytesIO(raw))
+    df = read_table(raw)
 
     # Attempt column inference if not provided
     def infer_date_col(frame: pd.DataFrame) -> Optional[str]:
@@ -152,39 +153,19 @@ async def analyze(
             pass
         ts_df = ts_df.dropna(subset=[dcol]).sort_values(by=dcol)
 
-    if pc is not None and ts_df is not None and ts_df.shape[0] >= 8:
+    batch = None
+    keys = [c.strip() for c in key_cols.split(",") if c.strip()] if key_cols else []
+    if keys and pc is not None and dcol and vcol:
+        # batch mode: one detector run per series on the process pool
+        try:
+            batch = await run_in_threadpool(run_batch, df, dcol, vcol, keys, chosen_method, timeout if timeout is not None else SERIES_TIMEOUT)
+            anomalies = [{**a, "key": r["key"]} for r in batch["series"] for a in r["anomalies"]]
+            used_pycatcher = True
+        except Exception as e:
+            error = f"pycatcher_error: {e}"
+    elif pc is not None and ts_df is not None and ts_df.shape[0] >= 8:
         try:
-            df_pc = ts_df.copy()
-            df_pc = df_pc[[dcol, vcol]]
-            df_pc.columns = [dcol, vcol]
-
-            def run_pc(m: str, frame: pd.DataFrame):
-                m = m.lower()
-                if m == "classic":
-                    return pc.detect_outliers_classic(frame)
-                if m == "stl":
-                    return pc.detect_outliers_stl(frame)
-                if m == "mstl":
-                    return pc.detect_outliers_mstl(frame)
-                if m == "esd":
-                    return pc.detect_outliers_esd(frame)
-                if m == "moving_average":
-                    return pc.detect_outliers_moving_average(frame)
-                if m == "iqr":
-                    return pc.find_outliers_iqr(frame)
-                try:
-                    return pc.detect_outliers_stl(frame)
-                except Exception:
-                    return pc.find_outliers_iqr(frame)
-
-            out = run_pc(chosen_method, df_pc)
-            if isinstance(out, pd.DataFrame) and not out.empty:
-                for _, r in out.iterrows():
-                    anomalies.append({
-                        "date": r.get(dcol, None),
-                        "value": r.get(vcol, None),
-                        "row": {k: (r[k].isoformat() if isinstance(r[k], (pd.Timestamp, datetime)) else r[k]) for k in out.columns}
-                    })
+            anomalies = outlier_records(run_pc(chosen_method, ts_df[[dcol, vcol]]), dcol, vcol)
             used_pycatcher = True
         except Exception as e:
             error = f"pycatcher_error: {e}"
@@ -235,6 +216,7 @@ async def analyze(
         "value_col": vcol,
         "method": chosen_method,
         "anomalies": anomalies,
+        **({"series": batch["series"], "batch_summary": batch["summary"]} if batch else {}),
         "analysis": ai_summary,
         **({"error": error} if error else {}),
     }
@@ -0,0 +1,228 @@
+"""Dataset profiling engine shared by the /profile endpoints.
+
+Numeric columns are profiled together: they are stacked into one float64
+matrix and min/max/mean/std/quantiles are computed column-wise in a single
+numpy pass, instead of a Python loop calling ``.mean()``/``.std()`` per
+column. Histograms for all numeric columns are binned together with one
+``bincount``. Distinct counts and top-k values share a single hash pass per
+column (``factorize`` + ``bincount``) instead of a fully sorted
+``value_counts``.
+"""
+from typing import Dict, Any, List, Optional, Iterable
+import json
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .sketches import HyperLogLog, QuantileSketch, Reservoir, RunningMoments
+
+SAMPLE_ROWS = 20
+TOP_K = 5
+HISTOGRAM_BINS = 10
+QUANTILES = (25, 50, 75)
+
+
+def _num(v: Any) -> Optional[float]:
+    v = float(v)
+    return None if np.isnan(v) or np.isinf(v) else v
+
+
+def _jsonable(v: Any) -> Any:
+    if v is pd.NA or v is pd.NaT:
+        return None
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float) and (np.isnan(v) or np.isinf(v)):
+        return None
+    return v
+
+
+def _numeric_stats(df: pd.DataFrame, cols: List[Any], bins: int) -> Dict[Any, Dict[str, Any]]:
+    if not cols:
+        return {}
+    arr = df[cols].to_numpy(dtype="float64", na_value=np.nan)
+    if arr.size == 0:
+        # no rows: nan-reductions raise on empty input, so report null stats
+        empty = {k: None for k in ("min", "max", "mean", "std", *(f"p{q}" for q in QUANTILES))}
+        return {c: {"stats": dict(empty), "histogram": None} for c in cols}
+    with warnings.catch_warnings(), np.errstate(all="ignore"):
+        # all-NaN columns warn and yield NaN, which _num maps to None
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        mins = np.nanmin(arr, axis=0)
+        maxs = np.nanmax(arr, axis=0)
+        means = np.nanmean(arr, axis=0)
+        stds = np.nanstd(arr, axis=0, ddof=1)
+        qs = np.nanpercentile(arr, QUANTILES, axis=0)
+        hist_counts = _histogram_counts(arr, mins, maxs, bins)
+    out: Dict[Any, Dict[str, Any]] = {}
+    for i, c in enumerate(cols):
+        stats: Dict[str, Any] = {
+            "min": _num(mins[i]),
+            "max": _num(maxs[i]),
+            "mean": _num(means[i]),
+            "std": _num(stds[i]),
+        }
+        for q, row in zip(QUANTILES, qs):
+            stats[f"p{q}"] = _num(row[i])
+        histogram = None
+        if np.isfinite(mins[i]) and np.isfinite(maxs[i]):
+            edges = np.linspace(mins[i], maxs[i], bins + 1) if maxs[i] > mins[i] else np.array([mins[i] - 0.5, mins[i] + 0.5])
+            histogram = {"bin_edges": edges.tolist(), "counts": hist_counts[i, : len(edges) - 1].tolist()}
+        out[c] = {"stats": stats, "histogram": histogram}
+    return out
+
+
+def _histogram_counts(arr: np.ndarray, mins: np.ndarray, maxs: np.ndarray, bins: int) -> np.ndarray:
+    """Equal-width histograms for every column of ``arr`` at once; returns an (ncols, bins) count matrix."""
+    ncols = arr.shape[1]
+    with np.errstate(all="ignore"):
+        width = np.where(maxs > mins, (maxs - mins) / bins, 1.0)
+        idx = np.floor((arr - mins) / width)
+    valid = np.isfinite(idx)
+    # the max value falls on the right edge of the last bin
+    idx = np.clip(np.where(valid, idx, 0), 0, bins - 1).astype(np.int64)
+    flat = (idx + np.arange(ncols, dtype=np.int64) * bins)[valid]
+    return np.bincount(flat, minlength=ncols * bins).reshape(ncols, bins)
+
+
+def _hashable(v: Any) -> Any:
+    if isinstance(v, (list, dict, np.ndarray)):
+        return json.dumps(v.tolist() if isinstance(v, np.ndarray) else v, sort_keys=True, default=str)
+    return v
+
+
+def _value_counts(s: pd.Series, top_k: int):
+    """Return (distinct_count, [(value, count), ...] top-k by count) from one hash pass."""
+    try:
+        codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    except TypeError:
+        # unhashable cells (lists/dicts from nested JSON): count their canonical JSON text
+        codes, uniques = pd.factorize(s.map(_hashable, na_action="ignore"), use_na_sentinel=True)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    k = min(top_k, len(counts))
+    if k == 0:
+        return 0, []
+    top = np.argpartition(-counts, k - 1)[:k]
+    # highest count first, ties by first appearance
+    top = top[np.lexsort((top, -counts[top]))]
+    return len(uniques), [(uniques[i], int(counts[i])) for i in top]
+
+
+def profile_dataframe(df: pd.DataFrame, sample_size: int = SAMPLE_ROWS, top_k: int = TOP_K, bins: int = HISTOGRAM_BINS) -> Dict[str, Any]:
+    """
+    Profile ``df``. Returns ``{"row_count", "columns", "sample_rows"}`` where
+    each column dict matches the ``ColumnStats`` response model.
+    """
+    n = len(df)
+    null_counts = df.isna().sum()
+    numeric_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+    numeric = _numeric_stats(df, numeric_cols, bins)
+
+    columns: List[Dict[str, Any]] = []
+    for c in df.columns:
+        distinct, top = _value_counts(df[c], top_k)
+        null_count = int(null_counts[c])
+        col: Dict[str, Any] = {
+            "name": str(c),
+            "type": str(df[c].dtype),
+            "null_count": null_count,
+            "null_pct": float(null_count) / max(1, n),
+            "distinct_count": int(distinct),
+            "top_values": [{"value": _jsonable(v), "count": k} for v, k in top],
+            "stats": None,
+            "histogram": None,
+        }
+        col.update(numeric.get(c, {}))
+        columns.append(col)
+
+    sample = df.head(sample_size)
+    sample_rows = [{str(k): _jsonable(v) for k, v in row.items()} for row in sample.to_dict(orient="records")]
+    return {"row_count": n, "columns": columns, "sample_rows": sample_rows}
+
+
+# ---- Approximate (streaming) profiling ----
+
+APPROXIMATE_FIELDS = ["distinct_count", "stats.p25", "stats.p50", "stats.p75", "histogram"]
+
+
+class _ColumnSketch:
+    def __init__(self, dtype: str, seed: Optional[int]):
+        self.dtype = dtype
+        self.numeric = True
+        self.null_count = 0
+        self.distinct = HyperLogLog()
+        self.moments = RunningMoments()
+        self.quantiles = QuantileSketch(seed=seed)
+
+    def update(self, s: pd.Series) -> None:
+        self.null_count += int(s.isna().sum())
+        try:
+            self.distinct.update(s)
+        except TypeError:
+            self.distinct.update(s.map(_hashable, na_action="ignore"))
+        if str(s.dtype) != self.dtype:
+            self.dtype = "object"
+        if self.numeric and pd.api.types.is_numeric_dtype(s):
+            values = s.to_numpy(dtype="float64", na_value=np.nan)
+            self.moments.update(values)
+            self.quantiles.update(values)
+        elif not s.isna().all():
+            # a chunk with non-numeric values demotes the column for good
+            self.numeric = False
+
+    def to_column(self, name: str, row_count: int, bins: int) -> Dict[str, Any]:
+        stats = None
+        histogram = None
+        if self.numeric and self.moments.count:
+            m = self.moments
+            stats = {"min": m.min, "max": m.max, "mean": m.mean, "std": m.std()}
+            for q, v in zip(QUANTILES, self.quantiles.quantiles([q / 100 for q in QUANTILES])):
+                stats[f"p{q}"] = v
+            edges = np.linspace(m.min, m.max, bins + 1) if m.max > m.min else np.array([m.min - 0.5, m.min + 0.5])
+            cdf = self.quantiles.cdf(edges)
+            cdf[0] = 0.0
+            counts = np.rint(np.diff(cdf) * m.count).astype(int)
+            histogram = {"bin_edges": edges.tolist(), "counts": counts.tolist()}
+        return {
+            "name": name,
+            "type": self.dtype,
+            "null_count": self.null_count,
+            "null_pct": float(self.null_count) / max(1, row_count),
+            "distinct_count": self.distinct.count(),
+            "top_values": None,
+            "stats": stats,
+            "histogram": histogram,
+            "approximate": [f for f in APPROXIMATE_FIELDS if f == "distinct_count" or stats is not None],
+        }
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame], sample_size: int = SAMPLE_ROWS, bins: int = HISTOGRAM_BINS, seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Profile a stream of DataFrame chunks in bounded memory using mergeable
+    sketches: HyperLogLog distinct counts, KLL-style quantiles (also used for
+    histograms), exact running moments and a reservoir sample for
+    ``sample_rows``. Row/null counts, min/max, mean and std are exact; the
+    fields listed in each column's ``approximate`` are estimates within
+    ``error_bounds``. Top-k values are not tracked in this mode.
+    """
+    sketches: Dict[Any, _ColumnSketch] = {}
+    reservoir = Reservoir(sample_size, seed=seed)
+    row_count = 0
+    for chunk in chunks:
+        row_count += len(chunk)
+        for c in chunk.columns:
+            if c not in sketches:
+                sketches[c] = _ColumnSketch(str(chunk[c].dtype), seed)
+                sketches[c].null_count = row_count - len(chunk)  # column absent from earlier chunks
+            sketches[c].update(chunk[c])
+        reservoir.update(chunk)
+
+    columns = [sk.to_column(str(c), row_count, bins) for c, sk in sketches.items()]
+    rank_errors = [sk.quantiles.rank_error for sk in sketches.values() if sk.quantiles.n]
+    error_bounds = {
+        "distinct_count_rel_error": HyperLogLog().relative_error,
+        "quantile_rank_error": max(rank_errors) if rank_errors else 0.0,
+    }
+    sample_rows = [{str(k): _jsonable(v) for k, v in row.items()} for row in reservoir.rows]
+    return {"row_count": row_count, "columns": columns, "sample_rows": sample_rows, "approximate": True, "error_bounds": error_bounds}
@@ -0,0 +1,297 @@
+"""Format sniffing and typed readers for uploaded datasets.
+
+The format comes from the file's leading bytes, not its name or a chain of
+failed parses. Magic numbers identify XLSX (zip), XLS (OLE2), Parquet and
+Arrow. Text is classified as JSON, NDJSON, or delimited, with the delimiter
+picked by how consistently it splits the first lines. CSV/TSV and NDJSON are
+parsed by pyarrow's multi-threaded readers, using column types inferred from
+a sample at the start of the file. Anything pyarrow rejects falls back to
+pandas, so results match what ``pd.read_csv`` would give. XLSX workbooks are
+streamed sheet by sheet from openpyxl's read-only row iterator and built
+into frames in row batches.
+"""
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from pathlib import Path
+import io
+import json
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.json as pajson
+    import pyarrow.parquet as pq
+except Exception:  # pragma: no cover - pyarrow is optional at runtime
+    pa = None
+
+SNIFF_BYTES = 64 * 1024
+SAMPLE_BYTES = 1024 * 1024  # type inference sample
+CSV_BLOCK_SIZE = 4 * 1024 * 1024  # bytes per parallel parse block
+XLSX_BATCH_ROWS = 50_000
+DELIMITERS = (",", "\t", ";", "|")
+FORMATS = ("csv", "tsv", "json", "ndjson", "parquet", "arrow", "xlsx", "xls")
+
+_MAGIC = (
+    (b"PAR1", "parquet"),
+    (b"ARROW1", "arrow"),
+    (b"PK\x03\x04", "xlsx"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "xls"),
+)
+
+Source = Union[bytes, Path]
+
+
+def _head(source: Source, n: int) -> bytes:
+    if isinstance(source, bytes):
+        return source[:n]
+    with open(source, "rb") as f:
+        return f.read(n)
+
+
+def _open(source: Source):
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+def sniff_delimiter(text: str) -> str:
+    """The candidate delimiter that splits the first lines into the most, equally sized, fields."""
+    lines = [line for line in text.splitlines()[:20] if line.strip()]
+    if len(lines) > 1 and not text.endswith(("\n", "\r")):
+        lines = lines[:-1]  # last line may be cut off by the sniff window
+    best, best_score = ",", 0
+    for d in DELIMITERS:
+        counts = [line.count(d) for line in lines]
+        if not counts or min(counts) == 0:
+            continue
+        # a real delimiter gives (nearly) the same field count on every line
+        score = min(counts) * sum(c == counts[0] for c in counts) / len(counts)
+        if score > best_score:
+            best, best_score = d, score
+    return best
+
+
+def _json_kind(text: str) -> Optional[str]:
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        return "json"
+    if not stripped.startswith("{"):
+        return None
+    first, _, rest = stripped.partition("\n")
+    try:
+        json.loads(first)
+    except ValueError:
+        return "json"  # one object spread over several lines
+    return "ndjson" if rest.lstrip().startswith("{") or not rest.strip() else "json"
+
+
+def sniff_format(source: Source) -> str:
+    """One of FORMATS, from the first SNIFF_BYTES of ``source``."""
+    head = _head(source, SNIFF_BYTES)
+    for magic, fmt in _MAGIC:
+        if head.startswith(magic):
+            return fmt
+    text = head.decode("utf-8-sig", errors="replace")
+    kind = _json_kind(text)
+    if kind:
+        return kind
+    return "tsv" if sniff_delimiter(text) == "\t" else "csv"
+
+
+def _sample_types(schema) -> Dict[str, "pa.DataType"]:
+    """Column types to pin for the full read. Dates and times stay text, as pandas leaves them; all-null columns stay open."""
+    types = {}
+    for field in schema:
+        t = field.type
+        if pa.types.is_temporal(t):
+            types[field.name] = pa.string()
+        elif not pa.types.is_null(t):
+            types[field.name] = t
+    return types
+
+
+def _sample(source: Source) -> bytes:
+    head = _head(source, SAMPLE_BYTES)
+    if len(head) == SAMPLE_BYTES:
+        head = head[: head.rfind(b"\n") + 1]  # whole lines only
+    return head
+
+
+def _arrow_csv(source: Source, delimiter: str) -> Optional[pd.DataFrame]:
+    """Parse with pyarrow, or None when the file needs pandas (odd headers, types changing past the sample, ...)."""
+    parse = pacsv.ParseOptions(delimiter=delimiter)
+    try:
+        sample = pacsv.read_csv(io.BytesIO(_sample(source)), parse_options=parse, read_options=pacsv.ReadOptions(use_threads=False))
+        names = sample.column_names
+        if len(set(names)) != len(names) or "" in names:
+            return None  # pandas dedupes / names these columns
+        convert = pacsv.ConvertOptions(column_types=_sample_types(sample.schema), strings_can_be_null=True)
+        table = pacsv.read_csv(
+            _open(source),
+            parse_options=parse,
+            convert_options=convert,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=CSV_BLOCK_SIZE),
+        )
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+    return table.to_pandas()
+
+
+def _arrow_ndjson(source: Source) -> Optional[pd.DataFrame]:
+    try:
+        sample = pajson.read_json(io.BytesIO(_sample(source)), read_options=pajson.ReadOptions(use_threads=False))
+        schema = pa.schema([(name, t) for name, t in _sample_types(sample.schema).items()])
+        parse = pajson.ParseOptions(explicit_schema=schema, unexpected_field_behavior="infer")
+        table = pajson.read_json(_open(source), parse_options=parse, read_options=pajson.ReadOptions(use_threads=True, block_size=CSV_BLOCK_SIZE))
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+    return table.to_pandas()
+
+
+def _trim(row: tuple) -> tuple:
+    end = len(row)
+    while end and row[end - 1] is None:
+        end -= 1
+    return row[:end]
+
+
+def _column_names(header: tuple, width: int) -> List[str]:
+    """pandas' naming: blank headers become ``Unnamed: i``, repeats get ``.1``, ``.2``..."""
+    names, seen = [], {}
+    for i in range(width):
+        value = header[i] if i < len(header) else None
+        name = f"Unnamed: {i}" if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def _sheet_batches(rows: Iterator[tuple]) -> Iterator[pd.DataFrame]:
+    """
+    Header row plus data rows -> frames of at most XLSX_BATCH_ROWS rows, each
+    as wide as the widest row seen so far. Trailing blank rows/cells are
+    dropped.
+    """
+    header = _trim(next(rows, ()))
+    width = len(header)
+    batch: List[tuple] = []
+    blank = 0
+    emitted = False
+
+    def frame() -> pd.DataFrame:
+        df = pd.DataFrame.from_records(batch).reindex(columns=range(width))
+        df.columns = _column_names(header, width)
+        return df
+
+    for row in rows:
+        row = _trim(row)
+        if not row:
+            blank += 1  # only kept if data follows
+            continue
+        batch.extend([()] * blank)
+        blank = 0
+        batch.append(row)
+        width = max(width, len(row))
+        if len(batch) >= XLSX_BATCH_ROWS:
+            yield frame()
+            emitted = True
+            batch = []
+    if batch or not emitted:
+        yield frame()
+
+
+def _sheet_frame(batches: Iterator[pd.DataFrame]) -> pd.DataFrame:
+    batches = list(batches)
+    return pd.concat(batches, ignore_index=True) if len(batches) > 1 else batches[0]
+
+
+def iter_xlsx_batches(source: Source) -> Iterator[Tuple[str, Iterator[pd.DataFrame]]]:
+    """
+    Yield (sheet name, frames of at most XLSX_BATCH_ROWS rows) for each
+    worksheet, in workbook order. The workbook is opened read-only, so cells
+    are streamed from the file instead of being loaded into an in-memory
+    object model. A sheet's frames must be consumed before the next sheet.
+    """
+    from openpyxl import load_workbook
+
+    # openpyxl rejects paths without an .xlsx/.xlsm extension (spooled uploads have none); hand it a file object
+    f = io.BytesIO(source) if isinstance(source, bytes) else open(source, "rb")
+    try:
+        wb = load_workbook(f, read_only=True, data_only=True, keep_links=False)
+        try:
+            for ws in wb.worksheets:
+                ws.reset_dimensions()  # don't trust the sheet's stored dimension; read what is there
+                yield ws.title, _sheet_batches(ws.iter_rows(values_only=True))
+        finally:
+            wb.close()
+    finally:
+        f.close()
+
+
+def iter_xlsx(source: Source) -> Iterator[Tuple[str, pd.DataFrame, float]]:
+    """Yield (sheet name, frame, parse seconds) for each worksheet, in workbook order (see ``iter_xlsx_batches``)."""
+    for name, batches in iter_xlsx_batches(source):
+        started = time.perf_counter()
+        df = _sheet_frame(batches)
+        yield name, df, time.perf_counter() - started
+
+
+def read_table(source: Source, fmt: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read an uploaded dataset (raw bytes or a path) into a DataFrame. The
+    format is sniffed unless given; for workbooks this is the first sheet
+    (see ``iter_xlsx`` for all of them). Raises ValueError when it cannot be
+    parsed.
+    """
+    fmt = fmt or sniff_format(source)
+    try:
+        if fmt in ("csv", "tsv"):
+            delimiter = "\t" if fmt == "tsv" else sniff_delimiter(_head(source, SNIFF_BYTES).decode("utf-8-sig", errors="replace"))
+            df = _arrow_csv(source, delimiter) if pa is not None else None
+            return df if df is not None else pd.read_csv(_open(source), sep=delimiter)
+        if fmt == "ndjson":
+            df = _arrow_ndjson(source) if pa is not None else None
+            return df if df is not None else pd.read_json(_open(source), lines=True, convert_dates=False)
+        if fmt == "json":
+            return pd.read_json(_open(source), convert_dates=False)
+        if fmt == "parquet":
+            return pd.read_parquet(_open(source))
+        if fmt == "arrow":
+            with pa.ipc.open_file(_open(source)) as reader:
+                return reader.read_all().to_pandas()
+        if fmt == "xlsx":
+            for _, df, _ in iter_xlsx(source):
+                return df  # first sheet; later ones are never parsed
+            raise ValueError("Workbook has no worksheets")
+        return pd.read_excel(_open(source))
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Could not read {fmt} data: {e}") from e
+
+
+def iter_table(path: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield the dataset at ``path`` in frames of at most ``chunk_rows`` rows.
+    Delimited text, NDJSON and Parquet are read incrementally. Other formats
+    are yielded as one frame.
+    """
+    fmt = sniff_format(path)
+    if fmt in ("csv", "tsv"):
+        sep = "\t" if fmt == "tsv" else sniff_delimiter(_head(path, SNIFF_BYTES).decode("utf-8-sig", errors="replace"))
+        try:
+            reader = pd.read_csv(path, sep=sep, chunksize=chunk_rows)
+            yield next(reader)
+        except StopIteration:
+            return
+        yield from reader
+    elif fmt == "ndjson":
+        yield from pd.read_json(path, lines=True, convert_dates=False, chunksize=chunk_rows)
+    elif fmt == "parquet" and pa is not None:
+        for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield read_table(path, fmt)
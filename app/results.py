@@ -0,0 +1,135 @@
+"""Content-addressed memoization of profile/validate/analyze results.
+
+Results are keyed by the dataset's SHA-256, the operation and its
+parameters (the ruleset id is itself a content hash), so the same file
+uploaded again, by anyone, is answered from the cache instead of being
+recomputed. Entries are serialized JSON held in an LRU bounded by bytes,
+optionally backed by a SQLite file that survives restarts and is shared by
+every worker.
+"""
+from typing import Any, Callable, Dict, Optional
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", 256 * 1024 ** 2))  # 256MB in memory
+RESULT_CACHE_DISK_BYTES = int(os.getenv("RESULT_CACHE_DISK_BYTES", 2 * 1024 ** 3))  # 2GB on disk
+# empty RESULT_CACHE_PATH keeps results in memory only
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "")
+# bump when a result's shape or computation changes so persisted entries stop matching
+RESULT_VERSION = 1
+
+
+def result_key(sha256: str, operation: str, **params: Any) -> str:
+    """Hash of (dataset content hash, operation, canonical JSON of the parameters). None-valued parameters count as unset."""
+    params = {k: v for k, v in params.items() if v is not None}
+    canonical = json.dumps(
+        {"v": RESULT_VERSION, "sha256": sha256, "op": operation, "params": params},
+        sort_keys=True,
+        default=str,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU of serialized results bounded by ``max_bytes``, in front of an
+    optional SQLite table bounded by ``disk_bytes``. Counts memory hits, disk
+    hits and misses.
+    """
+
+    def __init__(self, path: Optional[str] = RESULT_CACHE_PATH, max_bytes: int = RESULT_CACHE_MAX_BYTES, disk_bytes: int = RESULT_CACHE_DISK_BYTES, clock: Callable[[], float] = time.time):
+        self.max_bytes = max_bytes
+        self.disk_bytes = disk_bytes
+        self.clock = clock
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+            except sqlite3.Error:
+                self._db = None  # unwritable location: memory only
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE results SET last_access = ? WHERE key = ?", (self.clock(), key))
+                    self._remember(key, row[0])
+                    self.disk_hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, value, len(value), self.clock()),
+                )
+                self._trim_disk()
+
+    def _remember(self, key: str, value: str) -> None:
+        if len(value) > self.max_bytes:
+            return  # would evict everything else
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self.bytes -= len(old)
+        self._memory[key] = value
+        self.bytes += len(value)
+        while self.bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self.bytes -= len(evicted)
+
+    def _trim_disk(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.disk_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY last_access").fetchall():
+            if total <= self.disk_bytes:
+                break
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self.bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "persistent": self._db is not None,
+        }
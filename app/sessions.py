@@ -0,0 +1,161 @@
+"""Persistent session store for uploaded datasets.
+
+Sessions are indexed in a SQLite database inside the upload directory, so
+every uvicorn worker (and a restarted server) sees the same sessions. Idle
+sessions expire after a TTL. When the files on disk exceed a byte budget, the
+least recently used sessions are evicted. A background sweeper enforces both
+limits, and removing a session deletes its raw file together with its
+artifact, manifest and violations sidecar.
+"""
+from typing import Callable, List, Optional
+from pathlib import Path
+import os
+import sqlite3
+import threading
+import time
+
+from .storage import dataset_files
+
+SESSION_TTL = float(os.getenv("SESSION_TTL", 24 * 3600))  # seconds since last use
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", 10 * 1024 ** 3))  # 10GB
+SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", 300))  # seconds
+
+
+def _files_size(path: Path) -> int:
+    """Bytes on disk of a dataset's files; hard-linked ones (an artifact doubling as the raw file) count once."""
+    total = 0
+    seen = set()
+    for f in dataset_files(path):
+        try:
+            st = f.stat()
+        except OSError:
+            continue
+        if (st.st_dev, st.st_ino) not in seen:
+            seen.add((st.st_dev, st.st_ino))
+            total += st.st_size
+    return total
+
+
+class SessionStore:
+    """SQLite-indexed sessions with TTL expiry and LRU eviction under ``max_bytes``."""
+
+    def __init__(self, directory: Path, ttl: float = SESSION_TTL, max_bytes: int = SESSION_MAX_BYTES, clock: Callable[[], float] = time.time):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.on_remove: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        # autocommit; timeout waits on other workers' write locks instead of failing
+        self._db = sqlite3.connect(str(directory / "sessions.sqlite"), timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, path TEXT NOT NULL, sha256 TEXT, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access)")
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def add(self, session_id: str, path: Path, sha256: Optional[str] = None) -> None:
+        """Register the dataset at ``path`` (plus its derived files), then evict others if over budget."""
+        now = self.clock()
+        self._query(
+            "INSERT OR REPLACE INTO sessions (id, path, sha256, size, created, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+            (session_id, str(path), sha256, _files_size(path), now, now),
+        )
+        self._evict_over_budget(keep=session_id)
+
+    def get(self, session_id: str) -> Optional[Path]:
+        """Path of a live session (refreshing its last use), or None if unknown, expired or missing on disk."""
+        now = self.clock()
+        rows = self._query("SELECT path, last_access FROM sessions WHERE id = ?", (session_id,))
+        if not rows:
+            return None
+        path, last_access = Path(rows[0][0]), rows[0][1]
+        if now - last_access > self.ttl or not path.exists():
+            self.remove(session_id)
+            return None
+        self._query("UPDATE sessions SET last_access = ? WHERE id = ?", (now, session_id))
+        return path
+
+    def sha256(self, session_id: str) -> Optional[str]:
+        rows = self._query("SELECT sha256 FROM sessions WHERE id = ?", (session_id,))
+        return rows[0][0] if rows else None
+
+    def refresh_size(self, session_id: str) -> None:
+        """Re-measure a session's files after artifacts or sidecars were written for it."""
+        rows = self._query("SELECT path FROM sessions WHERE id = ?", (session_id,))
+        if rows:
+            self._query("UPDATE sessions SET size = ? WHERE id = ?", (_files_size(Path(rows[0][0])), session_id))
+
+    def remove(self, session_id: str) -> bool:
+        """Forget a session and delete its files. Returns False if another worker got there first."""
+        with self._lock:
+            rows = self._db.execute("SELECT path FROM sessions WHERE id = ?", (session_id,)).fetchall()
+            deleted = self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount
+        if not rows or not deleted:
+            return False
+        for f in dataset_files(Path(rows[0][0])):
+            f.unlink(missing_ok=True)
+        for callback in self.on_remove:
+            callback(session_id)
+        return True
+
+    def total_bytes(self) -> int:
+        return int(self._query("SELECT COALESCE(SUM(size), 0) FROM sessions")[0][0])
+
+    def _evict_over_budget(self, keep: Optional[str] = None) -> int:
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+        evicted = 0
+        for session_id, size in self._query("SELECT id, size FROM sessions ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            if session_id == keep:
+                continue
+            if self.remove(session_id):
+                total -= size
+                evicted += 1
+        return evicted
+
+    def sweep(self) -> int:
+        """Drop expired sessions, re-measure the rest and evict LRU sessions over budget. Returns sessions removed."""
+        cutoff = self.clock() - self.ttl
+        expired = [r[0] for r in self._query("SELECT id FROM sessions WHERE last_access < ?", (cutoff,))]
+        removed = sum(self.remove(session_id) for session_id in expired)
+        for (session_id,) in self._query("SELECT id FROM sessions"):
+            self.refresh_size(session_id)
+        return removed + self._evict_over_budget()
+
+    def start_sweeper(self, interval: float = SWEEP_INTERVAL) -> None:
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.sweep()
+                except sqlite3.Error:
+                    pass  # another worker holds the lock; try again next round
+        self._sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __len__(self) -> int:
+        return int(self._query("SELECT COUNT(*) FROM sessions")[0][0])
@@ -0,0 +1,185 @@
+"""Mergeable streaming sketches used for approximate profiling.
+
+All sketches consume numpy arrays / DataFrame chunks, keep bounded state,
+and can be merged, so a file can be profiled chunk by chunk (or in parallel)
+without ever holding it in memory.
+"""
+from typing import Any, Dict, List, Optional
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class HyperLogLog:
+    """Distinct-count estimator over 64-bit hashes; relative std error is 1.04 / sqrt(2**precision)."""
+
+    def __init__(self, precision: int = 14):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def update(self, values: pd.Series) -> None:
+        values = values.dropna()
+        if values.empty:
+            return
+        h = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        idx = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        low = (h & np.uint64((1 << (64 - self.p)) - 1)).astype(np.float64)  # < 2**53, exact in float64
+        _, exp = np.frexp(low)  # exp == bit_length(low), 0 for low == 0
+        rank = (64 - self.p - exp + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        m = float(self.m)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class QuantileSketch:
+    """
+    KLL-style compactor sketch. Level ``h`` holds items of weight ``2**h``;
+    a level that reaches ``2k`` items is sorted and every other item (random
+    offset) is promoted. Each compaction shifts any rank by at most one item
+    weight, which bounds the normalized rank error by ``levels / (2k)``.
+    """
+
+    def __init__(self, k: int = 2048, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def rank_error(self) -> float:
+        return len(self.levels) / (2.0 * self.k)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if not values.size:
+            return
+        self.n += values.size
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        self.n += other.n
+        for h, buf in enumerate(other.levels):
+            if h >= len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            self.levels[h] = np.concatenate([self.levels[h], buf])
+        self._compress()
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            buf = self.levels[h]
+            if buf.size >= 2 * self.k:
+                buf = np.sort(buf)
+                keep = buf[: buf.size % 2]
+                promoted = buf[keep.size:][int(self._rng.integers(2))::2]
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(buf.size, 1 << h, dtype=np.float64) for h, buf in enumerate(self.levels)])
+        order = np.argsort(items, kind="mergesort")
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs: List[float]) -> List[Optional[float]]:
+        if self.n == 0:
+            return [None for _ in qs]
+        items, cum = self._weighted()
+        total = cum[-1]
+        pos = np.searchsorted(cum, np.asarray(qs, dtype=np.float64) * total, side="left")
+        return [float(items[min(i, items.size - 1)]) for i in pos]
+
+    def cdf(self, points: np.ndarray) -> np.ndarray:
+        """Estimated fraction of values <= each point."""
+        if self.n == 0:
+            return np.zeros(len(points))
+        items, cum = self._weighted()
+        idx = np.searchsorted(items, np.asarray(points, dtype=np.float64), side="right")
+        below = np.where(idx > 0, cum[np.maximum(idx - 1, 0)], 0.0)
+        return below / cum[-1]
+
+
+class RunningMoments:
+    """Exact count/min/max/mean/variance, merged chunk by chunk (Chan et al. parallel update)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if not values.size:
+            return
+        other = RunningMoments()
+        other.count = int(values.size)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    def merge(self, other: "RunningMoments") -> None:
+        if other.count == 0:
+            return
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def std(self) -> Optional[float]:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None
+
+
+class Reservoir:
+    """Uniform random sample of ``k`` rows over a stream of DataFrame chunks (Algorithm R)."""
+
+    def __init__(self, k: int = 20, seed: Optional[int] = None):
+        self.k = k
+        self.seen = 0
+        self.rows: List[Dict[str, Any]] = []
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        n = len(chunk)
+        fill = min(max(self.k - len(self.rows), 0), n)
+        if fill:
+            self.rows.extend(chunk.iloc[:fill].to_dict(orient="records"))
+        if fill < n:
+            # global index i replaces slot j ~ U[0, i] when j < k
+            idx = np.arange(self.seen + fill, self.seen + n)
+            slots = self._rng.integers(0, idx + 1)
+            hit = np.nonzero(slots < self.k)[0]
+            if hit.size:
+                replacements = chunk.iloc[fill + hit].to_dict(orient="records")
+                for slot, row in zip(slots[hit], replacements):
+                    self.rows[int(slot)] = row
+        self.seen += n
@@ -0,0 +1,325 @@
+"""On-disk storage for uploaded datasets.
+
+Every upload is parsed once and persisted as a typed columnar artifact
+(Parquet) next to the raw file, together with a small JSON manifest that
+describes the schema. Session endpoints load the artifact (memory-mapped)
+instead of re-parsing the original CSV/XLSX on every call.
+"""
+from typing import Dict, Any, Optional, List, Tuple, Iterator
+from pathlib import Path
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from .readers import iter_table, iter_xlsx_batches
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:  # pragma: no cover - pyarrow is optional at runtime
+    pa = None
+    pq = None
+
+ARTIFACT_SUFFIX = ".parquet"
+MANIFEST_SUFFIX = ".manifest.json"
+VIOLATIONS_SUFFIX = ".violations.parquet"
+SHEET_SUFFIX = ".sheet"
+SHEETS_SUFFIX = ".sheets.json"
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+CHUNK_ROWS = 100_000
+
+
+def _format_size(size: int) -> str:
+    for unit, scale in (("MB", 1024 * 1024), ("KB", 1024)):
+        if size >= scale:
+            return f"{round(size / scale, 1):g}{unit}"
+    return f"{size} bytes"
+
+
+class UploadTooLarge(ValueError):
+    """An upload grew past ``max_size`` bytes while it was being spooled."""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"Upload too large. Max size is {_format_size(max_size)}.")
+        self.max_size = max_size
+
+
+async def spool_upload(file: Any, dest: Path, max_size: int) -> Tuple[int, str]:
+    """
+    Stream ``file`` (anything with an async ``read(size)``, e.g. an UploadFile)
+    to ``dest`` chunk by chunk, hashing as it goes, so only one chunk is ever
+    held in memory. The size limit is enforced mid-stream (the content-length
+    header can be absent or wrong) by raising UploadTooLarge. Returns
+    (size, sha256 hex).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(max_size)
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+    return size, digest.hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def artifact_path(raw_path: Path) -> Path:
+    return raw_path.with_name(raw_path.name + ARTIFACT_SUFFIX)
+
+
+def manifest_path(raw_path: Path) -> Path:
+    return raw_path.with_name(raw_path.name + MANIFEST_SUFFIX)
+
+
+def violations_path(raw_path: Path) -> Path:
+    return raw_path.with_name(raw_path.name + VIOLATIONS_SUFFIX)
+
+
+def sheets_path(raw_path: Path) -> Path:
+    return raw_path.with_name(raw_path.name + SHEETS_SUFFIX)
+
+
+def sheet_path(raw_path: Path, index: int) -> Path:
+    """Dataset path of worksheet ``index`` of the workbook at ``raw_path``; the first sheet is the workbook's own dataset."""
+    return raw_path if index == 0 else raw_path.with_name(f"{raw_path.name}{SHEET_SUFFIX}{index}")
+
+
+def dataset_files(raw_path: Path) -> List[Path]:
+    """The raw file and every file derived from it, including extra worksheets."""
+    files = [raw_path, artifact_path(raw_path), manifest_path(raw_path), violations_path(raw_path), sheets_path(raw_path)]
+    return files + sorted(raw_path.parent.glob(glob.escape(raw_path.name + SHEET_SUFFIX) + "*"))
+
+
+def write_artifact(df: pd.DataFrame, raw_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Persist ``df`` as Parquet next to ``raw_path`` and write its manifest.
+    Returns the manifest, or None when the frame cannot be stored columnar
+    (pyarrow missing, mixed-type object columns, ...). Callers then fall
+    back to parsing the raw file.
+    """
+    if pa is None:
+        return None
+    dest = artifact_path(raw_path)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, dest)
+    except Exception:
+        dest.unlink(missing_ok=True)
+        return None
+    manifest = {
+        "format": "parquet",
+        "source": raw_path.name,
+        "source_size": raw_path.stat().st_size if raw_path.exists() else None,
+        "row_count": int(table.num_rows),
+        "columns": [
+            {"name": str(c), "dtype": str(df[c].dtype), "arrow_type": str(table.schema.field(i).type)}
+            for i, c in enumerate(df.columns)
+        ],
+    }
+    manifest_path(raw_path).write_text(json.dumps(manifest))
+    return manifest
+
+
+def save_frame(df: pd.DataFrame, raw_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Store a derived frame (no original upload) as a dataset at ``raw_path``:
+    the Parquet artifact is hard-linked as the raw file, or, when the frame
+    cannot be stored columnar, the raw file is written as CSV. Returns the
+    manifest, or None in the CSV case.
+    """
+    raw_path.unlink(missing_ok=True)
+    manifest = write_artifact(df, raw_path)
+    if manifest is None:
+        df.to_csv(raw_path, index=False)
+        return None
+    return _link_artifact(manifest, raw_path)
+
+
+def _link_artifact(manifest: Dict[str, Any], raw_path: Path) -> Dict[str, Any]:
+    """Make the artifact double as the raw file and record its size in the manifest."""
+    try:
+        os.link(artifact_path(raw_path), raw_path)
+    except OSError:
+        shutil.copyfile(artifact_path(raw_path), raw_path)
+    manifest["source_size"] = raw_path.stat().st_size
+    manifest_path(raw_path).write_text(json.dumps(manifest))
+    return manifest
+
+
+def write_batches(batches: Iterator["pa.RecordBatch"], raw_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Store a stream of record batches (e.g. a database extract) as a dataset at
+    ``raw_path``, appending each batch to the Parquet artifact as it arrives,
+    so the whole result is never held in memory. The artifact is hard-linked
+    as the raw file, as in ``save_frame``. Returns the manifest, or None when
+    the stream is empty.
+    """
+    raw_path.unlink(missing_ok=True)
+    dest = artifact_path(raw_path)
+    writer = None
+    rows = 0
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = pq.ParquetWriter(dest, batch.schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        dest.unlink(missing_ok=True)
+        raise
+    if writer is None:
+        return None
+    writer.close()
+    return _link_artifact(_streamed_manifest(raw_path, writer.schema, rows), raw_path)
+
+
+def _streamed_manifest(raw_path: Path, schema: "pa.Schema", rows: int) -> Dict[str, Any]:
+    """Manifest of an artifact written batch by batch; dtypes are what pandas makes of ``schema``."""
+    dtypes = schema.empty_table().to_pandas().dtypes
+    return {
+        "format": "parquet",
+        "source": raw_path.name,
+        "source_size": raw_path.stat().st_size if raw_path.exists() else None,
+        "row_count": rows,
+        "columns": [
+            {"name": field.name, "dtype": str(dtypes.iloc[i]), "arrow_type": str(field.type)}
+            for i, field in enumerate(schema)
+        ],
+    }
+
+
+def _write_sheet(frames: Iterator[pd.DataFrame], raw_path: Path, derived: bool) -> Tuple[Optional[Dict[str, Any]], int, int]:
+    """
+    Store one worksheet's row batches as the dataset at ``raw_path``, appending
+    each batch to the Parquet artifact as it is parsed. When a batch does not
+    fit the schema set by the first (types change further down the sheet,
+    mixed-type columns), the sheet is gathered into one frame and stored like
+    any other: ``write_artifact`` for the workbook's own first sheet,
+    ``save_frame`` (CSV fallback) for derived ones. Returns (manifest or None,
+    rows, columns).
+    """
+    if derived:
+        raw_path.unlink(missing_ok=True)
+
+    def store_whole(parts: List[pd.DataFrame]) -> Tuple[Optional[Dict[str, Any]], int, int]:
+        whole = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        manifest = save_frame(whole, raw_path) if derived else write_artifact(whole, raw_path)
+        return manifest, len(whole), whole.shape[1]
+
+    if pa is None:
+        return store_whole(list(frames))
+    dest = artifact_path(raw_path)
+    writer = None
+    rows = 0
+    for df in frames:
+        try:
+            table = pa.Table.from_pandas(df, schema=writer.schema if writer else None, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(dest, table.schema)
+            writer.write_table(table)
+            rows += len(df)
+            continue
+        except (ValueError, TypeError, KeyError, pa.ArrowNotImplementedError):
+            pass
+        # the batch does not fit: collect what was written plus the rest
+        parts = []
+        if writer is not None:
+            writer.close()
+            parts.append(pq.read_table(dest).to_pandas())
+        dest.unlink(missing_ok=True)
+        return store_whole(parts + [df, *frames])
+    writer.close()
+    manifest = _streamed_manifest(raw_path, writer.schema, rows)
+    if derived:
+        return _link_artifact(manifest, raw_path), rows, len(writer.schema)
+    manifest_path(raw_path).write_text(json.dumps(manifest))
+    return manifest, rows, len(writer.schema)
+
+
+def write_workbook(raw_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Store every worksheet of the XLSX at ``raw_path`` as its own dataset (see
+    ``sheet_path``), streaming one sheet and one row batch at a time. The
+    sheet list (name, row/column counts and parse seconds per sheet) is
+    written to its own file (see ``read_sheets``) whether or not the first
+    sheet could be stored columnar. Returns the first sheet's manifest, or
+    None. Raises ValueError for unreadable workbooks.
+    """
+    manifest = None
+    sheets = []
+    try:
+        for index, (name, frames) in enumerate(iter_xlsx_batches(raw_path)):
+            started = time.perf_counter()
+            sheet_manifest, rows, columns = _write_sheet(frames, sheet_path(raw_path, index), derived=index > 0)
+            if index == 0:
+                manifest = sheet_manifest
+            sheets.append({"name": name, "row_count": rows, "column_count": columns, "parse_seconds": round(time.perf_counter() - started, 4)})
+    except Exception as e:
+        raise ValueError(f"Could not read xlsx data: {e}") from e
+    sheets_path(raw_path).write_text(json.dumps(sheets))
+    return manifest
+
+
+def read_sheets(raw_path: Path) -> List[Dict[str, Any]]:
+    """Worksheets of a workbook dataset, in order (empty for anything else)."""
+    try:
+        return json.loads(sheets_path(raw_path).read_text())
+    except Exception:
+        return []
+
+
+def read_manifest(raw_path: Path) -> Optional[Dict[str, Any]]:
+    path = manifest_path(raw_path)
+    if not path.exists() or not artifact_path(raw_path).exists():
+        return None
+    try:
+        return json.loads(path.read_text())
+    except Exception:
+        return None
+
+
+def load_artifact(raw_path: Path, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """Load the columnar artifact for ``raw_path`` (memory-mapped), or None if there is none."""
+    if pq is None or read_manifest(raw_path) is None:
+        return None
+    try:
+        table = pq.read_table(artifact_path(raw_path), columns=columns, memory_map=True)
+    except Exception:
+        return None
+    return table.to_pandas()
+
+
+def iter_chunks(raw_path: Path, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Yield the dataset at ``raw_path`` as DataFrames of at most ``chunk_rows``
+    rows: Parquet row batches when an artifact exists, otherwise chunks of the
+    raw file (see ``readers.iter_table``).
+    """
+    if pq is not None and read_manifest(raw_path) is not None:
+        for batch in pq.ParquetFile(artifact_path(raw_path), memory_map=True).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+    yield from iter_table(raw_path, chunk_rows)
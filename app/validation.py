@@ -1,8 +1,45 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 import yaml
+import numpy as np
 import pandas as pd
 from pathlib import Path
+import hashlib
+import json
+import os
 import pkgutil
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+# Columns are validated independently, so wide rulesets fan out over a shared
+# pool. VALIDATION_POOL=process trades pickling one column per task for
+# freedom from the GIL.
+VALIDATION_WORKERS = int(os.getenv("VALIDATION_WORKERS", "0")) or (os.cpu_count() or 1)
+VALIDATION_POOL = os.getenv("VALIDATION_POOL", "thread")
+PARALLEL_MIN_ROWS = 10_000
+
+_pool: Optional[Executor] = None
+_pool_lock = threading.Lock()
+
+
+def validation_pool() -> Optional[Executor]:
+    """Shared per-column validation pool, or None when validation should run inline."""
+    global _pool
+    if VALIDATION_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            if VALIDATION_POOL == "process":
+                from .batch import process_context
+                _pool = ProcessPoolExecutor(max_workers=VALIDATION_WORKERS, mp_context=process_context())
+            else:
+                _pool = ThreadPoolExecutor(max_workers=VALIDATION_WORKERS, thread_name_prefix="validate")
+        return _pool
+
 
 class RuleError:
     def __init__(self, column: str, message: str, row_sample: Dict[str, Any] | None = None):
@@ -19,13 +56,7 @@ class RuleError:
         }
 
 
-def load_rules(path: str | Path) -> Dict[str, Any]:
-    """
-    Load YAML rules. Accepts a filesystem path or a package-relative path
-    (e.g. 'ui/validation_rules/basic.yaml'). If the provided path is not
-    found on the filesystem, this function will attempt to resolve it
-    relative to the Databotics package root.
-    """
+def _resolve_rules_path(path: str | Path) -> Optional[Path]:
     p = Path(path)
     if not p.exists():
         # try to resolve relative to the package root
@@ -33,7 +64,18 @@ def load_rules(path: str | Path) -> Dict[str, Any]:
         candidate = pkg_root / Path(path)
         if candidate.exists():
             p = candidate
-    if p.exists():
+    return p if p.exists() else None
+
+
+def load_rules(path: str | Path) -> Dict[str, Any]:
+    """
+    Load YAML rules. Accepts a filesystem path or a package-relative path
+    (e.g. 'ui/validation_rules/basic.yaml'). If the provided path is not
+    found on the filesystem, this function will attempt to resolve it
+    relative to the Databotics package root.
+    """
+    p = _resolve_rules_path(path)
+    if p is not None:
         with open(p, "r") as f:
             return yaml.safe_load(f)
     # last resort: try to load as package resource via pkgutil (embedded resources)
@@ -46,7 +88,215 @@ def load_rules(path: str | Path) -> Dict[str, Any]:
     raise FileNotFoundError(f"Rules file not found: {path}")
 
 
-def validate_dataframe(df: pd.DataFrame, rules: Dict[str, Any]) -> Dict[str, Any]:
+class ColumnPlan:
+    """
+    Compiled rules for one column. Built once per ruleset by ``compile_rules``;
+    regexes are compiled here rather than inside the validation loop.
+    """
+
+    def __init__(self, column: str, cfg: Dict[str, Any]):
+        self.column = column
+        self.required = bool(cfg.get("required"))
+        self.type = cfg.get("type")
+        self.min = cfg.get("min") if self.type in ("int", "float") else None
+        self.max = cfg.get("max") if self.type in ("int", "float") else None
+        self.regex = cfg.get("regex") or None
+        self.pattern = re.compile(self.regex) if self.regex else None
+        self.unique = bool(cfg.get("unique"))
+
+
+def compile_rules(rules: Dict[str, Any]) -> List[ColumnPlan]:
+    """Compile a rules dict (as returned by ``load_rules``) into per-column execution plans."""
+    return [ColumnPlan(col, cfg or {}) for col, cfg in (rules.get("columns") or {}).items()]
+
+
+def ruleset_id_for(rules: Dict[str, Any]) -> str:
+    """Content hash of a rules dict; identical rules share an id whether loaded from YAML or posted as JSON."""
+    canonical = json.dumps(rules, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+class Ruleset:
+    def __init__(self, rules: Dict[str, Any], source: Optional[str] = None):
+        self.id = ruleset_id_for(rules)
+        self.rules = rules
+        self.plans = compile_rules(rules)
+        self.source = source
+
+
+class RulesetRegistry:
+    """
+    Bounded LRU of parsed and compiled rulesets, keyed by content hash.
+    File-backed rulesets are looked up by (resolved path, mtime, size), so a
+    hot ruleset costs one ``stat`` and an edited file is picked up on its
+    next use. With a SQLite ``path``, registered rulesets are also stored
+    there, so every worker process (and a restarted server) can find them by
+    id.
+    """
+
+    def __init__(self, max_entries: int = 64, path: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._by_id: "OrderedDict[str, Ruleset]" = OrderedDict()
+        self._by_path: Dict[Tuple[Any, ...], str] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS rulesets (id TEXT PRIMARY KEY, rules TEXT NOT NULL, source TEXT)")
+
+    def _lookup(self, key: Tuple[Any, ...]) -> Optional[Ruleset]:
+        with self._lock:
+            ruleset_id = self._by_path.get(key)
+            rs = self._by_id.get(ruleset_id) if ruleset_id else None
+            if rs is not None:
+                self._by_id.move_to_end(rs.id)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return rs
+
+    def _put(self, rs: Ruleset, key: Optional[Tuple[Any, ...]] = None) -> Ruleset:
+        with self._lock:
+            existing = self._by_id.get(rs.id)
+            if existing is not None:
+                rs = existing
+            self._by_id[rs.id] = rs
+            self._by_id.move_to_end(rs.id)
+            if key is not None:
+                # drop keys for older versions of the same file
+                for stale in [k for k in self._by_path if k[:2] == key[:2]]:
+                    del self._by_path[stale]
+                self._by_path[key] = rs.id
+            while len(self._by_id) > self.max_entries:
+                evicted, _ = self._by_id.popitem(last=False)
+                for k in [k for k, v in self._by_path.items() if v == evicted]:
+                    del self._by_path[k]
+            return rs
+
+    def load(self, path: str | Path) -> Ruleset:
+        """Return the compiled ruleset for ``path`` (same resolution rules as ``load_rules``)."""
+        p = _resolve_rules_path(path)
+        if p is not None:
+            st = p.stat()
+            key: Tuple[Any, ...] = ("file", str(p.resolve()), st.st_mtime_ns, st.st_size)
+        else:
+            key = ("resource", str(path))
+        rs = self._lookup(key)
+        if rs is None:
+            rs = self._put(Ruleset(load_rules(path), source=str(path)), key)
+        return rs
+
+    def register(self, rules: Dict[str, Any], source: Optional[str] = None) -> Ruleset:
+        rs = self._put(Ruleset(rules, source=source))
+        if self._db is not None:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO rulesets (id, rules, source) VALUES (?, ?, ?)",
+                    (rs.id, json.dumps(rs.rules, default=str), rs.source),
+                )
+        return rs
+
+    def get(self, ruleset_id: str) -> Optional[Ruleset]:
+        with self._lock:
+            rs = self._by_id.get(ruleset_id)
+            if rs is not None:
+                self._by_id.move_to_end(ruleset_id)
+                return rs
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT rules, source FROM rulesets WHERE id = ?", (ruleset_id,)).fetchone()
+        if row is None:
+            return None
+        # registered by another worker, or evicted from memory
+        return self._put(Ruleset(json.loads(row[0]), source=row[1]))
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+
+
+def _as_text(values: pd.Series) -> pd.Series:
+    # Arrow-backed strings let str.match run as one Arrow compute kernel
+    try:
+        return values.astype("string[pyarrow]")
+    except Exception:
+        return values.astype(str)
+
+
+def _regex_match(values: pd.Series, plan: ColumnPlan) -> pd.Series:
+    try:
+        return _as_text(values).str.match(plan.regex).fillna(False).astype(bool)
+    except Exception:
+        # pattern not supported by the Arrow (RE2) engine
+        return values.astype(str).map(lambda v: bool(plan.pattern.match(v))).astype(bool)
+
+
+def _sample(values: pd.Series, mask: pd.Series) -> Dict[Any, Any]:
+    return values[mask].head(3).to_dict()
+
+
+def validate_column(df: pd.DataFrame, plan: ColumnPlan) -> List[RuleError]:
+    """
+    Run one column's plan with bulk (vectorized) operations. The column is
+    coerced to numeric at most once and that result is shared by the type
+    and range checks.
+    """
+    col = plan.column
+    errors: List[RuleError] = []
+    # required
+    if plan.required:
+        if col not in df.columns or df[col].isnull().all():
+            return [RuleError(col, "Missing required column or all values null")]
+    if col not in df.columns:
+        return errors
+    series = df[col]
+    values = series.dropna()
+    numeric: pd.Series | None = None
+    # type coercion check
+    if plan.type:
+        try:
+            if plan.type == "int":
+                numeric = values.astype(float)
+            elif plan.type == "float":
+                numeric = pd.to_numeric(values)
+            elif plan.type == "str":
+                values.astype(str)
+        except Exception:
+            errors.append(RuleError(col, f"Type coercion to {plan.type} failed", row_sample=series.head(3).to_dict()))
+    # range
+    if plan.min is not None or plan.max is not None:
+        if numeric is None:
+            numeric = pd.to_numeric(values, errors="coerce")
+        if plan.min is not None:
+            bad = numeric < plan.min
+            if bad.any():
+                errors.append(RuleError(col, f"Values below min {plan.min}", row_sample=_sample(values, bad)))
+        if plan.max is not None:
+            bad = numeric > plan.max
+            if bad.any():
+                errors.append(RuleError(col, f"Values above max {plan.max}", row_sample=_sample(values, bad)))
+    # regex
+    if plan.pattern is not None:
+        bad = ~_regex_match(values, plan)
+        if bad.any():
+            errors.append(RuleError(col, "Regex mismatch", row_sample=_sample(values, bad)))
+    # uniqueness
+    if plan.unique:
+        dup = values.duplicated(keep=False)
+        if dup.any():
+            errors.append(RuleError(col, "Duplicate values found", row_sample=_sample(values, dup)))
+    return errors
+
+
+def _validate_column_task(args: Tuple[pd.DataFrame, ColumnPlan]) -> List[Dict[str, Any]]:
+    frame, plan = args
+    return [e.to_dict() for e in validate_column(frame, plan)]
+
+
+def validate_dataframe(df: pd.DataFrame, rules: Dict[str, Any] | List[ColumnPlan], executor: Optional[Executor] = None) -> Dict[str, Any]:
     """
     rules format (example):
     columns:
@@ -58,53 +308,230 @@ def validate_dataframe(df: pd.DataFrame, rules: Dict[str, Any]) -> Dict[str, Any
         max: 120
       email:
         regex: ".+@.+\\..+"
+
+    ``rules`` may also be a plan already compiled with ``compile_rules``.
+    Columns are checked in parallel on ``executor`` (default: the shared
+    ``validation_pool``); errors keep ruleset order either way.
     """
-    errors: List[RuleError] = []
-    cols_rules = rules.get("columns", {})
-    for col, cfg in cols_rules.items():
-        # required
-        if cfg.get("required"):
-            if col not in df.columns or df[col].isnull().all():
-                errors.append(RuleError(col, "Missing required column or all values null"))
+    plans = compile_rules(rules) if isinstance(rules, dict) else rules
+    pool = executor or validation_pool()
+    # each task gets only its own column, which keeps process-pool pickling small
+    tasks = [(df[[p.column]] if p.column in df.columns else df.iloc[:, :0], p) for p in plans]
+    if pool is None or len(plans) < 2 or len(df) < PARALLEL_MIN_ROWS:
+        results = map(_validate_column_task, tasks)
+    else:
+        results = pool.map(_validate_column_task, tasks)
+    errors = [e for column_errors in results for e in column_errors]
+
+    return {"errors": errors, "summary": {"error_count": len(errors)}}
+
+
+# ---- Chunked (streaming) validation ----
+
+class _Rule:
+    def __init__(self, index: int, plan: ColumnPlan, kind: str, message: str):
+        self.index = index
+        self.plan = plan
+        self.kind = kind
+        self.message = message
+        self.count = 0
+        self.sample: Dict[Any, Any] = {}
+
+    def record(self, rows: Any, values: Any) -> None:
+        self.count += len(rows)
+        for r, v in zip(rows, values):
+            if len(self.sample) >= 3:
+                break
+            self.sample[int(r)] = v.item() if hasattr(v, "item") else v
+
+
+def _expand_rules(plans: List[ColumnPlan]) -> List[_Rule]:
+    rules: List[_Rule] = []
+    for plan in plans:
+        specs = []
+        if plan.required:
+            specs.append(("required", "Missing required column or all values null"))
+        if plan.type:
+            specs.append(("type", f"Type coercion to {plan.type} failed"))
+        if plan.min is not None:
+            specs.append(("min", f"Values below min {plan.min}"))
+        if plan.max is not None:
+            specs.append(("max", f"Values above max {plan.max}"))
+        if plan.pattern is not None:
+            specs.append(("regex", "Regex mismatch"))
+        if plan.unique:
+            specs.append(("unique", "Duplicate values found"))
+        for kind, message in specs:
+            rules.append(_Rule(len(rules), plan, kind, message))
+    return rules
+
+
+def _unique_key(value: Any) -> str:
+    if isinstance(value, (bool, np.bool_)):
+        return str(bool(value))
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _unique_keys(values: pd.Series) -> np.ndarray:
+    """
+    Canonical text of each value, so a chunk read as int64 (5), one read as
+    float64 because of a null (5.0) and one read as text ("5") agree.
+    """
+    dtype = values.dtype
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return values.astype(str).to_numpy(dtype=object)
+    if pd.api.types.is_float_dtype(dtype):
+        arr = values.to_numpy(dtype="float64")
+        keys = values.astype(str).to_numpy(dtype=object)
+        integral = np.isfinite(arr) & (arr == np.trunc(arr))
+        keys[integral] = [str(int(v)) for v in arr[integral]]
+        return keys
+    return np.array([_unique_key(v) for v in values.to_numpy(dtype=object)], dtype=object)
+
+
+class _UniqueTracker:
+    """
+    Cross-chunk duplicate detection. (row, value) pairs go into an on-disk
+    DuckDB database whose hash aggregate spills to disk past ``memory_limit``,
+    so uniqueness over 10M+ rows needs no in-memory hash set.
+    """
+
+    def __init__(self, spill_dir: Path, memory_limit: str = "256MB"):
+        import duckdb
+        self.con = duckdb.connect(str(spill_dir / "unique.duckdb"))
+        self.con.execute(f"SET memory_limit='{memory_limit}'")
+        self.con.execute(f"SET temp_directory='{spill_dir / 'spill'}'")
+        self.tables: Dict[int, str] = {}
+
+    def add(self, rule: _Rule, rows: Any, values: pd.Series) -> None:
+        table = self.tables.get(rule.index)
+        if table is None:
+            table = self.tables[rule.index] = f"u{rule.index}"
+            self.con.execute(f"CREATE TABLE {table} (row BIGINT, v VARCHAR)")
+        chunk = pd.DataFrame({"row": rows, "v": _unique_keys(values)})
+        self.con.register("chunk_values", chunk)
+        self.con.execute(f"INSERT INTO {table} SELECT row, v FROM chunk_values")
+        self.con.unregister("chunk_values")
+
+    def duplicates(self, rule: _Rule, batch_size: int = 100_000):
+        """Yield (rows, values) arrays of every row whose value occurs more than once, in row order."""
+        table = self.tables.get(rule.index)
+        if table is None:
+            return
+        reader = self.con.execute(
+            f"SELECT row, v FROM {table} WHERE v IN (SELECT v FROM {table} GROUP BY v HAVING COUNT(*) > 1) ORDER BY row"
+        ).fetch_record_batch(batch_size)
+        for batch in reader:
+            yield batch.column(0).to_numpy(), batch.column(1).to_pylist()
+
+    def close(self) -> None:
+        self.con.close()
+
+
+class ChunkedValidator:
+    """
+    Validate a stream of DataFrame chunks in bounded memory. Unlike
+    ``validate_dataframe`` every rule reports the exact number of failing rows,
+    and failing row indices (0-based file positions) can be written to a
+    Parquet sidecar of ``(rule, row)`` pairs.
+    """
+
+    def __init__(self, plans: List[ColumnPlan], sidecar_path: Optional[Path] = None):
+        self.rules = _expand_rules(plans)
+        self.row_count = 0
+        self._non_null: Dict[str, bool] = {}
+        self._spill_dir = Path(tempfile.mkdtemp(prefix="databotics_validate_"))
+        self._unique = _UniqueTracker(self._spill_dir) if any(r.kind == "unique" for r in self.rules) else None
+        self._sidecar_path = sidecar_path
+        self._writer = None
+
+    def _open_writer(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self._writer is None:
+            schema = pa.schema([("rule", pa.int32()), ("row", pa.int64())])
+            self._writer = pq.ParquetWriter(self._sidecar_path, schema)
+        return self._writer
+
+    def _write(self, rule: _Rule, rows: Any) -> None:
+        if self._sidecar_path is None or not len(rows):
+            return
+        import pyarrow as pa
+        writer = self._open_writer()
+        writer.write_table(pa.table({"rule": pa.array([rule.index] * len(rows), pa.int32()), "row": pa.array(rows, pa.int64())}, schema=writer.schema))
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        offset = self.row_count
+        self.row_count += len(chunk)
+        positions = pd.RangeIndex(offset, offset + len(chunk))
+        for rule in self.rules:
+            col = rule.plan.column
+            if col not in chunk.columns:
                 continue
-        if col not in df.columns:
-            continue
-        series = df[col]
-        # type coercion check
-        typ = cfg.get("type")
-        if typ:
-            try:
-                if typ == "int":
-                    pd.to_numeric(series.dropna().astype(float), downcast="integer")
-                elif typ == "float":
-                    pd.to_numeric(series.dropna(), downcast="float")
-                elif typ == "str":
-                    series.dropna().astype(str)
-            except Exception:
-                errors.append(RuleError(col, f"Type coercion to {typ} failed", row_sample=series.head(3).to_dict()))
-        # range
-        if typ in ("int","float"):
-            mn = cfg.get("min")
-            mx = cfg.get("max")
-            if mn is not None:
-                bad = series.dropna().apply(pd.to_numeric, errors="coerce") < mn
-                if bad.any():
-                    errors.append(RuleError(col, f"Values below min {mn}", row_sample=series[bad].head(3).to_dict()))
-            if mx is not None:
-                bad = series.dropna().apply(pd.to_numeric, errors="coerce") > mx
-                if bad.any():
-                    errors.append(RuleError(col, f"Values above max {mx}", row_sample=series[bad].head(3).to_dict()))
-        # regex
-        if cfg.get("regex"):
-            import re
-            pattern = re.compile(cfg.get("regex"))
-            bad = ~series.dropna().astype(str).apply(lambda v: bool(pattern.match(v)))
-            if bad.any():
-                errors.append(RuleError(col, "Regex mismatch", row_sample=series[bad].head(3).to_dict()))
-        # uniqueness
-        if cfg.get("unique"):
-            dup = series.dropna().duplicated(keep=False)
-            if dup.any():
-                errors.append(RuleError(col, "Duplicate values found", row_sample=series[dup].head(3).to_dict()))
-
-    return {"errors": [e.to_dict() for e in errors], "summary": {"error_count": len(errors)}}
+            series = pd.Series(chunk[col].to_numpy(), index=positions)
+            if rule.kind == "required":
+                self._non_null[col] = self._non_null.get(col, False) or bool(series.notna().any())
+                continue
+            values = series.dropna()
+            if rule.kind == "unique":
+                self._unique.add(rule, values.index.to_numpy(), values)
+                continue
+            bad = self._failing(rule, values)
+            failed = values[bad]
+            rule.record(failed.index, failed.to_numpy())
+            self._write(rule, failed.index.to_numpy())
+
+    @staticmethod
+    def _failing(rule: _Rule, values: pd.Series) -> pd.Series:
+        plan = rule.plan
+        if rule.kind == "regex":
+            return ~_regex_match(values, plan)
+        if rule.kind == "type":
+            if plan.type == "str":
+                return pd.Series(False, index=values.index)
+            return pd.to_numeric(values, errors="coerce").isna()
+        numeric = pd.to_numeric(values, errors="coerce")
+        return numeric < plan.min if rule.kind == "min" else numeric > plan.max
+
+    def finish(self) -> Dict[str, Any]:
+        try:
+            for rule in self.rules:
+                if rule.kind == "required" and not self._non_null.get(rule.plan.column, False):
+                    # column-level failure: no per-row sidecar entries
+                    rule.count = self.row_count
+                elif rule.kind == "unique":
+                    for rows, values in self._unique.duplicates(rule):
+                        rule.record(rows, values)
+                        self._write(rule, rows)
+        finally:
+            if self._unique is not None:
+                self._unique.close()
+            if self._sidecar_path is not None:
+                # always leave a (possibly empty) sidecar behind
+                self._open_writer().close()
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+        failing = [r for r in self.rules if r.count]
+        errors = [
+            dict(RuleError(r.plan.column, r.message, row_sample=r.sample).to_dict(), rule=r.index, count=r.count)
+            for r in failing
+        ]
+        summary = {
+            "error_count": len(errors),
+            "row_count": self.row_count,
+            # row-level failures only; a missing required column is reported once above
+            "violation_count": sum(r.count for r in failing if r.kind != "required"),
+        }
+        return {"errors": errors, "summary": summary}
+
+
+def validate_chunks(chunks: Iterable[pd.DataFrame], rules: Dict[str, Any] | List[ColumnPlan], sidecar_path: Optional[Path] = None) -> Dict[str, Any]:
+    """Chunked counterpart of ``validate_dataframe``; see ``ChunkedValidator``."""
+    plans = compile_rules(rules) if isinstance(rules, dict) else rules
+    validator = ChunkedValidator(plans, sidecar_path=sidecar_path)
+    for chunk in chunks:
+        validator.update(chunk)
+    return validator.finish()
@@ -0,0 +1,116 @@
+"""Benchmark vectorized validate_dataframe against the previous per-cell implementation,
+and inline against pooled per-column execution on a wide ruleset.
+
+    python -m benchmarks.bench_validation [rows] [workers]
+"""
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+import app.validation as validation
+from app.validation import RuleError, load_rules, validate_dataframe
+
+
+def legacy_validate_dataframe(df: pd.DataFrame, rules: Dict[str, Any]) -> Dict[str, Any]:
+    """The element-wise implementation validate_dataframe replaced, kept for comparison."""
+    errors = []
+    for col, cfg in rules.get("columns", {}).items():
+        if cfg.get("required"):
+            if col not in df.columns or df[col].isnull().all():
+                errors.append(RuleError(col, "Missing required column or all values null"))
+                continue
+        if col not in df.columns:
+            continue
+        series = df[col]
+        typ = cfg.get("type")
+        if typ:
+            try:
+                if typ == "int":
+                    pd.to_numeric(series.dropna().astype(float), downcast="integer")
+                elif typ == "float":
+                    pd.to_numeric(series.dropna(), downcast="float")
+                elif typ == "str":
+                    series.dropna().astype(str)
+            except Exception:
+                errors.append(RuleError(col, f"Type coercion to {typ} failed", row_sample=series.head(3).to_dict()))
+        if typ in ("int", "float"):
+            mn = cfg.get("min")
+            mx = cfg.get("max")
+            if mn is not None:
+                bad = series.dropna().apply(pd.to_numeric, errors="coerce") < mn
+                if bad.any():
+                    errors.append(RuleError(col, f"Values below min {mn}", row_sample=series[bad].head(3).to_dict()))
+            if mx is not None:
+                bad = series.dropna().apply(pd.to_numeric, errors="coerce") > mx
+                if bad.any():
+                    errors.append(RuleError(col, f"Values above max {mx}", row_sample=series[bad].head(3).to_dict()))
+        if cfg.get("regex"):
+            pattern = re.compile(cfg.get("regex"))
+            bad = ~series.dropna().astype(str).apply(lambda v: bool(pattern.match(v)))
+            if bad.any():
+                errors.append(RuleError(col, "Regex mismatch", row_sample=series[bad].head(3).to_dict()))
+        if cfg.get("unique"):
+            dup = series.dropna().duplicated(keep=False)
+            if dup.any():
+                errors.append(RuleError(col, "Duplicate values found", row_sample=series[dup].head(3).to_dict()))
+    return {"errors": [e.to_dict() for e in errors], "summary": {"error_count": len(errors)}}
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ids = np.arange(rows)
+    emails = pd.Series([f"user{i}@example.com" for i in ids])
+    emails[rng.random(rows) < 0.01] = "invalid"
+    return pd.DataFrame({
+        "name": [f"name{i}" for i in ids],
+        "age": rng.integers(-5, 130, size=rows),
+        "email": emails,
+    })
+
+
+def _time(fn, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def make_wide(rows: int, columns: int = 32, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    data, rules = {}, {"columns": {}}
+    for i in range(columns // 2):
+        data[f"n{i}"] = rng.integers(-5, 130, size=rows)
+        rules["columns"][f"n{i}"] = {"type": "int", "min": 0, "max": 120}
+        data[f"e{i}"] = [f"user{j}@example.com" for j in range(rows)]
+        rules["columns"][f"e{i}"] = {"regex": r"^[^@\s]+@[^@\s]+\.[^@\s]+$", "unique": True}
+    return pd.DataFrame(data), rules
+
+
+def main(rows: int = 200_000, workers: int = 8) -> None:
+    rules = load_rules("ui/validation_rules/basic.yaml")
+    df = make_frame(rows)
+    assert legacy_validate_dataframe(df, rules)["summary"] == validate_dataframe(df, rules)["summary"]
+    legacy = _time(legacy_validate_dataframe, df, rules, repeat=1)
+    current = _time(validate_dataframe, df, rules)
+    print(f"rows={rows} legacy={legacy:.3f}s vectorized={current:.3f}s speedup={legacy / current:.1f}x")
+
+    wide, wide_rules = make_wide(rows)
+    validation.VALIDATION_WORKERS = 1  # no shared pool: run inline
+    inline = _time(validate_dataframe, wide, wide_rules, repeat=1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pooled = _time(validate_dataframe, wide, wide_rules, pool, repeat=1)
+    print(f"wide columns={wide.shape[1]} inline={inline:.3f}s pool({workers})={pooled:.3f}s speedup={inline / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 8,
+    )
@@ -0,0 +1,9 @@
+"""Warehouse and database connectors.
+
+``base`` holds the shared connection pool, the chunked parallel
+``BulkLoader`` and streaming extraction. Each ``*_conn`` module implements
+them for one database and imports its driver, so import only the one in use.
+"""
+from .base import BulkLoader, ConnectionPool, cursor_batches
+
+__all__ = ["BulkLoader", "ConnectionPool", "cursor_batches"]
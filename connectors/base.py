@@ -0,0 +1,231 @@
+"""Connection pooling, parallel bulk loads and streaming extraction shared by connectors.
+
+A ``BulkLoader`` splits a DataFrame into Parquet chunk files and loads them
+concurrently, each on a connection borrowed from a ``ConnectionPool``. A
+chunk that fails is retried with exponential backoff on a fresh connection.
+The report gives rows, chunks, retries and rows/sec. A connector only has
+to say how to create the target table and how to load one chunk file.
+
+Extraction runs a query on a server-side cursor and yields ``fetchmany``
+batches as Arrow record batches, so a large result is never held whole.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+POOL_SIZE = int(os.getenv("CONNECTOR_POOL_SIZE", "4"))
+LOAD_CHUNK_ROWS = int(os.getenv("LOAD_CHUNK_ROWS", "500000"))
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "4"))
+LOAD_RETRIES = int(os.getenv("LOAD_RETRIES", "3"))
+LOAD_BACKOFF = 0.5  # seconds, doubled per retry
+EXTRACT_BATCH_ROWS = int(os.getenv("EXTRACT_BATCH_ROWS", "50000"))
+
+
+class ConnectionPool:
+    """
+    At most ``max_size`` connections made by ``factory``, reused across
+    calls. A connection whose block raises is closed rather than returned,
+    and idle ones failing ``alive`` are replaced.
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_size: int = POOL_SIZE, alive: Optional[Callable[[Any], bool]] = None):
+        self.factory = factory
+        self.max_size = max_size
+        self.alive = alive
+        self.created = 0
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def _checkout(self) -> Any:
+        while True:
+            try:
+                con = self._idle.get_nowait()
+            except queue.Empty:
+                self.created += 1
+                return self.factory()
+            if self.alive is None or self.alive(con):
+                return con
+            _close(con)
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        self._slots.acquire()
+        try:
+            con = self._checkout()
+            try:
+                yield con
+            except BaseException:
+                _close(con)
+                raise
+            self._idle.put(con)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        while True:
+            try:
+                _close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def _close(con: Any) -> None:
+    try:
+        con.close()
+    except Exception:
+        pass
+
+
+def _inferred_type(array: pa.Array) -> pa.DataType:
+    """Schema type for a column inferred from the first batch. NULL-only and decimal columns become text: their later values may need a type or scale this batch cannot show."""
+    if pa.types.is_null(array.type) or pa.types.is_decimal(array.type):
+        return pa.string()
+    return array.type
+
+
+def cursor_batches(cursor: Any, batch_rows: int = EXTRACT_BATCH_ROWS, types: Optional[Sequence[Optional[pa.DataType]]] = None) -> Iterator[pa.RecordBatch]:
+    """
+    ``fetchmany`` batches of an executed DB-API cursor as record batches.
+    ``types`` gives a column's type up front (see ``BulkLoader.column_types``).
+    The first batch fixes the rest, and columns typed as text get later values
+    stringified. A later value that does not fit raises ValueError.
+    """
+    names = [d[0] for d in cursor.description]
+    declared = list(types or [None] * len(names))
+    schema: Optional[pa.Schema] = None
+    while True:
+        rows = cursor.fetchmany(batch_rows)
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        if schema is None:
+            schema = pa.schema([
+                (n, t if t is not None else _inferred_type(pa.array(col)))
+                for n, t, col in zip(names, declared, columns)
+            ])
+        arrays = []
+        for field, col in zip(schema, columns):
+            if pa.types.is_string(field.type):
+                col = [v if v is None or isinstance(v, str) else str(v) for v in col]
+            try:
+                arrays.append(pa.array(col, type=field.type))
+            except (pa.ArrowInvalid, OverflowError) as e:
+                raise ValueError(f"Column {field.name!r} no longer fits {field.type} fixed by earlier rows ({e}); CAST it in the query") from e
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class BulkLoader(ABC):
+    """
+    Parallel chunked loads of DataFrames into tables. Subclasses implement
+    ``create_table`` and ``load_chunk``; ``retryable`` decides which errors
+    are worth another attempt. ``server_cursor`` enables ``extract``.
+    """
+
+    parquet_options: Dict[str, Any] = {}
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        chunk_rows: int = LOAD_CHUNK_ROWS,
+        workers: int = LOAD_WORKERS,
+        max_retries: int = LOAD_RETRIES,
+        backoff: float = LOAD_BACKOFF,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.pool = pool
+        self.chunk_rows = chunk_rows
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sleep = sleep
+
+    @abstractmethod
+    def create_table(self, con: Any, table: str, schema: pa.Schema) -> None:
+        """Create ``table`` for rows of ``schema`` if it does not exist."""
+
+    @abstractmethod
+    def load_chunk(self, con: Any, table: str, path: Path) -> None:
+        """Append the rows of the Parquet file at ``path`` to ``table``. ``path.parent.name`` is unique to one ``load`` call."""
+
+    def retryable(self, exc: Exception) -> bool:
+        return True
+
+    def server_cursor(self, con: Any) -> ContextManager[Any]:
+        """A cursor that streams results from the server instead of buffering them client-side."""
+        return nullcontext(con.cursor())
+
+    def column_types(self, cursor: Any) -> List[Optional[pa.DataType]]:
+        """Arrow type per result column from the executed ``cursor``'s description; None leaves it to inference."""
+        return [None] * len(cursor.description)
+
+    def extract(self, sql: str, batch_rows: int = EXTRACT_BATCH_ROWS) -> Iterator[pa.RecordBatch]:
+        """Run ``sql`` and yield its result in record batches of at most ``batch_rows`` rows, holding one pooled connection until done."""
+        with self.pool.connection() as con:
+            with self.server_cursor(con) as cur:
+                cur.execute(sql)
+                yield from cursor_batches(cur, batch_rows, self.column_types(cur))
+
+    def _write_chunks(self, df: pd.DataFrame, schema: pa.Schema, directory: Path) -> Iterator[Tuple[int, Path, int]]:
+        for index, start in enumerate(range(0, len(df), self.chunk_rows)):
+            part = df.iloc[start:start + self.chunk_rows]
+            path = directory / f"chunk_{index:05d}.parquet"
+            pq.write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False), path, **self.parquet_options)
+            yield index, path, len(part)
+
+    def _load_with_retry(self, table: str, index: int, path: Path, rows: int) -> Dict[str, Any]:
+        attempt = 0
+        while True:
+            try:
+                with self.pool.connection() as con:
+                    self.load_chunk(con, table, path)
+                path.unlink(missing_ok=True)
+                return {"chunk": index, "rows": rows, "retries": attempt, "error": None}
+            except Exception as e:
+                if attempt >= self.max_retries or not self.retryable(e):
+                    return {"chunk": index, "rows": 0, "retries": attempt, "error": str(e) or type(e).__name__}
+                self.sleep(self.backoff * 2 ** attempt)
+                attempt += 1
+
+    def load(self, df: pd.DataFrame, table: str, create: bool = True) -> Dict[str, Any]:
+        """
+        Load ``df`` into ``table`` and return a report: ``success``, ``rows``
+        loaded, ``chunks``, ``retries``, ``failed_chunks`` (index and error),
+        ``seconds`` and ``rows_per_second``. Chunks are written and submitted
+        one at a time, so loading starts before the last chunk is encoded.
+        """
+        started = time.perf_counter()
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        if create:
+            with self.pool.connection() as con:
+                self.create_table(con, table, schema)
+        with tempfile.TemporaryDirectory(prefix=f"databotics_load_{uuid.uuid4().hex}_") as tmp:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="load") as executor:
+                futures = [
+                    executor.submit(self._load_with_retry, table, index, path, rows)
+                    for index, path, rows in self._write_chunks(df, schema, Path(tmp))
+                ]
+                results: List[Dict[str, Any]] = [f.result() for f in futures]
+        elapsed = time.perf_counter() - started
+        failed = [{"chunk": r["chunk"], "error": r["error"]} for r in results if r["error"]]
+        rows = sum(r["rows"] for r in results)
+        return {
+            "success": not failed,
+            "rows": rows,
+            "chunks": len(results),
+            "retries": sum(r["retries"] for r in results),
+            "failed_chunks": failed,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else None,
+        }
@@ -0,0 +1,42 @@
+"""DuckDB bulk loading: the local implementation of the ``BulkLoader`` contract.
+
+Useful as a local warehouse target and as the stand-in that exercises the
+pooled, chunked, retried load path without a remote service.
+"""
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any
+
+import duckdb
+import pyarrow as pa
+
+from .base import BulkLoader, ConnectionPool, POOL_SIZE
+
+
+def _ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def duckdb_pool(database: str = ":memory:", max_size: int = POOL_SIZE) -> ConnectionPool:
+    """Pool of cursors on one DuckDB database, so every connection sees the same tables."""
+    db = duckdb.connect(database)
+    return ConnectionPool(db.cursor, max_size=max_size)
+
+
+class DuckDBLoader(BulkLoader):
+    def create_table(self, con: Any, table: str, schema: pa.Schema) -> None:
+        con.register("_load_schema", schema.empty_table())
+        try:
+            con.execute(f"CREATE TABLE IF NOT EXISTS {_ident(table)} AS SELECT * FROM _load_schema")
+        finally:
+            con.unregister("_load_schema")
+
+    def load_chunk(self, con: Any, table: str, path: Path) -> None:
+        con.execute(f"INSERT INTO {_ident(table)} BY NAME SELECT * FROM read_parquet(?)", [str(path)])
+
+    def server_cursor(self, con: Any):
+        # DuckDB materializes results lazily; fetchmany pulls chunks as it goes
+        return nullcontext(con)
+
+    def retryable(self, exc: Exception) -> bool:
+        return not isinstance(exc, (duckdb.CatalogException, duckdb.BinderException, duckdb.ParserException))
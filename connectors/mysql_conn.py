@@ -0,0 +1,163 @@
+"""MySQL bulk loading with LOAD DATA LOCAL INFILE and streaming extraction.
+
+Each Parquet chunk is re-encoded, one record batch at a time, as a
+tab-separated file in MySQL's default LOAD DATA format (backslash escapes,
+``\\N`` for NULL) next to it; the client then streams that file to the server
+in packets. Extraction uses an unbuffered ``SSCursor``, so rows are
+read off the socket as they are fetched.
+"""
+import os
+import threading
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pymysql
+import pymysql.cursors
+from pymysql.constants import FIELD_TYPE
+
+from .base import BulkLoader, ConnectionPool
+
+_INTEGER_TYPES = (FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.INT24, FIELD_TYPE.LONG, FIELD_TYPE.LONGLONG, FIELD_TYPE.YEAR)
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"})
+
+
+def mysql_client():
+    return pymysql.connect(
+        host=os.environ.get("MYSQL_HOST", "localhost"),
+        port=int(os.environ.get("MYSQL_PORT", "3306")),
+        user=os.environ["MYSQL_USER"],
+        password=os.environ["MYSQL_PASSWORD"],
+        database=os.environ["MYSQL_DATABASE"],
+        charset="utf8mb4",
+        local_infile=True,
+    )
+
+
+def _ident(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+
+def _mysql_type(t: pa.DataType) -> str:
+    if pa.types.is_boolean(t):
+        return "BOOLEAN"
+    if pa.types.is_integer(t):
+        return "BIGINT"
+    if pa.types.is_floating(t):
+        return "DOUBLE"
+    if pa.types.is_decimal(t):
+        return f"DECIMAL({min(t.precision, 65)},{min(t.scale, 30)})"
+    if pa.types.is_timestamp(t):
+        return "DATETIME(6)"
+    if pa.types.is_date(t):
+        return "DATE"
+    if pa.types.is_time(t):
+        return "TIME(6)"
+    return "LONGTEXT"
+
+
+def _column_type(column: Any) -> Optional[pa.DataType]:
+    type_code, precision, scale = column[1], column[4], column[5]
+    if type_code in (FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL):
+        # the reported precision is the column length, which counts the sign and decimal point besides the digits
+        return pa.decimal128(38, scale) if precision is not None and precision - 2 <= 38 else pa.string()
+    # the description carries no UNSIGNED flag: BIGINT UNSIGNED values past int64 need a CAST in the query
+    if type_code in _INTEGER_TYPES:
+        return pa.int64()
+    if type_code in (FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE):
+        return pa.float64()
+    return None
+
+
+def _tsv_column(s: pd.Series, t: pa.DataType) -> pd.Series:
+    null = s.isna()
+    if pa.types.is_boolean(t):
+        text = s.map({True: "1", False: "0"})
+    elif pd.api.types.is_datetime64_any_dtype(s):
+        text = s.dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+    else:
+        text = s.astype(str).str.translate(_ESCAPES)
+    return text.where(~null, "\\N")
+
+
+def write_tsv(parquet_path: Path, dest: Path) -> None:
+    """Re-encode a Parquet chunk as LOAD DATA's default text format, one record batch at a time."""
+    with open(dest, "w", encoding="utf-8", newline="") as out:
+        for batch in pq.ParquetFile(parquet_path).iter_batches():
+            frame = batch.to_pandas()
+            if frame.empty:
+                continue
+            cols = [_tsv_column(frame[f.name], f.type) for f in batch.schema]
+            lines = cols[0].str.cat(cols[1:], sep="\t") if len(cols) > 1 else cols[0]
+            out.write("\n".join(lines) + "\n")
+
+
+class MySQLLoader(BulkLoader):
+    parquet_options = {"coerce_timestamps": "us", "allow_truncated_timestamps": True}
+
+    def create_table(self, con: Any, table: str, schema: pa.Schema) -> None:
+        cols = ", ".join(f"{_ident(f.name)} {_mysql_type(f.type)}" for f in schema)
+        with con.cursor() as cur:
+            cur.execute(f"CREATE TABLE IF NOT EXISTS {_ident(table)} ({cols}) CHARACTER SET utf8mb4")
+        con.commit()
+
+    def load_chunk(self, con: Any, table: str, path: Path) -> None:
+        tsv = path.with_suffix(".tsv")
+        write_tsv(path, tsv)
+        cols = ", ".join(_ident(name) for name in pq.read_schema(path).names)
+        try:
+            with con.cursor() as cur:
+                cur.execute(
+                    f"LOAD DATA LOCAL INFILE %s INTO TABLE {_ident(table)} CHARACTER SET utf8mb4 "
+                    f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({cols})",
+                    (str(tsv),),
+                )
+            con.commit()
+        finally:
+            tsv.unlink(missing_ok=True)
+
+    def retryable(self, exc: Exception) -> bool:
+        return isinstance(exc, (pymysql.err.OperationalError, pymysql.err.InterfaceError)) or not isinstance(exc, pymysql.err.MySQLError)
+
+    def column_types(self, cursor: Any) -> List[Optional[pa.DataType]]:
+        return [_column_type(column) for column in cursor.description]
+
+    @contextmanager
+    def server_cursor(self, con: Any):
+        """
+        Unbuffered cursor in a read-only transaction, rolled back afterwards so
+        the pooled connection keeps no snapshot. The session is read-only too:
+        statements that commit implicitly (DDL) would otherwise escape it.
+        """
+        con.rollback()
+        with con.cursor() as setup:
+            setup.execute("SET SESSION TRANSACTION READ ONLY")
+            setup.execute("START TRANSACTION READ ONLY")
+        try:
+            with closing(con.cursor(pymysql.cursors.SSCursor)) as cur:
+                yield cur
+        finally:
+            con.rollback()
+            with con.cursor() as setup:
+                setup.execute("SET SESSION TRANSACTION READ WRITE")
+
+
+_loader: Optional[MySQLLoader] = None
+_loader_lock = threading.Lock()
+
+
+def mysql_loader() -> MySQLLoader:
+    """Shared loader whose pool keeps MySQL connections open between calls."""
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            _loader = MySQLLoader(ConnectionPool(mysql_client, alive=lambda con: con.open))
+        return _loader
+
+
+def load_dataframe(df: pd.DataFrame, table: str) -> Dict[str, Any]:
+    """Load ``df`` into ``table`` (created if missing). See ``BulkLoader.load`` for the report."""
+    return mysql_loader().load(df, table)
@@ -0,0 +1,169 @@
+"""PostgreSQL bulk loading with COPY and streaming extraction.
+
+Each Parquet chunk is streamed to ``COPY ... FROM STDIN`` as CSV that is
+encoded batch by batch while the server reads it. Extraction uses a named
+(server-side) cursor, so rows are fetched ``itersize`` at a time rather than
+all at once.
+"""
+import io
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+import psycopg2
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from .base import BulkLoader, ConnectionPool, EXTRACT_BATCH_ROWS
+
+
+def pg_client():
+    return psycopg2.connect(
+        host=os.environ.get("PG_HOST", "localhost"),
+        port=int(os.environ.get("PG_PORT", "5432")),
+        user=os.environ["PG_USER"],
+        password=os.environ["PG_PASSWORD"],
+        dbname=os.environ["PG_DATABASE"],
+    )
+
+
+def _ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _pg_type(t: pa.DataType) -> str:
+    if pa.types.is_boolean(t):
+        return "BOOLEAN"
+    if pa.types.is_integer(t):
+        return "BIGINT"
+    if pa.types.is_floating(t):
+        return "DOUBLE PRECISION"
+    if pa.types.is_decimal(t):
+        return f"NUMERIC({t.precision},{t.scale})"
+    if pa.types.is_timestamp(t):
+        return "TIMESTAMPTZ" if t.tz else "TIMESTAMP"
+    if pa.types.is_date(t):
+        return "DATE"
+    if pa.types.is_time(t):
+        return "TIME"
+    return "TEXT"
+
+
+_NUMERIC_OID = 1700
+# result column type OIDs whose Arrow type is known without looking at values
+_OID_TYPES = {
+    16: pa.bool_(),
+    20: pa.int64(),
+    21: pa.int64(),
+    23: pa.int64(),
+    700: pa.float64(),
+    701: pa.float64(),
+    25: pa.string(),
+    1042: pa.string(),
+    1043: pa.string(),
+}
+
+
+def _column_type(column: Any) -> Optional[pa.DataType]:
+    type_code, precision, scale = column[1], column[4], column[5]
+    if type_code == _NUMERIC_OID:
+        # NUMERIC(p,s) up to 38 digits is exact in decimal128; unconstrained NUMERIC is kept as text
+        if precision is not None and scale is not None and 0 < precision <= 38:
+            return pa.decimal128(precision, scale)
+        return pa.string()
+    return _OID_TYPES.get(type_code)
+
+
+class _CsvStream(io.RawIOBase):
+    """Readable file over the CSV encoding of a Parquet file, produced one record batch at a time as it is read."""
+
+    def __init__(self, path: Path):
+        self._chunks = self._encode(path)
+        self._buffer = b""
+
+    @staticmethod
+    def _encode(path: Path) -> Iterator[bytes]:
+        parquet = pq.ParquetFile(path)
+        sink = io.BytesIO()
+        with pacsv.CSVWriter(sink, parquet.schema_arrow) as writer:
+            for batch in parquet.iter_batches():
+                writer.write_batch(batch)
+                yield sink.getvalue()
+                sink.seek(0)
+                sink.truncate()
+        yield sink.getvalue()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = chunk
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+class PostgresLoader(BulkLoader):
+    parquet_options = {"coerce_timestamps": "us", "allow_truncated_timestamps": True}
+
+    def create_table(self, con: Any, table: str, schema: pa.Schema) -> None:
+        cols = ", ".join(f"{_ident(f.name)} {_pg_type(f.type)}" for f in schema)
+        with con.cursor() as cur:
+            cur.execute(f"CREATE TABLE IF NOT EXISTS {_ident(table)} ({cols})")
+        con.commit()
+
+    def load_chunk(self, con: Any, table: str, path: Path) -> None:
+        cols = ", ".join(_ident(name) for name in pq.read_schema(path).names)
+        with con.cursor() as cur:
+            # quoted empty strings stay '', unquoted empty fields are NULL
+            cur.copy_expert(f"COPY {_ident(table)} ({cols}) FROM STDIN WITH (FORMAT csv, HEADER true)", io.BufferedReader(_CsvStream(path)))
+        con.commit()
+
+    def retryable(self, exc: Exception) -> bool:
+        # connection and server-side failures; bad SQL, types or data fail the same way again
+        return isinstance(exc, (psycopg2.OperationalError, psycopg2.InterfaceError)) or not isinstance(exc, psycopg2.Error)
+
+    def column_types(self, cursor: Any) -> List[Optional[pa.DataType]]:
+        return [_column_type(column) for column in cursor.description]
+
+    @contextmanager
+    def server_cursor(self, con: Any):
+        """Named cursor in a fresh read-only transaction, so extract SQL cannot write; rolled back afterwards."""
+        con.rollback()
+        with con.cursor() as setup:
+            setup.execute("SET TRANSACTION READ ONLY")
+        cur = con.cursor(name=f"databotics_{uuid.uuid4().hex}")
+        cur.itersize = EXTRACT_BATCH_ROWS
+        try:
+            yield cur
+        finally:
+            cur.close()
+            con.rollback()
+
+
+_loader: Optional[PostgresLoader] = None
+_loader_lock = threading.Lock()
+
+
+def postgres_loader() -> PostgresLoader:
+    """Shared loader whose pool keeps PostgreSQL connections open between calls."""
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            _loader = PostgresLoader(ConnectionPool(pg_client, alive=lambda con: not con.closed))
+        return _loader
+
+
+def load_dataframe(df: pd.DataFrame, table: str) -> Dict[str, Any]:
+    """Load ``df`` into ``table`` (created if missing). See ``BulkLoader.load`` for the report."""
+    return postgres_loader().load(df, table)
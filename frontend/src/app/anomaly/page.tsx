@@ -1,7 +1,7 @@
 "use client";
 
 import { useMemo, useState } from "react";
-import { analyzeFile, type AnalyzeResponse } from "../../lib/api";
+import { analyzeBySession, type AnalyzeResponse } from "../../lib/api";
 import { useAppStore } from "../../lib/store";
 import { FileRequiredAlert } from "../../components/shared/file-required-alert";
 import { Button } from "../../components/ui/button";
@@ -10,7 +10,7 @@ import { Input } from "../../components/ui/input";
 import { Label } from "../../components/ui/label";
 
 export default function AnomalyPage() {
-  const { uploadedFile, profile } = useAppStore();
+  const { sessionId, profile } = useAppStore();
   const [timestampCol, setTimestampCol] = useState("");
   const [metricCol, setMetricCol] = useState("");
   const [loading, setLoading] = useState(false);
@@ -19,13 +19,13 @@ export default function AnomalyPage() {
 
   const suggestedCols = useMemo(() => profile?.columns.map((c) => c.name).join(", ") ?? "", [profile]);
 
-  if (!uploadedFile) return <FileRequiredAlert />;
+  if (!sessionId) return <FileRequiredAlert />;
 
   const run = async () => {
     setLoading(true);
     setError(null);
     try {
-      const response = await analyzeFile(uploadedFile, {
+      const response = await analyzeBySession(sessionId, {
         timestamp_col: timestampCol,
         metric_col: metricCol,
         method: "simple",
@@ -1,7 +1,7 @@
 "use client";
 
 import { useState } from "react";
-import { cleanFile } from "../../lib/api";
+import { cleanBySession } from "../../lib/api";
 import { useAppStore } from "../../lib/store";
 import { FileRequiredAlert } from "../../components/shared/file-required-alert";
 import { Button } from "../../components/ui/button";
@@ -10,20 +10,20 @@ import { Label } from "../../components/ui/label";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "../../components/ui/select";
 
 export default function CleanPage() {
-  const { uploadedFile } = useAppStore();
+  const { sessionId } = useAppStore();
   const [trimStrings, setTrimStrings] = useState(true);
   const [dropDuplicates, setDropDuplicates] = useState(false);
   const [normalizeCase, setNormalizeCase] = useState<"none" | "lower" | "upper">("none");
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
-  if (!uploadedFile) return <FileRequiredAlert />;
+  if (!sessionId) return <FileRequiredAlert />;
 
   const runClean = async () => {
     setLoading(true);
     setError(null);
     try {
-      const blob = await cleanFile(uploadedFile, {
+      const blob = await cleanBySession(sessionId, {
         trim_strings: trimStrings,
         drop_duplicates: dropDuplicates,
         normalize_case: normalizeCase === "none" ? undefined : normalizeCase,
@@ -2,7 +2,7 @@
 
 import { useState } from "react";
 import { useAppStore } from "@/lib/store";
-import { queryFile } from "@/lib/api";
+import { queryBySession, type QueryResponse } from "@/lib/api";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { Textarea } from "@/components/ui/textarea";
@@ -13,19 +13,22 @@ import {
 } from "@/components/ui/table";
 import { toast } from "sonner";
 
+const PAGE_SIZE = 200;
+
 export default function QueryPage() {
-  const { uploadedFile } = useAppStore();
+  const { sessionId } = useAppStore();
   const [sql, setSql] = useState("SELECT * FROM loaded_table LIMIT 100;");
-  const [result, setResult] = useState<{ columns: string[]; rows: Record<string, unknown>[]; row_count: number } | null>(null);
+  const [result, setResult] = useState<QueryResponse | null>(null);
   const [loading, setLoading] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
   const run = async () => {
-    if (!uploadedFile) return;
+    if (!sessionId) return;
     setError(null);
     setLoading(true);
     try {
-      const res = await queryFile(uploadedFile, sql);
+      const res = await queryBySession(sessionId, sql, { pageSize: PAGE_SIZE });
       setResult(res);
     } catch (e: unknown) {
       const message = e instanceof Error ? e.message : "Query failed";
@@ -36,7 +39,22 @@ export default function QueryPage() {
     }
   };
 
-  if (!uploadedFile) {
+  const loadMore = async () => {
+    if (!sessionId || !result?.next_page_token) return;
+    setLoadingMore(true);
+    try {
+      const res = await queryBySession(sessionId, sql, { pageSize: PAGE_SIZE, pageToken: result.next_page_token });
+      setResult({ ...res, rows: [...result.rows, ...res.rows], row_count: result.row_count + res.row_count });
+    } catch (e: unknown) {
+      const message = e instanceof Error ? e.message : "Query failed";
+      setError(message);
+      toast.error(message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  if (!sessionId) {
     return <Alert><AlertDescription>Upload a file first.</AlertDescription></Alert>;
   }
 
@@ -69,7 +87,7 @@ export default function QueryPage() {
         <Card>
           <CardHeader>
             <CardTitle className="flex items-center gap-2">
-              Results <Badge>{result.row_count} rows</Badge>
+              Results <Badge>{result.row_count}{result.has_more ? "+" : ""} rows</Badge>
             </CardTitle>
           </CardHeader>
           <CardContent className="overflow-x-auto">
@@ -80,13 +98,18 @@ export default function QueryPage() {
                 </TableRow>
               </TableHeader>
               <TableBody>
-                {result.rows.slice(0, 200).map((row, i) => (
+                {result.rows.map((row, i) => (
                   <TableRow key={i}>
                     {result.columns.map((c) => <TableCell key={c}>{String(row[c] ?? "")}</TableCell>)}
                   </TableRow>
                 ))}
               </TableBody>
             </Table>
+            {result.has_more && (
+              <Button variant="outline" className="mt-4" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? "Loading…" : "Load more"}
+              </Button>
+            )}
           </CardContent>
         </Card>
       )}
@@ -1,7 +1,7 @@
 "use client";
 
 import { useState } from "react";
-import { validateFile } from "../../lib/api";
+import { validateBySession } from "../../lib/api";
 import { useAppStore } from "../../lib/store";
 import { FileRequiredAlert } from "../../components/shared/file-required-alert";
 import { Button } from "../../components/ui/button";
@@ -10,11 +10,11 @@ import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from ".
 import { toast } from "sonner";
 
 export default function ValidatePage() {
-  const { uploadedFile, validation, setValidation } = useAppStore();
+  const { sessionId, validation, setValidation } = useAppStore();
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
-  if (!uploadedFile) {
+  if (!sessionId) {
     return <FileRequiredAlert />;
   }
 
@@ -22,7 +22,7 @@ export default function ValidatePage() {
     setLoading(true);
     setError(null);
     try {
-      const result = await validateFile(uploadedFile);
+      const result = await validateBySession(sessionId);
       setValidation(result);
       toast.success(`Validation complete: ${result.violations.length} violation(s)`);
     } catch (err) {
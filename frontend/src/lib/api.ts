@@ -7,7 +7,11 @@ export interface ColumnStats {
   type: string;
   null_count: number;
   null_pct: number;
+  distinct_count?: number | null;
+  top_values?: Array<{ value: unknown; count: number }> | null;
   stats?: Record<string, number | null> | null;
+  histogram?: { bin_edges: number[]; counts: number[] } | null;
+  approximate?: string[] | null;
 }
 
 export interface ProfileResponse {
@@ -17,6 +21,8 @@ export interface ProfileResponse {
   columns: ColumnStats[];
   sample_rows: Record<string, unknown>[];
   warnings: string[];
+  approximate: boolean;
+  error_bounds?: Record<string, number> | null;
 }
 
 export interface ValidationViolation {
@@ -37,6 +43,13 @@ export interface QueryResponse {
   columns: string[];
   rows: Record<string, unknown>[];
   row_count: number;
+  has_more: boolean;
+  next_page_token?: string | null;
+}
+
+export interface QueryPageOptions {
+  pageSize?: number;
+  pageToken?: string | null;
 }
 
 export interface GenerateSqlRequest {
@@ -56,11 +69,16 @@ export interface AnalyzeRequest {
   timestamp_col: string;
   metric_col: string;
   dimension_cols?: string[];
-  method?: string;
+  method?: "simple" | "zscore" | "rolling_zscore" | "rolling_mad" | "rolling_iqr" | "seasonal";
+  threshold?: number;
+  window?: number;
+  period?: number;
+  layout?: "records" | "columnar";
 }
 
 export interface AnalyzeResponse {
   anomalies: Array<Record<string, unknown>>;
+  columns?: Record<string, unknown[]> | null;
   summary: Record<string, unknown>;
   narrative: string;
 }
@@ -69,6 +87,10 @@ export interface CleanOptions {
   trim_strings: boolean;
   normalize_case?: "lower" | "upper";
   drop_duplicates: boolean;
+  collapse_whitespace?: boolean;
+  normalize_nulls?: boolean;
+  format?: "parquet" | "csv" | "arrow";
+  compression?: "snappy" | "zstd" | "gzip" | "lz4" | "none";
 }
 
 function withAuthHeaders(init?: RequestInit): RequestInit {
@@ -96,10 +118,56 @@ async function fetchJson<T>(input: RequestInfo | URL, init?: RequestInit): Promi
   return response.json() as Promise<T>;
 }
 
+export interface JobStatus {
+  job_id: string;
+  kind: string;
+  status: "queued" | "running" | "succeeded" | "failed" | "cancelled";
+  progress: number;
+  error?: string | null;
+}
+
+const JOB_POLL_MS = 500;
+
+async function fetchJobResult<T>(input: RequestInfo | URL, init?: RequestInit, onProgress?: (job: JobStatus) => void): Promise<T> {
+  const response = await fetch(input, withAuthHeaders(init));
+  handleUnauthorized(response);
+  if (!response.ok) {
+    const text = await response.text();
+    throw new Error(text || `Request failed: ${response.status}`);
+  }
+  if (response.status !== 202) {
+    return response.json() as Promise<T>;
+  }
+  let job = (await response.json()) as JobStatus;
+  while (job.status === "queued" || job.status === "running") {
+    onProgress?.(job);
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_MS));
+    job = await fetchJson<JobStatus>(`${API_BASE_URL}/jobs/${job.job_id}`);
+  }
+  if (job.status !== "succeeded") {
+    throw new Error(job.error || `Job ${job.status}`);
+  }
+  return fetchJson<T>(`${API_BASE_URL}/jobs/${job.job_id}/result`);
+}
+
+export async function cancelJob(jobId: string): Promise<JobStatus> {
+  return fetchJson<JobStatus>(`${API_BASE_URL}/jobs/${jobId}`, { method: "DELETE" });
+}
+
+export interface SheetInfo {
+  name: string;
+  row_count: number;
+  column_count: number;
+  parse_seconds: number;
+}
+
 export interface UploadResponse {
   session_id: string;
   filename: string;
   size: number;
+  sha256: string;
+  row_count?: number;
+  sheets?: SheetInfo[];
 }
 
 export async function uploadFile(file: File): Promise<UploadResponse> {
@@ -111,8 +179,9 @@ export async function uploadFile(file: File): Promise<UploadResponse> {
   });
 }
 
-export async function profileBySession(sessionId: string): Promise<ProfileResponse> {
-  return fetchJson<ProfileResponse>(`${API_BASE_URL}/profile/${sessionId}`, {
+export async function profileBySession(sessionId: string, sheet?: string): Promise<ProfileResponse> {
+  const query = sheet ? `?sheet=${encodeURIComponent(sheet)}` : "";
+  return fetchJobResult<ProfileResponse>(`${API_BASE_URL}/profile/${sessionId}${query}`, {
     method: "POST",
   });
 }
@@ -136,6 +205,22 @@ export async function validateFile(file: File, rulesPath?: string): Promise<Vali
   });
 }
 
+export interface RulesetSelector {
+  rulesPath?: string;
+  rulesetId?: string;
+}
+
+export async function validateBySession(sessionId: string, ruleset: RulesetSelector = {}): Promise<ValidateResponse> {
+  const params = new URLSearchParams();
+  if (ruleset.rulesetId) params.set("ruleset_id", ruleset.rulesetId);
+  else if (ruleset.rulesPath) params.set("rules_path", ruleset.rulesPath);
+  const qs = params.toString();
+  const query = qs ? `?${qs}` : "";
+  return fetchJobResult<ValidateResponse>(`${API_BASE_URL}/validate/${sessionId}${query}`, {
+    method: "POST",
+  });
+}
+
 export async function queryFile(file: File, sql: string): Promise<QueryResponse> {
   const formData = new FormData();
   formData.append("file", file);
@@ -146,9 +231,16 @@ export async function queryFile(file: File, sql: string): Promise<QueryResponse>
   });
 }
 
-export async function cleanFile(file: File, options: CleanOptions): Promise<Blob> {
-  const formData = new FormData();
-  formData.append("file", file);
+export async function queryBySession(sessionId: string, sql: string, page: QueryPageOptions = {}): Promise<QueryResponse> {
+  const params = new URLSearchParams({ sql });
+  if (page.pageSize) params.set("page_size", String(page.pageSize));
+  if (page.pageToken) params.set("page_token", page.pageToken);
+  return fetchJson<QueryResponse>(`${API_BASE_URL}/query/${sessionId}?${params.toString()}`, {
+    method: "POST",
+  });
+}
+
+function cleanParams(options: CleanOptions): URLSearchParams {
   const params = new URLSearchParams({
     trim_strings: String(options.trim_strings),
     drop_duplicates: String(options.drop_duplicates),
@@ -156,40 +248,75 @@ export async function cleanFile(file: File, options: CleanOptions): Promise<Blob
   if (options.normalize_case) {
     params.set("normalize_case", options.normalize_case);
   }
+  if (options.collapse_whitespace) params.set("collapse_whitespace", "true");
+  if (options.normalize_nulls) params.set("normalize_nulls", "true");
+  if (options.format) params.set("format", options.format);
+  if (options.compression) params.set("compression", options.compression);
+  return params;
+}
 
-  const response = await fetch(
-    `${API_BASE_URL}/clean?${params.toString()}`,
-    withAuthHeaders({
-      method: "POST",
-      body: formData,
-    }),
-  );
-
+async function fetchBlob(input: RequestInfo | URL, init?: RequestInit): Promise<Blob> {
+  const response = await fetch(input, withAuthHeaders(init));
   handleUnauthorized(response);
   if (!response.ok) {
     const text = await response.text();
     throw new Error(text || `Request failed: ${response.status}`);
   }
-
   return response.blob();
 }
 
-export async function analyzeFile(file: File, payload: AnalyzeRequest): Promise<AnalyzeResponse> {
+export async function cleanFile(file: File, options: CleanOptions): Promise<Blob> {
   const formData = new FormData();
   formData.append("file", file);
+  return fetchBlob(`${API_BASE_URL}/clean?${cleanParams(options).toString()}`, {
+    method: "POST",
+    body: formData,
+  });
+}
+
+export async function cleanBySession(sessionId: string, options: CleanOptions): Promise<Blob> {
+  return fetchBlob(`${API_BASE_URL}/clean/${sessionId}?${cleanParams(options).toString()}`, {
+    method: "POST",
+  });
+}
+
+export async function cleanToSession(sessionId: string, options: CleanOptions): Promise<UploadResponse> {
+  const params = cleanParams(options);
+  params.set("save_as_session", "true");
+  return fetchJson<UploadResponse>(`${API_BASE_URL}/clean/${sessionId}?${params.toString()}`, {
+    method: "POST",
+  });
+}
+
+function analyzeParams(payload: AnalyzeRequest): URLSearchParams {
   const params = new URLSearchParams({
     timestamp_col: payload.timestamp_col,
     metric_col: payload.metric_col,
   });
   if (payload.method) params.set("method", payload.method);
   if (payload.dimension_cols?.length) params.set("dimension_cols", payload.dimension_cols.join(","));
+  if (payload.threshold !== undefined) params.set("threshold", String(payload.threshold));
+  if (payload.window !== undefined) params.set("window", String(payload.window));
+  if (payload.period !== undefined) params.set("period", String(payload.period));
+  if (payload.layout) params.set("layout", payload.layout);
+  return params;
+}
 
-  return fetchJson<AnalyzeResponse>(`${API_BASE_URL}/analyze?${params.toString()}`, {
+export async function analyzeFile(file: File, payload: AnalyzeRequest): Promise<AnalyzeResponse> {
+  const formData = new FormData();
+  formData.append("file", file);
+  return fetchJson<AnalyzeResponse>(`${API_BASE_URL}/analyze?${analyzeParams(payload).toString()}`, {
     method: "POST",
     body: formData,
   });
 }
 
+export async function analyzeBySession(sessionId: string, payload: AnalyzeRequest): Promise<AnalyzeResponse> {
+  return fetchJobResult<AnalyzeResponse>(`${API_BASE_URL}/analyze/${sessionId}?${analyzeParams(payload).toString()}`, {
+    method: "POST",
+  });
+}
+
 export async function generateSql(payload: GenerateSqlRequest): Promise<GenerateSqlResponse> {
   return fetchJson<GenerateSqlResponse>(`${API_BASE_URL}/generate_sql`, {
     method: "POST",
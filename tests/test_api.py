@@ -52,6 +52,91 @@ def test_upload_size_limit():
     assert resp.status_code == 413
 
 
+def test_spool_upload_enforces_limit_mid_stream(tmp_path):
+    import asyncio
+    import pytest
+    from fastapi import UploadFile
+    from app.storage import spool_upload, UploadTooLarge
+
+    dest = tmp_path / "spooled.csv"
+    upload = UploadFile(file=io.BytesIO(b"x" * 100), filename="x.csv")
+    with pytest.raises(UploadTooLarge) as exc:
+        asyncio.run(spool_upload(upload, dest, max_size=50))
+    assert exc.value.max_size == 50
+    assert str(exc.value) == "Upload too large. Max size is 50 bytes."
+    assert str(UploadTooLarge(1536)) == "Upload too large. Max size is 1.5KB."
+    assert str(UploadTooLarge(50 * 1024 * 1024)) == "Upload too large. Max size is 50MB."
+    assert not dest.exists()
+
+
+def test_upload_limit_mid_stream_is_413(monkeypatch):
+    import app.api as api
+    # skip the content-length precheck so the limit trips while spooling
+    monkeypatch.setattr(api, "MAX_UPLOAD_SIZE", 50)
+    app.dependency_overrides[api.enforce_upload_size] = lambda: None
+    try:
+        resp = client.post("/upload", files=[_upload(b"x" * 100, "big.csv")], headers=AUTH_HEADERS)
+    finally:
+        app.dependency_overrides.clear()
+    assert resp.status_code == 413
+    assert resp.json()["detail"] == "Upload too large. Max size is 50 bytes."
+
+
+def test_upload_reports_content_hash():
+    import hashlib
+    resp = client.post("/upload", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["size"] == len(SAMPLE_CSV)
+    assert body["sha256"] == hashlib.sha256(SAMPLE_CSV).hexdigest()
+
+
+def test_verified_tokens_are_cached():
+    from app.auth import token_cache
+    token_cache.clear()
+    hits = token_cache.hits
+    for _ in range(3):
+        assert client.post("/upload", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS).status_code == 200
+    assert token_cache.hits - hits == 2
+    bad = {"Authorization": AUTH_HEADERS["Authorization"] + "x"}
+    assert client.post("/upload", files=[_upload(SAMPLE_CSV)], headers=bad).status_code == 401
+
+
+def test_token_cache_entry_capped_at_exp():
+    from app.auth import TokenCache, User
+    now = [1000.0]
+    cache = TokenCache(max_entries=2, ttl=300, clock=lambda: now[0])
+    cache.put("a", User(username="a"), exp=1010)
+    cache.put("b", User(username="b"), exp=None)
+    assert cache.get("a").username == "a"
+    now[0] = 1011
+    assert cache.get("a") is None and cache.get("b") is not None
+    cache.put("c", User(username="c"), exp=None)
+    cache.put("d", User(username="d"), exp=None)
+    assert cache.get("b") is None and len(cache) == 2
+
+
+def test_password_hashing_does_not_block_event_loop():
+    import asyncio
+    from app.auth import authenticate_user
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+        t = asyncio.create_task(ticker())
+        users = await asyncio.gather(*(authenticate_user("admin", "databotics") for _ in range(4)))
+        t.cancel()
+        return users, ticks
+    users, ticks = asyncio.run(run())
+    assert all(u and u.username == "admin" for u in users)
+    assert ticks > 4
+
+
 # ---- /profile ----
 
 class TestProfile:
@@ -80,6 +165,70 @@ class TestProfile:
         assert age_col["stats"]["min"] == -5.0
         assert age_col["stats"]["max"] == 30.0
 
+    def test_profile_extended_stats(self):
+        resp = client.post("/profile", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS)
+        cols = {c["name"]: c for c in resp.json()["columns"]}
+        age = cols["age"]
+        assert age["distinct_count"] == 3
+        assert age["stats"]["p50"] == 25.0
+        assert sum(age["histogram"]["counts"]) == 3
+        assert len(age["histogram"]["bin_edges"]) == len(age["histogram"]["counts"]) + 1
+        assert cols["name"]["stats"] is None
+        assert cols["name"]["top_values"][0] == {"value": "Alice", "count": 1}
+
+    def test_profile_nulls_are_json_safe(self):
+        data = b"a,b\n1,\n,x\n3,x\n"
+        resp = client.post("/profile", files=[_upload(data)], headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["sample_rows"][1]["a"] is None
+        b = [c for c in body["columns"] if c["name"] == "b"][0]
+        assert b["top_values"] == [{"value": "x", "count": 2}]
+
+    def test_profile_approximate(self):
+        resp = client.post("/profile?approximate=true", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["approximate"] is True
+        assert body["row_count"] == 3
+        assert set(body["error_bounds"]) == {"distinct_count_rel_error", "quantile_rank_error"}
+        age = [c for c in body["columns"] if c["name"] == "age"][0]
+        assert age["stats"]["min"] == -5.0
+        assert age["distinct_count"] == 3
+        assert "stats.p50" in age["approximate"]
+        assert len(body["sample_rows"]) == 3
+
+    def test_profile_large_file_switches_to_sketches(self, monkeypatch):
+        import app.api as api
+        monkeypatch.setattr(api, "EXACT_PROFILE_MAX_BYTES", 10)
+        resp = client.post("/profile", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        assert resp.json()["approximate"] is True
+
+    def test_profile_header_only(self):
+        import pandas as pd
+        buf = io.BytesIO()
+        pd.DataFrame({"age": pd.Series([], dtype="int64"), "name": pd.Series([], dtype="str")}).to_parquet(buf)
+        for data, name in ((buf.getvalue(), "empty.parquet"), (b"age,name\n", "empty.csv")):
+            resp = client.post("/profile", files=[_upload(data, name, "application/octet-stream")], headers=AUTH_HEADERS)
+            assert resp.status_code == 200, name
+            body = resp.json()
+            assert body["row_count"] == 0
+            age = [c for c in body["columns"] if c["name"] == "age"][0]
+            assert age["histogram"] is None
+            assert age["stats"] is None or set(age["stats"].values()) == {None}
+
+    def test_profile_nested_json(self):
+        data = b'[{"id": 1, "tags": ["a", "b"], "meta": {"k": 1}}, {"id": 2, "tags": ["a", "b"], "meta": {"k": 2}}, {"id": 3, "tags": [], "meta": null}]'
+        for query in ("", "?approximate=true"):
+            resp = client.post(f"/profile{query}", files=[_upload(data, "nested.json", "application/json")], headers=AUTH_HEADERS)
+            assert resp.status_code == 200, query
+            cols = {c["name"]: c for c in resp.json()["columns"]}
+            assert cols["meta"]["null_count"] == 1
+            if not query:
+                assert cols["tags"]["distinct_count"] == 2
+                assert cols["tags"]["top_values"][0] == {"value": '["a", "b"]', "count": 2}
+
     def test_profile_empty_file(self):
         resp = client.post("/profile", files=[_upload(b"", "empty.csv", "text/csv")], headers=AUTH_HEADERS)
         assert resp.status_code == 400
@@ -112,6 +261,32 @@ class TestValidate:
         msgs = [v["message"] for v in body["violations"]]
         assert any("required" in m.lower() or "missing" in m.lower() for m in msgs)
 
+    def test_validate_reports_ruleset_id(self):
+        resp = client.post("/validate", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS)
+        ruleset_id = resp.json()["ruleset_id"]
+        assert ruleset_id
+        again = client.post(f"/validate?ruleset_id={ruleset_id}", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS)
+        assert again.status_code == 200
+        assert again.json()["violations"] == resp.json()["violations"]
+
+    def test_register_and_validate_by_ruleset_id(self):
+        rules = {"columns": {"age": {"type": "int", "max": 26}}}
+        reg = client.post("/rulesets", json=rules, headers=AUTH_HEADERS)
+        assert reg.status_code == 200
+        ruleset_id = reg.json()["ruleset_id"]
+        assert client.get(f"/rulesets/{ruleset_id}", headers=AUTH_HEADERS).json()["rules"] == rules
+        resp = client.post(f"/validate?ruleset_id={ruleset_id}", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS)
+        msgs = [v["message"] for v in resp.json()["violations"]]
+        assert msgs == ["Values above max 26"]
+
+    def test_invalid_ruleset_rejected(self):
+        resp = client.post("/rulesets", json={"columns": {"a": {"regex": "("}}}, headers=AUTH_HEADERS)
+        assert resp.status_code == 400
+
+    def test_unknown_ruleset_id(self):
+        resp = client.post("/validate?ruleset_id=nope", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS)
+        assert resp.status_code == 404
+
 
 # ---- /clean ----
 
@@ -132,6 +307,44 @@ class TestClean:
         resp = client.post("/clean?trim_strings=false&drop_duplicates=false&normalize_case=lower", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS)
         assert resp.status_code == 200
 
+    def test_clean_combined_operations(self):
+        import pandas as pd
+        messy = b"name,note,age\n  Alice   Smith ,N/A,30\n BOB ,  two   words ,25\n"
+        resp = client.post("/clean?normalize_case=lower&collapse_whitespace=true&normalize_nulls=true", files=[_upload(messy)], headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        df = pd.read_parquet(io.BytesIO(resp.content))
+        assert df["name"].tolist() == ["alice smith", "bob"]
+        assert df["note"].isna().tolist() == [True, False]
+        assert df["note"][1] == "two words"
+        assert df["age"].tolist() == [30, 25]
+
+    def test_clean_output_formats(self):
+        import gzip
+        import pandas as pd
+        import pyarrow as pa
+        messy = b"name,age\n  Alice  ,30\n Bob ,25\n"
+        resp = client.post("/clean?format=csv&compression=gzip", files=[_upload(messy)], headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/csv")
+        assert pd.read_csv(io.BytesIO(gzip.decompress(resp.content)))["name"].tolist() == ["Alice", "Bob"]
+        resp = client.post("/clean?format=arrow&compression=zstd", files=[_upload(messy)], headers=AUTH_HEADERS)
+        assert pa.ipc.open_stream(resp.content).read_all().column("name").to_pylist() == ["Alice", "Bob"]
+        resp = client.post("/clean?compression=zstd", files=[_upload(messy)], headers=AUTH_HEADERS)
+        assert pd.read_parquet(io.BytesIO(resp.content))["age"].tolist() == [30, 25]
+
+    def test_clean_rejects_unknown_format(self):
+        for query in ("format=xml", "format=csv&compression=zstd"):
+            resp = client.post(f"/clean?{query}", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS)
+            assert resp.status_code == 400
+
+    def test_clean_mixed_object_column(self):
+        import pandas as pd
+        from app.cleaning import clean_dataframe
+        df = pd.DataFrame({"v": pd.Series([" a ", 1, None, " B "], dtype=object)})
+        out = clean_dataframe(df, ["trim", "lower"])
+        assert out["v"].tolist()[:2] == ["a", 1] and out["v"][3] == "b"
+        assert df["v"][0] == " a "
+
 
 # ---- /generate_sql ----
 
@@ -188,6 +401,56 @@ class TestAnalyze:
         values = [a["value"] for a in body["anomalies"]]
         assert 1000.0 in values
 
+    @staticmethod
+    def _grouped_csv() -> bytes:
+        import numpy as np
+        import pandas as pd
+        rng = np.random.default_rng(0)
+        frames = []
+        for store, sku, level in (("s1", "a", 10.0), ("s1", "b", 500.0), ("s2", "a", 50.0)):
+            v = level + rng.normal(0, 1, 60) + 2 * np.sin(np.arange(60) * 2 * np.pi / 7)
+            if sku == "a":
+                v[40] += 25
+            frames.append(pd.DataFrame({"timestamp": pd.date_range("2024-01-01", periods=60), "store": store, "sku": sku, "value": v}))
+        return pd.concat(frames).sample(frac=1, random_state=0).to_csv(index=False).encode()
+
+    def test_analyze_methods_per_series(self):
+        data = self._grouped_csv()
+        for method in ("rolling_zscore", "rolling_mad", "rolling_iqr", "seasonal"):
+            resp = client.post(
+                f"/analyze?metric_col=value&dimension_cols=store,sku&method={method}",
+                files=[_upload(data)],
+                headers=AUTH_HEADERS,
+            )
+            assert resp.status_code == 200, method
+            body = resp.json()
+            assert body["summary"]["method_used"] == method
+            assert body["summary"]["series_count"] == 3
+            hits = {(a["store"], a["sku"], a["timestamp"][:10]) for a in body["anomalies"]}
+            assert {("s1", "a", "2024-02-10"), ("s2", "a", "2024-02-10")} <= hits, method
+
+    def test_analyze_columnar_layout(self):
+        resp = client.post(
+            "/analyze?metric_col=value&dimension_cols=store,sku&method=rolling_mad&layout=columnar",
+            files=[_upload(self._grouped_csv())],
+            headers=AUTH_HEADERS,
+        )
+        body = resp.json()
+        assert body["anomalies"] == []
+        cols = body["columns"]
+        assert set(cols) == {"store", "sku", "timestamp", "value", "score"}
+        assert len(cols["score"]) == body["summary"]["count"]
+
+    def test_analyze_bad_arguments(self):
+        for query in ("method=nope", "metric_col=missing", "dimension_cols=missing"):
+            resp = client.post(f"/analyze?{query}", files=[_upload(TS_CSV)], headers=AUTH_HEADERS)
+            assert resp.status_code == 400, query
+
+    def test_analyze_missing_column_detail(self):
+        resp = client.post("/analyze?metric_col=missing", files=[_upload(TS_CSV)], headers=AUTH_HEADERS)
+        assert resp.status_code == 400
+        assert resp.json()["detail"] == "Column(s) not found: missing"
+
 
 # ---- /query ----
 
@@ -213,6 +476,14 @@ class TestQuery:
         body = resp.json()
         assert body["rows"][0]["cnt"] == 3
 
+    def test_query_upload_returns_rows_past_page_size(self):
+        data = b"n\n" + b"".join(f"{i}\n".encode() for i in range(2500))
+        resp = client.post("/query?sql=SELECT+*+FROM+loaded_table", files=[_upload(data)], headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["row_count"] == 2500 and len(body["rows"]) == 2500
+        assert body["has_more"] is False and body["next_page_token"] is None
+
     def test_query_bad_sql(self):
         resp = client.post(
             "/query?sql=INVALID+SQL+GARBAGE",
@@ -220,3 +491,416 @@ class TestQuery:
             headers=AUTH_HEADERS,
         )
         assert resp.status_code == 400
+
+
+# ---- sessions ----
+
+class TestSession:
+    def test_upload_writes_columnar_artifact(self):
+        from app.api import _session_store
+        from app.storage import artifact_path, read_manifest
+        resp = client.post("/upload", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["row_count"] == 3
+        raw = _session_store.get(body["session_id"])
+        assert artifact_path(raw).exists()
+        manifest = read_manifest(raw)
+        assert [c["name"] for c in manifest["columns"]] == ["name", "age", "email"]
+
+    def test_upload_sniffs_ndjson_regardless_of_filename(self):
+        data = b'{"name": "Alice", "age": 30}\n{"name": "Bob", "age": 25}\n'
+        body = client.post("/upload", files=[_upload(data, "data.csv")], headers=AUTH_HEADERS).json()
+        assert body["row_count"] == 2
+        resp = client.post(f"/query/{body['session_id']}?sql=SELECT+SUM(age)+AS+total+FROM+loaded_table", headers=AUTH_HEADERS)
+        assert resp.json()["rows"][0]["total"] == 55
+
+    def test_workbook_one_off_and_extensionless_uploads(self):
+        import pandas as pd
+        buf = io.BytesIO()
+        pd.DataFrame({"name": ["Alice", "Bob"], "age": [30, 25]}).to_excel(buf, index=False)
+        data = buf.getvalue()
+        # one-off endpoints spool to an extensionless temp file
+        resp = client.post("/profile", files=[_upload(data, "book.xlsx", "application/octet-stream")], headers=AUTH_HEADERS)
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["row_count"] == 2
+        resp = client.post("/query?sql=SELECT+SUM(age)+AS+total+FROM+loaded_table", files=[_upload(data, "book.xlsx", "application/octet-stream")], headers=AUTH_HEADERS)
+        assert resp.json()["rows"][0]["total"] == 55
+        body = client.post("/upload", files=[_upload(data, "book", "application/octet-stream")], headers=AUTH_HEADERS).json()
+        assert body["row_count"] == 2
+
+    def test_workbook_sheets_are_separate_tables(self):
+        import pandas as pd
+        from app.api import _session_store
+        from app.storage import dataset_files
+        buf = io.BytesIO()
+        with pd.ExcelWriter(buf) as writer:
+            pd.DataFrame({"sku": ["a", "b", "c"], "qty": [1, 2, 3]}).to_excel(writer, sheet_name="Orders", index=False)
+            pd.DataFrame({"sku": ["a", "b"], "price": [10.0, 20.0]}).to_excel(writer, sheet_name="Prices", index=False)
+        body = client.post("/upload", files=[_upload(buf.getvalue(), "book.xlsx", "application/octet-stream")], headers=AUTH_HEADERS).json()
+        session_id = body["session_id"]
+        assert [(s["name"], s["row_count"]) for s in body["sheets"]] == [("Orders", 3), ("Prices", 2)]
+        assert all("parse_seconds" in s for s in body["sheets"])
+
+        profile = client.post(f"/profile/{session_id}?sheet=Prices", headers=AUTH_HEADERS).json()
+        assert profile["row_count"] == 2
+        assert [c["name"] for c in profile["columns"]] == ["sku", "price"]
+        assert client.post(f"/profile/{session_id}?sheet=Nope", headers=AUTH_HEADERS).status_code == 404
+
+        sql = 'SELECT SUM(qty * price) AS total FROM "Orders" JOIN "Prices" USING (sku)'
+        resp = client.post(f"/query/{session_id}", params={"sql": sql}, headers=AUTH_HEADERS)
+        assert resp.json()["rows"][0]["total"] == 50.0
+
+        files = dataset_files(_session_store.get(session_id))
+        assert client.delete(f"/session/{session_id}", headers=AUTH_HEADERS).status_code == 204
+        assert not any(f.exists() for f in files)
+
+    def test_workbook_sheets_stay_tables_when_first_sheet_is_not_columnar(self):
+        import pandas as pd
+        buf = io.BytesIO()
+        with pd.ExcelWriter(buf) as writer:
+            pd.DataFrame({"sku": ["a", "b"], "note": [1, "x"]}).to_excel(writer, sheet_name="Orders", index=False)
+            pd.DataFrame({"sku": ["a", "b"], "price": [10.0, 20.0]}).to_excel(writer, sheet_name="Prices", index=False)
+        body = client.post("/upload", files=[_upload(buf.getvalue(), "book.xlsx", "application/octet-stream")], headers=AUTH_HEADERS).json()
+        assert [s["name"] for s in body["sheets"]] == ["Orders", "Prices"]
+        sql = 'SELECT SUM(price) AS total FROM "Orders" JOIN "Prices" USING (sku)'
+        resp = client.post(f"/query/{body['session_id']}", params={"sql": sql}, headers=AUTH_HEADERS)
+        assert resp.status_code == 200 and resp.json()["rows"][0]["total"] == 30.0
+
+    def test_delete_session_removes_files(self):
+        from app.api import _session_store
+        from app.storage import dataset_files
+        session_id = client.post("/upload", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS).json()["session_id"]
+        files = dataset_files(_session_store.get(session_id))
+        assert client.delete(f"/session/{session_id}", headers=AUTH_HEADERS).status_code == 204
+        assert not any(f.exists() for f in files)
+        assert client.get(f"/session/{session_id}", headers=AUTH_HEADERS).status_code == 404
+        assert client.delete(f"/session/{session_id}", headers=AUTH_HEADERS).status_code == 404
+
+    def test_session_profile_does_not_reparse(self, monkeypatch):
+        import app.api as api
+        resp = client.post("/upload", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS)
+        session_id = resp.json()["session_id"]
+
+        def _fail(_contents):
+            raise AssertionError("raw upload re-parsed")
+
+        monkeypatch.setattr(api, "_read_table_from_upload", _fail)
+        resp = client.post(f"/profile/{session_id}", headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["row_count"] == 3
+        age_col = [c for c in body["columns"] if c["name"] == "age"][0]
+        assert age_col["stats"]["min"] == -5.0
+
+    def test_get_session_reports_schema(self):
+        resp = client.post("/upload", files=[_upload(SAMPLE_CSV)], headers=AUTH_HEADERS)
+        session_id = resp.json()["session_id"]
+        resp = client.get(f"/session/{session_id}", headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        assert set(resp.json()["schema"]) == {"name", "age", "email"}
+
+    def test_unknown_session(self):
+        resp = client.post("/profile/doesnotexist", headers=AUTH_HEADERS)
+        assert resp.status_code == 404
+
+    def _session(self, data: bytes = SAMPLE_CSV) -> str:
+        resp = client.post("/upload", files=[_upload(data)], headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        return resp.json()["session_id"]
+
+    def test_validate_by_session(self):
+        session_id = self._session()
+        resp = client.post(f"/validate/{session_id}", headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["dataset_id"] == session_id
+        assert len(body["violations"]) >= 2
+
+    def test_validate_by_session_chunked(self):
+        import pandas as pd
+        session_id = self._session()
+        resp = client.post(f"/validate/{session_id}?chunked=true", headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["summary"]["row_count"] == 3
+        counts = {v["message"]: v["count"] for v in body["violations"]}
+        assert counts == {"Values below min 0": 1, "Regex mismatch": 1}
+        sidecar = client.get(f"/validate/{session_id}/violations", headers=AUTH_HEADERS)
+        assert sidecar.status_code == 200
+        rows = pd.read_parquet(io.BytesIO(sidecar.content))
+        assert rows["row"].tolist() == [2, 2]
+
+    def test_violations_require_chunked_run(self):
+        session_id = self._session()
+        resp = client.get(f"/validate/{session_id}/violations", headers=AUTH_HEADERS)
+        assert resp.status_code == 404
+
+    def test_query_by_session(self):
+        session_id = self._session()
+        resp = client.post(f"/query/{session_id}?sql=SELECT+COUNT(*)+as+cnt+FROM+loaded_table", headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        assert resp.json()["rows"][0]["cnt"] == 3
+
+    def test_clean_by_session(self):
+        session_id = self._session(b"name,age\n  Alice  ,30\n Bob ,25\n")
+        resp = client.post(f"/clean/{session_id}?trim_strings=true", headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        assert len(resp.content) > 0
+
+    def test_clean_to_new_session(self):
+        session_id = self._session(b"name,age\n  Alice  ,30\n Bob ,25\n Bob ,25\n")
+        resp = client.post(f"/clean/{session_id}?drop_duplicates=true&save_as_session=true", headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["session_id"] != session_id and body["row_count"] == 2
+        assert body["filename"].endswith(".parquet")
+        q = client.post(f"/query/{body['session_id']}?sql=SELECT+name+FROM+loaded_table+ORDER+BY+name", headers=AUTH_HEADERS)
+        assert [r["name"] for r in q.json()["rows"]] == ["Alice", "Bob"]
+
+    def test_analyze_by_session(self):
+        session_id = self._session(TS_CSV)
+        resp = client.post(f"/analyze/{session_id}?timestamp_col=timestamp&metric_col=value", headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        assert "anomalies" in resp.json()
+
+    def test_session_variants_unknown_session(self):
+        for path in ("/validate/nope", "/query/nope?sql=SELECT+1", "/clean/nope", "/analyze/nope"):
+            resp = client.post(path, headers=AUTH_HEADERS)
+            assert resp.status_code == 404
+
+    def test_query_by_session_scans_file_directly(self, monkeypatch):
+        import app.api as api
+        session_id = self._session()
+
+        def _fail(*_args, **_kwargs):
+            raise AssertionError("pandas DataFrame built for SQL query")
+
+        monkeypatch.setattr(api, "_read_table_from_upload", _fail)
+        monkeypatch.setattr(api, "load_artifact", _fail)
+        for _ in range(3):
+            resp = client.post(f"/query/{session_id}?sql=SELECT+MIN(age)+AS+m+FROM+loaded_table", headers=AUTH_HEADERS)
+            assert resp.status_code == 200
+            assert resp.json()["rows"][0]["m"] == -5
+
+    def test_query_by_session_pages(self):
+        session_id = self._session()
+        url = f"/query/{session_id}?sql=SELECT+name+FROM+loaded_table&page_size=2"
+        first = client.post(url, headers=AUTH_HEADERS).json()
+        assert [r["name"] for r in first["rows"]] == ["Alice", "Bob"]
+        assert first["has_more"] is True
+        second = client.post(url + f"&page_token={first['next_page_token']}", headers=AUTH_HEADERS).json()
+        assert [r["name"] for r in second["rows"]] == ["Charlie"]
+        assert second["has_more"] is False
+        assert second["next_page_token"] is None
+
+    def test_query_page_token_bound_to_sql(self):
+        session_id = self._session()
+        first = client.post(f"/query/{session_id}?sql=SELECT+*+FROM+loaded_table&page_size=1", headers=AUTH_HEADERS).json()
+        resp = client.post(f"/query/{session_id}?sql=SELECT+name+FROM+loaded_table&page_token={first['next_page_token']}", headers=AUTH_HEADERS)
+        assert resp.status_code == 400
+
+    def test_query_by_session_streams_ndjson(self):
+        import json
+        session_id = self._session()
+        resp = client.post(f"/query/{session_id}?sql=SELECT+name,age+FROM+loaded_table&format=ndjson", headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert rows[2] == {"name": "Charlie", "age": -5}
+
+    def test_query_ndjson_maps_non_finite_floats_to_null(self):
+        import json
+        session_id = self._session()
+        sql = "SELECT 'nan'::DOUBLE AS a, 'inf'::DOUBLE AS b, [1.5, '-inf'::DOUBLE] AS c, {'x': 'nan'::DOUBLE} AS d"
+        resp = client.post(f"/query/{session_id}", params={"sql": sql, "format": "ndjson"}, headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        assert "NaN" not in resp.text and "Infinity" not in resp.text
+        assert json.loads(resp.text) == {"a": None, "b": None, "c": [1.5, None], "d": {"x": None}}
+
+    def test_query_by_session_streams_arrow(self):
+        import pyarrow as pa
+        session_id = self._session()
+        resp = client.post(f"/query/{session_id}?sql=SELECT+*+FROM+loaded_table&format=arrow", headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        table = pa.ipc.open_stream(resp.content).read_all()
+        assert table.num_rows == 3
+        assert table.column_names == ["name", "age", "email"]
+
+    def test_query_stream_bad_sql(self):
+        session_id = self._session()
+        resp = client.post(f"/query/{session_id}?sql=INVALID+SQL&format=ndjson", headers=AUTH_HEADERS)
+        assert resp.status_code == 400
+
+
+def test_query_engine_reuses_and_evicts_connections(tmp_path):
+    from app.engine import QueryEngine
+    csv = tmp_path / "data.csv"
+    csv.write_bytes(SAMPLE_CSV)
+    engine = QueryEngine(max_connections=2)
+    with engine.connect("a", csv) as con:
+        first = con
+        assert con.execute("SELECT COUNT(*) FROM loaded_table").fetchone()[0] == 3
+    with engine.connect("a", csv) as con:
+        assert con is first
+    with engine.connect("b", csv), engine.connect("c", csv):
+        pass
+    assert len(engine) == 2
+    engine.release("b")
+    assert len(engine) == 1
+
+
+def test_query_engine_isolates_sessions(tmp_path):
+    import duckdb
+    import pytest
+    from app.engine import QueryEngine
+    csv = tmp_path / "data.csv"
+    csv.write_bytes(SAMPLE_CSV)
+    engine = QueryEngine()
+    with engine.connect("a", csv) as con:
+        con.execute("CREATE TABLE copied AS SELECT * FROM loaded_table")
+    with engine.connect("b", csv) as con:
+        with pytest.raises(duckdb.CatalogException):
+            con.execute("SELECT * FROM copied")
+
+
+def test_query_engine_streams_without_holding_the_session(tmp_path):
+    import threading
+    from app.engine import QueryEngine, stream_ndjson
+    csv = tmp_path / "data.csv"
+    csv.write_bytes(b"n\n" + b"".join(f"{i}\n".encode() for i in range(100)))
+    engine = QueryEngine()
+
+    def _stream():
+        with engine.cursor("a", csv) as cur:
+            yield from stream_ndjson(cur, "SELECT * FROM loaded_table", batch_size=10)
+    chunks = _stream()
+    first = next(chunks)
+    # a paused reader does not block other queries or release of the session
+    with engine.connect("a", csv) as con:
+        assert con.execute("SELECT COUNT(*) FROM loaded_table").fetchone()[0] == 100
+    released = threading.Thread(target=engine.release, args=("a",))
+    released.start()
+    released.join(5)
+    assert not released.is_alive()
+    assert len((first + b"".join(chunks)).splitlines()) == 100
+
+
+# ---- /jobs ----
+
+class TestJobs:
+    def _session(self, data: bytes = SAMPLE_CSV) -> str:
+        resp = client.post("/upload", files=[_upload(data)], headers=AUTH_HEADERS)
+        return resp.json()["session_id"]
+
+    def _wait(self, job_id: str) -> dict:
+        import time
+        for _ in range(200):
+            status = client.get(f"/jobs/{job_id}", headers=AUTH_HEADERS).json()
+            if status["status"] in ("succeeded", "failed", "cancelled"):
+                return status
+            time.sleep(0.02)
+        raise AssertionError("job did not finish")
+
+    def test_job_mode_returns_result_later(self):
+        session_id = self._session()
+        resp = client.post(f"/profile/{session_id}?mode=job", headers=AUTH_HEADERS)
+        assert resp.status_code == 202
+        job_id = resp.json()["job_id"]
+        assert self._wait(job_id)["progress"] == 1.0
+        result = client.get(f"/jobs/{job_id}/result", headers=AUTH_HEADERS)
+        assert result.status_code == 200
+        assert result.json()["row_count"] == 3
+
+    def test_large_session_becomes_job(self, monkeypatch):
+        import app.api as api
+        monkeypatch.setattr(api, "JOB_INLINE_MAX_BYTES", 10)
+        session_id = self._session()
+        resp = client.post(f"/validate/{session_id}?chunked=true", headers=AUTH_HEADERS)
+        assert resp.status_code == 202
+        self._wait(resp.json()["job_id"])
+        body = client.get(f"/jobs/{resp.json()['job_id']}/result", headers=AUTH_HEADERS).json()
+        assert body["summary"]["row_count"] == 3
+
+    def test_failed_job_reports_error(self):
+        session_id = self._session(TS_CSV)
+        resp = client.post(f"/analyze/{session_id}?mode=job&metric_col=missing", headers=AUTH_HEADERS)
+        status = self._wait(resp.json()["job_id"])
+        assert status["status"] == "failed" and "missing" in status["error"]
+        assert client.get(f"/jobs/{status['job_id']}/result", headers=AUTH_HEADERS).status_code == 409
+
+    def test_cancel_running_job(self):
+        import threading
+        import app.api as api
+        started, release = threading.Event(), threading.Event()
+
+        def work(job):
+            started.set()
+            release.wait(5)
+            job.checkpoint(0.5)
+            return "never"
+        job = api._jobs.submit("test", work, owner="testuser")
+        assert started.wait(5)
+        resp = client.delete(f"/jobs/{job.id}", headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        release.set()
+        assert self._wait(job.id)["status"] == "cancelled"
+
+    def test_jobs_are_private(self):
+        import app.api as api
+        job = api._jobs.submit("test", lambda job: 1, owner="someone-else")
+        assert client.get(f"/jobs/{job.id}", headers=AUTH_HEADERS).status_code == 404
+        assert client.get("/jobs/nope", headers=AUTH_HEADERS).status_code == 404
+
+    def test_extract_streams_a_query_into_a_session(self, monkeypatch):
+        import pandas as pd
+        import app.api as api
+        from connectors.duckdb_conn import DuckDBLoader, duckdb_pool
+        loader = DuckDBLoader(duckdb_pool())
+        loader.load(pd.DataFrame({"id": range(1000), "name": [f"r{i}" for i in range(1000)]}), "events")
+        monkeypatch.setattr(api, "_connector_loader", lambda connector: loader)
+        resp = client.post("/extract", json={"connector": "postgres", "sql": 'SELECT * FROM "events"', "batch_rows": 100, "name": "events"}, headers=AUTH_HEADERS)
+        assert resp.status_code == 202
+        assert self._wait(resp.json()["job_id"])["status"] == "succeeded"
+        body = client.get(f"/jobs/{resp.json()['job_id']}/result", headers=AUTH_HEADERS).json()
+        assert body["row_count"] == 1000 and body["filename"] == "events.parquet" and body["rows_per_second"] > 0
+        session = client.get(f"/session/{body['session_id']}", headers=AUTH_HEADERS).json()
+        assert session["row_count"] == 1000 and set(session["schema"]) == {"id", "name"}
+        rows = client.post(f"/query/{body['session_id']}", params={"sql": "SELECT COUNT(*) AS n FROM loaded_table"}, headers=AUTH_HEADERS).json()
+        assert rows["rows"] == [{"n": 1000}]
+
+    def test_extract_rejects_unknown_connector(self):
+        resp = client.post("/extract", json={"connector": "oracle", "sql": "SELECT 1"}, headers=AUTH_HEADERS)
+        assert resp.status_code == 422
+
+
+# ---- result cache ----
+
+class TestResultCache:
+    def test_same_content_is_answered_from_cache(self, monkeypatch):
+        import app.api as api
+        data = b"name,age\nZed,41\nYan,42\n"
+        first = client.post("/upload", files=[_upload(data, "a.csv")], headers=AUTH_HEADERS).json()["session_id"]
+        second = client.post("/upload", files=[_upload(data, "b.csv")], headers=AUTH_HEADERS).json()["session_id"]
+        assert client.post(f"/profile/{first}", headers=AUTH_HEADERS).status_code == 200
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("recomputed")
+        monkeypatch.setattr(api, "profile_dataframe", _fail)
+        before = client.get("/cache/stats", headers=AUTH_HEADERS).json()
+        resp = client.post(f"/profile/{second}", headers=AUTH_HEADERS)
+        assert resp.status_code == 200
+        assert resp.json()["dataset_id"] == second
+        assert resp.json()["row_count"] == 2
+        # direct uploads share entries with sessions of the same bytes
+        assert client.post("/profile", files=[_upload(data)], headers=AUTH_HEADERS).json()["dataset_id"] is None
+        after = client.get("/cache/stats", headers=AUTH_HEADERS).json()
+        assert after["hits"] + after["disk_hits"] == before["hits"] + before["disk_hits"] + 2
+        assert 0 < after["hit_rate"] <= 1
+
+    def test_parameters_are_part_of_the_key(self):
+        session_id = client.post("/upload", files=[_upload(TS_CSV)], headers=AUTH_HEADERS).json()["session_id"]
+        simple = client.post(f"/analyze/{session_id}", headers=AUTH_HEADERS).json()
+        rolling = client.post(f"/analyze/{session_id}?method=rolling_mad", headers=AUTH_HEADERS).json()
+        assert simple["summary"]["method_used"] == "zscore"
+        assert rolling["summary"]["method_used"] == "rolling_mad"
@@ -0,0 +1,76 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from app.batch import run_batch, batch_pool, process_context
+
+
+def _max_detector(method, frame):
+    """Stand-in for a pycatcher detector: flags each series' largest value."""
+    if frame.iloc[0, 1] < 0:
+        raise ValueError("bad series")
+    return frame.loc[[frame.iloc[:, 1].idxmax()]]
+
+
+def _slow_detector(method, frame):
+    if frame.iloc[0, 1] == 99:
+        time.sleep(5)
+    return frame.head(0)
+
+
+def _frame(n_series: int = 6, length: int = 20) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "store": np.repeat(np.arange(n_series) % 2, length),
+        "sku": np.repeat(np.arange(n_series), length),
+        "date": np.tile(pd.date_range("2024-01-01", periods=length).astype(str), n_series),
+        "value": rng.normal(10, 1, n_series * length),
+    }).sample(frac=1, random_state=0)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with ProcessPoolExecutor(max_workers=2, mp_context=process_context()) as ex:
+        yield ex
+
+
+def test_pools_do_not_fork_the_server():
+    assert process_context().get_start_method() != "fork"
+    assert batch_pool()._mp_context.get_start_method() != "fork"
+
+
+def test_batch_runs_every_series(pool):
+    df = _frame()
+    df.loc[(df.sku == 3) & (df.date == "2024-01-05"), "value"] = 1000.0
+    out = run_batch(df, "date", "value", ["store", "sku"], "stl", executor=pool, detector=_max_detector)
+    assert out["summary"]["series_count"] == 6
+    assert out["summary"]["statuses"] == {"ok": 6}
+    hit = next(r for r in out["series"] if r["key"] == {"store": 1, "sku": 3})
+    assert hit["anomalies"][0]["value"] == 1000.0
+    assert hit["anomalies"][0]["date"].startswith("2024-01-05")
+
+
+def test_batch_isolates_failures(pool):
+    df = _frame(length=10)
+    df.loc[df.sku == 0, "value"] = -1.0
+    df = df[~((df.sku == 1) & (df.date > "2024-01-05"))]  # too short to analyze
+    out = run_batch(df, "date", "value", ["sku"], executor=pool, detector=_max_detector)
+    status = {r["key"]["sku"]: r["status"] for r in out["series"]}
+    assert status[0] == "error" and status[1] == "skipped"
+    assert all(status[k] == "ok" for k in range(2, 6))
+
+
+def test_batch_per_series_timeout(pool):
+    df = _frame(n_series=3, length=10)
+    df.loc[df.sku == 1, "value"] = 99
+    started = time.perf_counter()
+    out = run_batch(df, "date", "value", ["sku"], timeout=0.5, executor=pool, detector=_slow_detector)
+    assert time.perf_counter() - started < 4
+    assert [r["status"] for r in out["series"]] == ["ok", "timeout", "ok"]
+
+
+def test_batch_missing_column(pool):
+    with pytest.raises(KeyError):
+        run_batch(_frame(), "date", "value", ["nope"], executor=pool, detector=_max_detector)
@@ -0,0 +1,338 @@
+import io
+import re
+from decimal import Decimal
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import pytest
+
+from app.storage import artifact_path, load_artifact, read_manifest, write_batches
+from connectors.base import BulkLoader, ConnectionPool, cursor_batches
+from connectors.duckdb_conn import DuckDBLoader, duckdb_pool
+from connectors.mysql_conn import MySQLLoader, _column_type as mysql_column_type, write_tsv
+from connectors.postgres_conn import PostgresLoader, _column_type as pg_column_type
+
+
+def _frame(n: int = 1000) -> pd.DataFrame:
+    return pd.DataFrame({
+        "id": np.arange(n),
+        "amount": np.linspace(0, 1, n),
+        "name": [f"row{i}" for i in range(n)],
+        "ts": pd.date_range("2024-01-01", periods=n, freq="h"),
+    })
+
+
+class _Flaky(DuckDBLoader):
+    """Fails the first attempt at every odd chunk."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen = set()
+        self.lock = threading.Lock()
+
+    def load_chunk(self, con, table, path):
+        with self.lock:
+            first = path.name not in self.seen
+            self.seen.add(path.name)
+        if first and int(path.stem.rsplit("_", 1)[1]) % 2:
+            raise ConnectionError("connection reset")
+        super().load_chunk(con, table, path)
+
+
+def test_chunks_load_in_parallel_over_pooled_connections():
+    pool = duckdb_pool(max_size=3)
+    loader = DuckDBLoader(pool, chunk_rows=100, workers=3)
+    df = _frame()
+    report = loader.load(df, "events")
+    assert report["success"] and report["rows"] == 1000 and report["chunks"] == 10
+    assert report["rows_per_second"] > 0
+    assert pool.created <= 3
+    with pool.connection() as con:
+        out = con.execute('SELECT * FROM "events" ORDER BY id').df()
+    pd.testing.assert_frame_equal(out, df, check_dtype=False)
+    # the table exists now; a second load appends
+    assert loader.load(df.head(10), "events")["rows"] == 10
+
+
+def test_failed_chunks_are_retried_with_backoff():
+    sleeps = []
+    pool = duckdb_pool()
+    loader = _Flaky(pool, chunk_rows=100, workers=2, sleep=sleeps.append)
+    report = loader.load(_frame(), "events")
+    assert report["success"] and report["rows"] == 1000
+    assert report["retries"] == 5 and sleeps == [loader.backoff] * 5
+    with pool.connection() as con:
+        assert con.execute('SELECT COUNT(*), COUNT(DISTINCT id) FROM "events"').fetchone() == (1000, 1000)
+
+
+def test_permanent_errors_are_reported_not_retried():
+    loader = DuckDBLoader(duckdb_pool(), chunk_rows=100, max_retries=3, sleep=lambda s: None)
+    report = loader.load(_frame(200), "missing", create=False)
+    assert not report["success"] and report["rows"] == 0 and report["retries"] == 0
+    assert [f["chunk"] for f in report["failed_chunks"]] == [0, 1]
+
+
+def test_incomplete_loader_fails_on_creation():
+    class NoChunks(BulkLoader):
+        def create_table(self, con, table, schema):
+            pass
+
+    with pytest.raises(TypeError, match="load_chunk"):
+        NoChunks(duckdb_pool())
+
+
+def test_pool_discards_broken_and_dead_connections():
+    made = []
+
+    class Con:
+        def __init__(self):
+            self.closed = False
+            made.append(self)
+
+        def close(self):
+            self.closed = True
+
+    pool = ConnectionPool(Con, max_size=2, alive=lambda c: not c.closed)
+    with pool.connection() as a:
+        pass
+    with pool.connection() as b:
+        assert b is a
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError("boom")
+    assert made[0].closed
+    with pool.connection() as c:
+        assert c is not a
+    assert len(made) == 2
+
+
+# ---- extraction and the Postgres/MySQL loaders, against SQLite stand-ins ----
+
+class _Cursor:
+    """DB-API cursor over SQLite that also speaks psycopg2's COPY and MySQL's LOAD DATA LOCAL."""
+
+    def __init__(self, con, name=None):
+        self.con = con
+        self.name = name
+        self.itersize = None
+        self._cur = con.db.cursor()
+        con.cursors.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def execute(self, sql, params=()):
+        match = re.match(r"LOAD DATA LOCAL INFILE %s INTO TABLE `(\w+)`.*\((.*)\)$", sql, re.S)
+        if sql.startswith(("SET ", "START TRANSACTION")):
+            self.con.statements.append(sql)
+            return
+        if match is None:
+            self._cur.execute(sql.replace("`", '"').replace(" CHARACTER SET utf8mb4", ""), params)
+            return
+        unescape = {"\\\\": "\\", "\\t": "\t", "\\n": "\n", "\\r": "\r", "\\0": "\0"}
+        with open(params[0], encoding="utf-8") as f:
+            rows = [
+                [None if v == "\\N" else re.sub(r"\\.", lambda m: unescape[m.group()], v) for v in line.split("\t")]
+                for line in f.read().split("\n")[:-1]
+            ]
+        self._insert(match.group(1), match.group(2).replace("`", '"'), rows)
+
+    def copy_expert(self, sql, stream):
+        table, cols = re.match(r'COPY "(\w+)" \((.*)\) FROM STDIN WITH \(FORMAT csv, HEADER true\)', sql).groups()
+        names = pacsv.read_csv(io.BytesIO(stream.read()), convert_options=pacsv.ConvertOptions(strings_can_be_null=True, quoted_strings_can_be_null=False))
+        self._insert(table, cols, [list(r.values()) for r in names.to_pylist()])
+
+    def _insert(self, table, cols, rows):
+        marks = ", ".join("?" * len(cols.split(",")))
+        self._cur.executemany(f'INSERT INTO "{table}" ({cols}) VALUES ({marks})', [[str(v) if v is not None else None for v in r] for r in rows])
+
+    def fetchmany(self, size):
+        return self._cur.fetchmany(size)
+
+    def close(self):
+        self._cur.close()
+
+
+class _Connection:
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.cursors = []
+        self.statements = []
+        self.rollbacks = 0
+        self.closed = False
+
+    def cursor(self, cursor_class=None, name=None):
+        return _Cursor(self, name)
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.db.rollback()
+
+    def close(self):
+        self.closed = True
+        self.db.close()
+
+
+def _sqlite_pool(tmp_path):
+    return ConnectionPool(lambda: _Connection(str(tmp_path / "db.sqlite")), max_size=2)
+
+
+def test_cursor_batches_stream_fetchmany_results():
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE t (id INTEGER, note TEXT)")
+    db.executemany("INSERT INTO t VALUES (?, ?)", [(i, None if i < 3 else f"n{i}") for i in range(7)])
+    batches = list(cursor_batches(db.execute("SELECT id, note FROM t ORDER BY id"), batch_rows=3))
+    assert [b.num_rows for b in batches] == [3, 3, 1]
+    # note is all NULL in the first batch: typed as text, not null
+    assert batches[0].schema == pa.schema([("id", pa.int64()), ("note", pa.string())])
+    assert pa.Table.from_batches(batches).column("note").to_pylist() == [None] * 3 + ["n3", "n4", "n5", "n6"]
+
+
+class _ListCursor:
+    def __init__(self, names, rows):
+        self.description = [(n, None, None, None, None, None, True) for n in names]
+        self.rows = list(rows)
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+
+def test_cursor_batches_keep_decimals_of_any_precision():
+    rows = [(Decimal("1.5"),), (Decimal("123.25"),), (None,), (Decimal("-98765.4321"),)]
+    inferred = pa.Table.from_batches(list(cursor_batches(_ListCursor(["x"], rows), batch_rows=1)))
+    assert inferred.schema.field("x").type == pa.string()
+    assert inferred.column("x").to_pylist() == ["1.5", "123.25", None, "-98765.4321"]
+    declared = pa.Table.from_batches(list(cursor_batches(_ListCursor(["x"], rows), batch_rows=1, types=[pa.decimal128(38, 4)])))
+    assert declared.column("x").to_pylist() == [Decimal("1.5"), Decimal("123.25"), None, Decimal("-98765.4321")]
+
+
+def test_cursor_batches_reject_values_outgrowing_the_schema():
+    batches = cursor_batches(_ListCursor(["n"], [(1,), (2 ** 63,)]), batch_rows=1)
+    next(batches)
+    with pytest.raises(ValueError, match="'n'"):
+        next(batches)
+
+
+def test_result_types_come_from_the_cursor_description():
+    from pymysql.constants import FIELD_TYPE
+    assert pg_column_type(("x", 1700, None, None, 12, 2, True)) == pa.decimal128(12, 2)
+    assert pg_column_type(("x", 1700, None, None, None, None, True)) == pa.string()
+    assert pg_column_type(("x", 20, None, 8, None, None, True)) == pa.int64()
+    assert pg_column_type(("x", 1114, None, 8, None, None, True)) is None
+    assert mysql_column_type(("x", FIELD_TYPE.NEWDECIMAL, None, 12, 12, 2, True)) == pa.decimal128(38, 2)
+    assert mysql_column_type(("x", FIELD_TYPE.NEWDECIMAL, None, 67, 67, 2, True)) == pa.string()
+    assert mysql_column_type(("x", FIELD_TYPE.LONGLONG, None, 20, 20, 0, True)) == pa.int64()
+    assert mysql_column_type(("x", FIELD_TYPE.DOUBLE, None, 22, 22, 31, True)) == pa.float64()
+    assert mysql_column_type(("x", FIELD_TYPE.VAR_STRING, None, 40, 40, 0, True)) is None
+
+
+def test_extract_holds_one_connection_and_streams_batches():
+    pool = duckdb_pool()
+    loader = DuckDBLoader(pool)
+    loader.load(_frame(), "events")
+    batches = loader.extract('SELECT id, name FROM "events" ORDER BY id', batch_rows=300)
+    assert [b.num_rows for b in batches] == [300, 300, 300, 100]
+    assert pool.created == 1
+
+
+def test_write_batches_builds_a_session_dataset(tmp_path):
+    schema = pa.schema([("id", pa.int64()), ("name", pa.string())])
+    batches = (pa.record_batch([pa.array(range(i, i + 5)), pa.array([f"r{j}" for j in range(i, i + 5)])], schema=schema) for i in (0, 5))
+    raw = tmp_path / "extract.parquet"
+    manifest = write_batches(batches, raw)
+    assert manifest["row_count"] == 10
+    assert [c["dtype"] for c in manifest["columns"]] == [str(pd.Series([1]).dtype), str(pd.Series(["a"]).dtype)]
+    assert read_manifest(raw) == manifest and raw.stat().st_size == artifact_path(raw).stat().st_size
+    assert load_artifact(raw)["id"].tolist() == list(range(10))
+    assert write_batches(iter(()), tmp_path / "empty.parquet") is None
+
+
+def _mixed(n=250):
+    return pd.DataFrame({
+        "id": np.arange(n),
+        "amount": [None if i % 7 == 0 else i / 4 for i in range(n)],
+        "name": ["" if i % 5 == 0 else None if i % 11 == 0 else f'a,"b"\\c\td\n{i}' for i in range(n)],
+    })
+
+
+def test_postgres_loader_copies_csv_and_extracts_on_a_named_cursor(tmp_path):
+    pool = _sqlite_pool(tmp_path)
+    loader = PostgresLoader(pool, chunk_rows=100, workers=2)
+    df = _mixed()
+    report = loader.load(df, "events")
+    assert report["success"] and report["rows"] == 250 and report["chunks"] == 3
+    batches = list(loader.extract('SELECT id, amount, name FROM "events" ORDER BY id', batch_rows=100))
+    out = pa.Table.from_batches(batches).to_pandas()
+    # quoted empty strings stay empty, unquoted empty fields are NULL
+    pd.testing.assert_frame_equal(out, df, check_dtype=False)
+    with pool.connection() as con:
+        named = [c for c in con.cursors if c.name]
+        assert len(named) == 1 and named[0].name.startswith("databotics_")
+        assert con.statements == ["SET TRANSACTION READ ONLY"] and con.rollbacks == 2
+
+
+def test_mysql_loader_loads_escaped_tsv(tmp_path):
+    pool = _sqlite_pool(tmp_path)
+    loader = MySQLLoader(pool, chunk_rows=100, workers=2)
+    df = _mixed()
+    report = loader.load(df, "events")
+    assert report["success"] and report["rows"] == 250
+    out = pa.Table.from_batches(list(loader.extract('SELECT id, amount, name FROM "events" ORDER BY id'))).to_pandas()
+    pd.testing.assert_frame_equal(out, df, check_dtype=False)
+    assert not list(tmp_path.rglob("*.tsv"))
+    with pool.connection() as con:
+        # read-only for the extract, rolled back and writable again afterwards
+        assert con.statements == ["SET SESSION TRANSACTION READ ONLY", "START TRANSACTION READ ONLY", "SET SESSION TRANSACTION READ WRITE"]
+        assert con.rollbacks == 2
+
+
+def test_write_tsv_uses_load_data_escapes(tmp_path):
+    src = tmp_path / "chunk.parquet"
+    pq.write_table(pa.table({"flag": [True, None], "text": ["a\tb\\", None]}), src)
+    write_tsv(src, tmp_path / "chunk.tsv")
+    assert (tmp_path / "chunk.tsv").read_text() == "1\ta\\tb\\\\\n\\N\t\\N\n"
+
+
+def test_snowflake_stages_each_load_under_its_own_prefix():
+    from connectors.snowflake_conn import SnowflakeLoader
+    statements = []
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            pass
+
+        def execute(self, sql):
+            statements.append(sql)
+
+    class Con:
+        def cursor(self):
+            return Cursor()
+
+    loader = SnowflakeLoader(ConnectionPool(Con), chunk_rows=100, workers=2)
+    for _ in range(2):
+        assert loader.load(_frame(200), "EVENTS")["success"]
+    puts = [re.search(r"@%\"EVENTS\"/(\w+)/ ", sql).group(1) for sql in statements if sql.startswith("PUT")]
+    assert len(puts) == 4 and len(set(puts)) == 2
+    for prefix in set(puts):
+        copies = [sql for sql in statements if sql.startswith("COPY") and f"/{prefix}/ FILES=" in sql]
+        removes = [sql for sql in statements if sql.startswith(f'REMOVE @%"EVENTS"/{prefix}/chunk_')]
+        assert len(copies) == 2 and len(removes) == 2
@@ -0,0 +1,54 @@
+import threading
+import time
+
+from app.jobs import CANCELLED, SUCCEEDED, JobManager
+
+
+def _wait(manager, job_id, status):
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job is not None and job.status == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job never reached {status}")
+
+
+def test_jobs_are_visible_from_another_process(tmp_path):
+    path = tmp_path / "jobs.sqlite"
+    owner, other = JobManager(path=path), JobManager(path=path)
+    job = owner.submit("profile", lambda job: {"row_count": 3}, owner="alice")
+    seen = _wait(other, job.id, SUCCEEDED)
+    assert seen.result == {"row_count": 3} and seen.progress == 1.0
+    assert other.get(job.id, owner="bob") is None
+    assert other.get("missing") is None
+
+
+def test_cancel_from_another_process_stops_the_job(tmp_path):
+    path = tmp_path / "jobs.sqlite"
+    owner, other = JobManager(path=path, sync_interval=0), JobManager(path=path)
+    started, stop = threading.Event(), threading.Event()
+
+    def work(job):
+        started.set()
+        while not stop.wait(0.01):
+            job.checkpoint(0.5)
+    job = owner.submit("validate", work)
+    assert started.wait(5)
+    other.cancel(other.get(job.id))
+    try:
+        assert _wait(other, job.id, CANCELLED).finished_at is not None
+    finally:
+        stop.set()
+
+
+def test_finished_jobs_are_trimmed(tmp_path):
+    manager = JobManager(path=tmp_path / "jobs.sqlite", max_finished=2)
+    ids = []
+    for i in range(4):
+        job = manager.submit("t", lambda job, i=i: i)
+        job.future.result()
+        ids.append(job.id)
+    manager.submit("t", lambda job: None).future.result()
+    fresh = JobManager(path=tmp_path / "jobs.sqlite")
+    assert fresh.get(ids[0]) is None and fresh.get(ids[3]).result == 3
@@ -0,0 +1,196 @@
+import asyncio
+import pytest
+import app.llm as llm
+from app.llm import LLMCache
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    """Route LLM calls to a local stub and give each test a fresh on-disk cache."""
+    calls = []
+
+    async def fake_request(payload, key=None):
+        calls.append(payload)
+        return {"content": f"SELECT 1;\n\nanswer {len(calls)}"}
+
+    monkeypatch.setenv("NIM_API_KEY", "test-key")
+    monkeypatch.setattr(llm, "_nim_request", fake_request)
+    monkeypatch.setattr(llm, "_llm_cache", LLMCache(path=str(tmp_path / "cache.sqlite")))
+    return calls
+
+
+SCHEMA = {"id": "int", "name": "str"}
+
+
+def generate_sql(*args, **kwargs):
+    return asyncio.run(llm.agenerate_sql(*args, **kwargs))
+
+
+def test_identical_requests_hit_cache(stub):
+    first = generate_sql("top customers", SCHEMA)
+    again = generate_sql("  top   customers ", dict(reversed(list(SCHEMA.items()))))
+    assert first == again == ("SELECT 1;", "answer 1")
+    assert len(stub) == 1
+    assert llm.llm_cache().stats()["hits"] == 1
+
+
+def analyze_narrative(summary):
+    return asyncio.run(llm.aanalyze_narrative(summary))
+
+
+def test_narrative_is_cached_by_summary(stub):
+    assert analyze_narrative({"count": 2, "method_used": "zscore"}) == "SELECT 1;\n\nanswer 1"
+    assert analyze_narrative({"method_used": "zscore", "count": 2}) == "SELECT 1;\n\nanswer 1"
+    analyze_narrative({"count": 3, "method_used": "zscore"})
+    generate_sql("top customers", SCHEMA)
+    assert len(stub) == 3
+    assert llm.llm_cache().stats()["hits"] == 1
+
+
+def test_narrative_falls_back_without_caching(stub, monkeypatch):
+    async def broken(payload, key=None):
+        raise RuntimeError("upstream down")
+    monkeypatch.setattr(llm, "_nim_request", broken)
+    assert analyze_narrative({"count": 2, "method_used": "zscore"}) == (
+        "Analysis used method=zscore. Found 2 anomalies. Inspect flagged points for root cause."
+    )
+    assert llm.llm_cache().stats()["entries"] == 0
+
+
+def test_inputs_are_part_of_the_key(stub):
+    generate_sql("top customers", SCHEMA)
+    generate_sql("top customers", {**SCHEMA, "email": "str"})
+    generate_sql("top customers", SCHEMA, sample_rows=[{"id": 1}])
+    generate_sql("top customers", SCHEMA, sample_rows=[{"id": 1}])
+    assert len(stub) == 3
+
+
+def test_disk_store_survives_restart(stub, tmp_path):
+    generate_sql("top customers", SCHEMA)
+    llm._llm_cache = LLMCache(path=str(tmp_path / "cache.sqlite"))
+    assert generate_sql("top customers", SCHEMA) == ("SELECT 1;", "answer 1")
+    assert len(stub) == 1
+    assert llm.llm_cache().stats()["disk_hits"] == 1
+
+
+def test_entries_expire(stub, tmp_path):
+    now = [1000.0]
+    llm._llm_cache = LLMCache(path=str(tmp_path / "ttl.sqlite"), ttl=60, clock=lambda: now[0])
+    generate_sql("top customers", SCHEMA)
+    now[0] += 61
+    assert generate_sql("top customers", SCHEMA)[1] == "answer 2"
+    assert llm.llm_cache().stats()["misses"] == 2
+
+
+def test_failures_are_not_cached(stub, monkeypatch):
+    async def broken(payload, key=None):
+        raise RuntimeError("upstream down")
+    monkeypatch.setattr(llm, "_nim_request", broken)
+    sql, explanation = generate_sql("top customers", SCHEMA)
+    assert explanation.startswith("Deterministic fallback")
+    assert llm.llm_cache().stats()["entries"] == 0
+
+
+def test_cache_is_opened_on_first_use(monkeypatch, tmp_path):
+    path = tmp_path / "lazy.sqlite"
+    monkeypatch.setattr(llm, "LLM_CACHE_PATH", str(path))
+    monkeypatch.setattr(llm, "_llm_cache", None)
+    assert not path.exists()
+    assert llm.llm_cache() is llm.llm_cache()
+    assert path.exists()
+
+
+# ---- async client against a local fake NIM server ----
+
+class _FakeNIM:
+    def __init__(self):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.fail_next = 0
+        self.delay = 0.0
+        lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                import json
+                import time
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with lock:
+                    fake.requests += 1
+                    fake.active += 1
+                    fake.max_active = max(fake.max_active, fake.active)
+                    failing = fake.fail_next > 0
+                    fake.fail_next -= failing
+                time.sleep(fake.delay)
+                with lock:
+                    fake.active -= 1
+                if failing:
+                    data, status = b"{}", 503
+                else:
+                    data, status = json.dumps({"content": f"SELECT 1;\n\n{body['messages'][0]['content'][-40:]}"}).encode(), 200
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if failing:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/messages"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def fake_nim(monkeypatch):
+    server = _FakeNIM()
+    monkeypatch.setenv("NIM_API_KEY", "test-key")
+    monkeypatch.setattr(llm, "_llm_cache", LLMCache(path=None))
+    monkeypatch.setattr(llm, "nim_client", llm.NIMClient(url=server.url, max_concurrency=2, backoff=0.01))
+    yield server
+    server.server.shutdown()
+
+
+def test_duplicate_requests_are_coalesced(fake_nim):
+    fake_nim.delay = 0.2
+
+    async def run():
+        return await asyncio.gather(*(llm.agenerate_sql("top customers", SCHEMA) for _ in range(10)))
+    results = asyncio.run(run())
+    assert len(set(results)) == 1 and results[0][0] == "SELECT 1;"
+    assert fake_nim.requests == 1
+    assert llm.nim_client.coalesced == 9
+
+
+def test_concurrency_is_capped(fake_nim):
+    fake_nim.delay = 0.05
+
+    async def run():
+        return await asyncio.gather(*(llm.agenerate_sql(f"question {i}", SCHEMA) for i in range(6)))
+    results = asyncio.run(run())
+    assert all(sql == "SELECT 1;" for sql, _ in results)
+    assert fake_nim.requests == 6
+    assert fake_nim.max_active <= 2
+
+
+def test_retries_transient_errors(fake_nim):
+    fake_nim.fail_next = 2
+    sql, explanation = asyncio.run(llm.agenerate_sql("top customers", SCHEMA))
+    assert sql == "SELECT 1;" and not explanation.startswith("Deterministic")
+    assert fake_nim.requests == 3
+
+
+def test_gives_up_after_max_retries(fake_nim):
+    fake_nim.fail_next = 10
+    sql, explanation = asyncio.run(llm.agenerate_sql("top customers", SCHEMA))
+    assert explanation.startswith("Deterministic fallback")
+    assert fake_nim.requests == llm.nim_client.max_retries + 1
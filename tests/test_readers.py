@@ -0,0 +1,120 @@
+import io
+
+import pandas as pd
+import pytest
+
+import app.readers as readers
+from app.readers import iter_table, read_table, sniff_delimiter, sniff_format
+
+CSV = b"name,age,joined,score\nAlice,30,2024-01-01,1.5\nNA,,2024-01-02,\nCharlie,-5,,2.0\n"
+
+
+def _xlsx(df: pd.DataFrame) -> bytes:
+    buf = io.BytesIO()
+    df.to_excel(buf, index=False)
+    return buf.getvalue()
+
+
+def _parquet(df: pd.DataFrame) -> bytes:
+    buf = io.BytesIO()
+    df.to_parquet(buf, index=False)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("data, fmt", [
+    (CSV, "csv"),
+    (b"a\tb\n1\t2\n", "tsv"),
+    (b"a;b\n1;2\n", "csv"),
+    (b'[{"a": 1}]', "json"),
+    (b'{\n  "a": [1, 2]\n}', "json"),
+    (b'{"a": 1}\n{"a": 2}\n', "ndjson"),
+    (_parquet(pd.DataFrame({"a": [1]})), "parquet"),
+    (_xlsx(pd.DataFrame({"a": [1]})), "xlsx"),
+])
+def test_sniff_format(data, fmt):
+    assert sniff_format(data) == fmt
+
+
+def test_sniff_delimiter_prefers_consistent_splits():
+    assert sniff_delimiter("a|b|c\n1|2|3\n") == "|"
+    # commas inside one text field do not beat a consistent semicolon
+    assert sniff_delimiter("a;b\nx, y, z;1\nq;2\n") == ";"
+
+
+def test_csv_matches_pandas():
+    pd.testing.assert_frame_equal(read_table(CSV), pd.read_csv(io.BytesIO(CSV)))
+
+
+def test_types_changing_after_sample_fall_back_to_pandas(monkeypatch):
+    monkeypatch.setattr(readers, "SAMPLE_BYTES", 16)
+    data = b"a,b\n1,x\n" + b"2,y\n" * 10 + b"oops,z\n"
+    pd.testing.assert_frame_equal(read_table(data), pd.read_csv(io.BytesIO(data)))
+
+
+def test_duplicate_headers_are_renamed_like_pandas():
+    assert list(read_table(b"a,a\n1,2\n").columns) == ["a", "a.1"]
+
+
+def test_native_formats(tmp_path):
+    df = pd.DataFrame({"a": [1, 2], "t": ["2024-01-01", "2024-01-02"]})
+    assert read_table(_parquet(df))["a"].tolist() == [1, 2]
+    ndjson = read_table(b'{"a": 1, "t": "2024-01-01"}\n{"a": 2, "t": "2024-01-02"}\n')
+    assert ndjson["t"].tolist() == ["2024-01-01", "2024-01-02"]  # dates stay text, like CSV
+    assert read_table(b'[{"a": 1}, {"a": 2}]')["a"].tolist() == [1, 2]
+    assert read_table(_xlsx(df))["a"].tolist() == [1, 2]
+    path = tmp_path / "upload.bin"
+    path.write_bytes(b"a\tb\n" + b"1\t2\n" * 5)
+    assert [len(c) for c in iter_table(path, 2)] == [2, 2, 1]
+
+
+def test_unreadable_data_raises_value_error():
+    with pytest.raises(ValueError):
+        read_table(b"")
+    with pytest.raises(ValueError):
+        read_table(b"PK\x03\x04garbage")
+
+
+def test_xlsx_streams_every_sheet_like_read_excel(monkeypatch):
+    monkeypatch.setattr(readers, "XLSX_BATCH_ROWS", 2)  # several batches per sheet
+    first = pd.DataFrame({"id": [1, 2, 3, 4, 5], "name": ["a", None, "c", "d", "e"], "amount": [1.5, 2.0, None, 4.0, 5.5]})
+    second = pd.DataFrame({"sku": ["x", "y"], "qty": [3, 4]})
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf) as writer:
+        first.to_excel(writer, sheet_name="Orders", index=False)
+        second.to_excel(writer, sheet_name="Stock", index=False)
+    data = buf.getvalue()
+    sheets = list(readers.iter_xlsx(data))
+    assert [name for name, _, _ in sheets] == ["Orders", "Stock"]
+    assert all(seconds >= 0 for _, _, seconds in sheets)
+    pd.testing.assert_frame_equal(sheets[0][1], pd.read_excel(io.BytesIO(data), sheet_name="Orders"))
+    pd.testing.assert_frame_equal(sheets[1][1], pd.read_excel(io.BytesIO(data), sheet_name="Stock"))
+    pd.testing.assert_frame_equal(read_table(data), sheets[0][1])
+
+
+def test_workbook_sheets_are_written_batch_by_batch(tmp_path, monkeypatch):
+    import pyarrow.parquet as pq
+    from app.storage import artifact_path, load_artifact, read_sheets, sheet_path, write_workbook
+    monkeypatch.setattr(readers, "XLSX_BATCH_ROWS", 2)
+    orders = pd.DataFrame({"id": [1, 2, 3, 4, 5], "name": list("abcde")})
+    drift = pd.DataFrame({"v": [1, 2, 3.5, 4]})  # int batch, then a float batch
+    raw = tmp_path / "book.xlsx"
+    with pd.ExcelWriter(raw) as writer:
+        orders.to_excel(writer, sheet_name="Orders", index=False)
+        drift.to_excel(writer, sheet_name="Drift", index=False)
+    manifest = write_workbook(raw)
+    assert manifest["row_count"] == 5
+    assert pq.ParquetFile(artifact_path(raw)).num_row_groups == 3
+    assert load_artifact(raw)["id"].tolist() == [1, 2, 3, 4, 5]
+    assert load_artifact(sheet_path(raw, 1))["v"].tolist() == [1.0, 2.0, 3.5, 4.0]
+    assert [(s["name"], s["row_count"], s["column_count"]) for s in read_sheets(raw)] == [("Orders", 5, 2), ("Drift", 4, 1)]
+
+
+def test_workbook_sheets_survive_an_unstorable_first_sheet(tmp_path):
+    from app.storage import read_manifest, read_sheets, sheet_path, write_workbook
+    raw = tmp_path / "book.xlsx"
+    with pd.ExcelWriter(raw) as writer:
+        pd.DataFrame({"mixed": [1, "a", 2.5]}).to_excel(writer, sheet_name="Mixed", index=False)
+        pd.DataFrame({"sku": ["x", "y"]}).to_excel(writer, sheet_name="Stock", index=False)
+    assert write_workbook(raw) is None
+    assert [s["name"] for s in read_sheets(raw)] == ["Mixed", "Stock"]
+    assert read_manifest(sheet_path(raw, 1))["row_count"] == 2
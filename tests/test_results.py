@@ -0,0 +1,42 @@
+from app.results import ResultCache, result_key
+
+
+def test_result_key_is_canonical():
+    assert result_key("abc", "analyze", window=7, method="zscore") == result_key("abc", "analyze", method="zscore", window=7)
+    assert result_key("abc", "analyze", window=7) != result_key("abd", "analyze", window=7)
+    assert result_key("abc", "profile") != result_key("abc", "validate")
+
+
+def test_lru_is_bounded_by_bytes():
+    cache = ResultCache(path=None, max_bytes=25)
+    cache.put("a", "x" * 10)
+    cache.put("b", "y" * 10)
+    assert cache.get("a") == "x" * 10  # a is now most recent
+    cache.put("c", "z" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.bytes == 20
+    cache.put("huge", "h" * 100)
+    assert cache.get("huge") is None and cache.bytes == 20
+
+
+def test_disk_persistence_and_stats(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    ResultCache(path=path).put("k", '{"row_count": 3}')
+    cache = ResultCache(path=path)
+    assert cache.get("k") == '{"row_count": 3}'
+    assert cache.get("k") == '{"row_count": 3}'
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 2 / 3
+    assert stats["persistent"] is True
+
+
+def test_disk_is_bounded_by_bytes(tmp_path):
+    clock = iter(range(100))
+    cache = ResultCache(path=str(tmp_path / "results.sqlite"), max_bytes=0, disk_bytes=25, clock=lambda: next(clock))
+    for key in "abc":
+        cache.put(key, key * 10)
+    assert cache.get("a") is None
+    assert cache.get("b") == "b" * 10 and cache.get("c") == "c" * 10
@@ -0,0 +1,108 @@
+import time
+
+from app.sessions import SessionStore
+from app.storage import artifact_path, save_frame
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _dataset(tmp_path, name, size=100):
+    raw = tmp_path / name
+    raw.write_bytes(b"x" * size)
+    return raw
+
+
+def test_get_refreshes_and_ttl_expires(tmp_path):
+    clock = _Clock()
+    store = SessionStore(tmp_path, ttl=60, clock=clock)
+    raw = _dataset(tmp_path, "a.csv")
+    artifact_path(raw).write_bytes(b"p")
+    store.add("a", raw, "abc")
+    clock.now += 50
+    assert store.get("a") == raw
+    assert store.sha256("a") == "abc"
+    clock.now += 50  # 50s since the last get: still live
+    assert "a" in store
+    clock.now += 61
+    assert store.get("a") is None
+    assert not raw.exists() and not artifact_path(raw).exists()
+    assert len(store) == 0
+
+
+def test_lru_eviction_over_byte_budget(tmp_path):
+    clock = _Clock()
+    store = SessionStore(tmp_path, max_bytes=250, clock=clock)
+    removed = []
+    store.on_remove.append(removed.append)
+    for name in "abc":
+        clock.now += 1
+        store.add(name, _dataset(tmp_path, f"{name}.csv"))
+        if name == "b":
+            clock.now += 1
+            store.get("a")  # a is now more recently used than b
+    assert removed == ["b"]
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.total_bytes() == 200
+
+
+def test_sessions_persist_across_instances(tmp_path):
+    raw = _dataset(tmp_path, "a.csv")
+    SessionStore(tmp_path).add("a", raw, "abc")
+    other = SessionStore(tmp_path)
+    assert other.get("a") == raw
+    assert other.sha256("a") == "abc"
+
+
+def test_missing_file_drops_session(tmp_path):
+    store = SessionStore(tmp_path)
+    raw = _dataset(tmp_path, "a.csv")
+    store.add("a", raw)
+    raw.unlink()
+    assert store.get("a") is None
+    assert len(store) == 0
+
+
+def test_sweep_removes_expired_and_remeasures(tmp_path):
+    clock = _Clock()
+    store = SessionStore(tmp_path, ttl=60, clock=clock)
+    store.add("old", _dataset(tmp_path, "old.csv"))
+    clock.now += 30
+    fresh = _dataset(tmp_path, "new.csv")
+    store.add("new", fresh)
+    artifact_path(fresh).write_bytes(b"y" * 50)
+    clock.now += 40
+    assert store.sweep() == 1
+    assert store.get("old") is None
+    assert store.total_bytes() == 150
+
+
+def test_background_sweeper(tmp_path):
+    clock = _Clock()
+    store = SessionStore(tmp_path, ttl=60, clock=clock)
+    store.add("a", _dataset(tmp_path, "a.csv"))
+    clock.now += 61
+    store.start_sweeper(interval=0.01)
+    try:
+        deadline = time.time() + 5
+        while len(store) and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        store.stop_sweeper()
+    assert len(store) == 0
+
+
+def test_hard_linked_artifact_counts_once(tmp_path):
+    import pandas as pd
+    store = SessionStore(tmp_path)
+    raw = tmp_path / "derived.parquet"
+    save_frame(pd.DataFrame({"a": range(1000)}), raw)
+    assert raw.stat().st_ino == artifact_path(raw).stat().st_ino
+    store.add("d", raw)
+    manifest = raw.with_name(raw.name + ".manifest.json")
+    assert store.total_bytes() == raw.stat().st_size + manifest.stat().st_size
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from app.sketches import HyperLogLog, QuantileSketch, RunningMoments, Reservoir
+from app.profiling import profile_chunks
+
+
+def test_hyperloglog_within_error_bound():
+    values = pd.Series(np.arange(200_000))
+    hll = HyperLogLog()
+    for chunk in np.array_split(values.to_numpy(), 4):
+        hll.update(pd.Series(chunk))
+    assert abs(hll.count() - 200_000) / 200_000 < 4 * hll.relative_error
+
+
+def test_hyperloglog_merge():
+    a, b = HyperLogLog(), HyperLogLog()
+    a.update(pd.Series(range(0, 1000)))
+    b.update(pd.Series(range(500, 1500)))
+    a.merge(b)
+    assert abs(a.count() - 1500) < 50
+
+
+def test_quantile_sketch_rank_error():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=500_000)
+    sketch = QuantileSketch(k=512, seed=0)
+    for chunk in np.array_split(values, 10):
+        sketch.update(chunk)
+    est = sketch.quantiles([0.1, 0.5, 0.9])
+    for q, v in zip([0.1, 0.5, 0.9], est):
+        assert abs((values <= v).mean() - q) <= sketch.rank_error
+
+
+def test_running_moments_match_numpy():
+    rng = np.random.default_rng(1)
+    values = rng.uniform(size=10_000)
+    moments = RunningMoments()
+    for chunk in np.array_split(values, 7):
+        moments.update(chunk)
+    assert np.isclose(moments.mean, values.mean())
+    assert np.isclose(moments.std(), values.std(ddof=1))
+    assert moments.min == values.min()
+
+
+def test_reservoir_keeps_k_rows():
+    df = pd.DataFrame({"a": range(1000)})
+    res = Reservoir(5, seed=0)
+    for start in range(0, 1000, 100):
+        res.update(df.iloc[start:start + 100])
+    assert len(res.rows) == 5
+    assert res.seen == 1000
+    assert len({r["a"] for r in res.rows}) == 5
+
+
+def test_profile_chunks_exact_counts():
+    df = pd.DataFrame({"x": [1.0, None, 3.0, 4.0], "s": ["a", "b", None, "a"]})
+    profile = profile_chunks([df.iloc[:2], df.iloc[2:]], seed=0)
+    cols = {c["name"]: c for c in profile["columns"]}
+    assert profile["row_count"] == 4
+    assert cols["x"]["null_count"] == 1
+    assert cols["x"]["stats"]["max"] == 4.0
+    assert cols["s"]["distinct_count"] == 2
+    assert cols["s"]["stats"] is None
@@ -1,5 +1,5 @@
 import pandas as pd
-from app.validation import validate_dataframe, load_rules
+from app.validation import validate_dataframe, validate_chunks, validate_column, load_rules, compile_rules, RulesetRegistry
 
 def test_validate_basic():
     df = pd.DataFrame({
@@ -11,3 +11,129 @@ def test_validate_basic():
     report = validate_dataframe(df, rules)
     assert 'errors' in report
     assert report['summary']['error_count'] >= 1
+
+
+def test_compiled_plan_matches_rules():
+    rules = load_rules('ui/validation_rules/basic.yaml')
+    plans = compile_rules(rules)
+    assert [p.column for p in plans] == ['name', 'age', 'email']
+    assert plans[2].pattern is not None
+    df = pd.DataFrame({'name': ['A'], 'age': [200], 'email': ['bad']})
+    assert validate_dataframe(df, plans) == validate_dataframe(df, rules)
+
+
+def test_validate_range_and_regex_with_nulls():
+    df = pd.DataFrame({
+        'name': ['Alice', 'Bob', 'Carol', 'Dan'],
+        'age': [30, None, 150, -1],
+        'email': ['a@example.com', None, 'nope', 'd@example.com'],
+    })
+    report = validate_dataframe(df, load_rules('ui/validation_rules/basic.yaml'))
+    by_msg = {e['message']: e['row_sample'] for e in report['errors']}
+    assert by_msg['Values below min 0'] == {3: -1.0}
+    assert by_msg['Values above max 120'] == {2: 150.0}
+    assert by_msg['Regex mismatch'] == {2: 'nope'}
+
+
+def test_ruleset_registry_caches_and_reloads(tmp_path):
+    import os
+    path = tmp_path / 'rules.yaml'
+    path.write_text("columns:\n  a:\n    required: true\n")
+    registry = RulesetRegistry(max_entries=2)
+    first = registry.load(path)
+    assert registry.load(path) is first
+    assert registry.hits == 1
+    assert registry.get(first.id) is first
+
+    path.write_text("columns:\n  b:\n    required: true\n")
+    mtime = path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(mtime, mtime))
+    second = registry.load(path)
+    assert second.id != first.id
+    assert [p.column for p in second.plans] == ['b']
+
+
+def test_ruleset_registry_lru_eviction():
+    registry = RulesetRegistry(max_entries=2)
+    ids = [registry.register({'columns': {f'c{i}': {'required': True}}}).id for i in range(3)]
+    assert len(registry) == 2
+    assert registry.get(ids[0]) is None
+    assert registry.get(ids[2]) is not None
+    # same content, same id
+    assert registry.register({'columns': {'c2': {'required': True}}}).id == ids[2]
+
+
+def test_registered_rulesets_are_shared_through_sqlite(tmp_path):
+    path = tmp_path / 'rulesets.sqlite'
+    rules = {'columns': {'a': {'required': True}}}
+    rs = RulesetRegistry(path=path).register(rules, source='api')
+    other = RulesetRegistry(path=path).get(rs.id)
+    assert other is not None and other.rules == rules and other.source == 'api'
+    assert [p.column for p in other.plans] == ['a']
+    assert RulesetRegistry(path=path).get('missing') is None
+
+
+def test_validate_chunks_counts_across_chunks(tmp_path):
+    df = pd.DataFrame({
+        'name': ['a', 'b', None, 'd', 'e'],
+        'age': [30, -5, 200, 40, -1],
+        'email': ['a@b.co', 'bad', 'a@b.co', 'c@d.ef', 'c@d.ef'],
+    })
+    rules = {'columns': {
+        'name': {'required': True},
+        'age': {'type': 'int', 'min': 0, 'max': 120},
+        'email': {'regex': r'^[^@\s]+@[^@\s]+\.[^@\s]+$', 'unique': True},
+    }}
+    sidecar = tmp_path / 'violations.parquet'
+    report = validate_chunks([df.iloc[:2], df.iloc[2:4], df.iloc[4:]], rules, sidecar_path=sidecar)
+    counts = {e['message']: e['count'] for e in report['errors']}
+    assert counts == {
+        'Values below min 0': 2,
+        'Values above max 120': 1,
+        'Regex mismatch': 1,
+        'Duplicate values found': 4,
+    }
+    assert report['summary']['row_count'] == 5
+    rows = pd.read_parquet(sidecar)
+    dup_rule = [e['rule'] for e in report['errors'] if e['message'] == 'Duplicate values found'][0]
+    assert sorted(rows[rows['rule'] == dup_rule]['row']) == [0, 2, 3, 4]
+    below = [e for e in report['errors'] if e['message'] == 'Values below min 0'][0]
+    assert below['row_sample'] == {1: -5, 4: -1}
+
+
+def test_validate_chunks_unique_across_chunk_dtypes():
+    # the same id read as int64, float64 (null in the chunk) and text in different chunks
+    chunks = [
+        pd.DataFrame({'id': [5, 6]}),
+        pd.DataFrame({'id': [5.0, None]}),
+        pd.DataFrame({'id': ['6', 'x']}),
+        pd.DataFrame({'id': [7.5, 8]}),
+    ]
+    report = validate_chunks(chunks, {'columns': {'id': {'unique': True}}})
+    dup = [e for e in report['errors'] if e['message'] == 'Duplicate values found'][0]
+    assert dup['count'] == 4
+    assert dup['row_sample'] == {0: '5', 1: '6', 2: '5'}
+
+
+def test_validate_chunks_required_column_missing():
+    report = validate_chunks([pd.DataFrame({'a': [1, 2]})], {'columns': {'b': {'required': True}}})
+    assert report['errors'][0]['message'] == 'Missing required column or all values null'
+    assert report['summary']['violation_count'] == 0
+
+
+def test_parallel_validation_keeps_ruleset_order():
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+    n = 20_000
+    df = pd.DataFrame({f'c{i}': list(range(-1, n - 1)) for i in range(6)})
+    rules = {'columns': {f'c{i}': {'type': 'int', 'min': 0, 'max': n - 10} for i in reversed(range(6))}}
+    rules['columns']['absent'] = {'required': True}
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        threaded = validate_dataframe(df, rules, executor=ex)
+    from app.batch import process_context
+    with ProcessPoolExecutor(max_workers=2, mp_context=process_context()) as ex:
+        processed = validate_dataframe(df, rules, executor=ex)
+    plans = compile_rules(rules)
+    inline = {'errors': [e.to_dict() for p in plans for e in validate_column(df, p)]}
+    assert threaded['errors'] == inline['errors'] == processed['errors']
+    assert [e['column'] for e in threaded['errors']][:2] == ['c5', 'c5']
+    assert threaded['errors'][-1]['column'] == 'absent'